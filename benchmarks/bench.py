@@ -0,0 +1,302 @@
+# 벤치마크 (benchmarks/bench.py)
+# tests/의 테스트는 글이 하나뿐인 data.sql로 기능만 확인하기 때문에, 성능이 나빠져도 알 수 없다.
+# 이 스크립트는 어플리케이션 팩토리로 큰 데이터베이스를 만든 뒤, app.test_client()로 주요 엔드포인트를 반복 호출하여
+# 초당 처리량과 p50/p95/p99 응답 시간을 측정하고, 저장된 기준값(baseline)과 비교한다.
+
+# 사용법 (pip install -e . 로 flaskr을 설치한 뒤, flask_tutorial 최상위 경로에서 실행)
+# $ python benchmarks/bench.py --posts 1000 --users 100 --save-baseline   # 기준값 저장
+# $ python benchmarks/bench.py --posts 1000 --users 100                   # 기준값과 비교 (느려졌다면 종료 코드 1)
+# 기본 기준값(benchmarks/baseline.json)은 기본 옵션(--posts 1000 --users 100)으로 저장되어 있다.
+# 측정 결과는 기계마다 다르므로, 다른 기계에서 비교하려면 먼저 같은 기계에서 기준값을 저장한다.
+# $ python benchmarks/bench.py --posts 100000 --posts 1000000             # 여러 크기를 한 번에 측정
+# 만들어진 데이터베이스는 --data-dir에 크기별로 저장되며, 다음 실행에서 재사용된다.
+
+# 튜토리얼 진행순서
+# 1. 데이터 준비 (bench.py)
+# 2. 시나리오 (bench.py)
+# 3. 측정과 기준값 비교 (bench.py)
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+from flask import session
+from werkzeug.security import generate_password_hash
+
+from flaskr import create_app
+from flaskr.auth import load_logged_in_user
+from flaskr.db import get_db, get_pool, init_db
+from flaskr.transfer import create_deferred_objects, drop_deferred_objects
+
+PASSWORD = 'password'
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+# 1. 데이터 준비 (bench.py)
+
+# 사용자는 'user0', 'user1', ... 이름에 모두 같은 비밀번호를 가진다.
+# 글은 사용자에게 번갈아 배정되며, 작성 시각은 1초씩 증가한다.
+# 대량의 글은 transfer.py의 가져오기와 같이 인덱스와 트리거를 지운 상태에서 넣고 마지막에 다시 만든다.
+def seed(app, posts, users, batch_size=50000):
+    with app.app_context():
+        init_db()
+        db = get_db()
+        pwhash = generate_password_hash(PASSWORD, app.config['PASSWORD_HASH_METHOD'])
+        db.executemany(
+            'INSERT INTO user (id, username, password) VALUES (?, ?, ?)',
+            ((i + 1, 'user{}'.format(i), pwhash) for i in range(users)),
+        )
+        db.commit()
+
+        drop_deferred_objects(db)
+        try:
+            for start in range(0, posts, batch_size):
+                db.executemany(
+                    'INSERT INTO post (id, author_id, created, title, body) VALUES (?, ?, ?, ?, ?)',
+                    (
+                        (
+                            i + 1,
+                            i % users + 1,
+                            time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(1500000000 + i)),
+                            'post {}'.format(i),
+                            'body of post {}\nwith a second line'.format(i),
+                        )
+                        for i in range(start, min(start + batch_size, posts))
+                    ),
+                )
+                db.commit()
+        finally:
+            create_deferred_objects(db)
+
+# 시드 데이터베이스는 크기별로 한 번만 만들고, 측정할 때마다 복사본을 사용한다.
+# create, update 시나리오가 데이터를 바꾸더라도 다음 실행은 항상 같은 데이터에서 시작한다.
+def prepare(data_dir, posts, users, config):
+    path = os.path.join(data_dir, 'bench-{}-{}.sqlite'.format(posts, users))
+    if not os.path.exists(path):
+        start = time.perf_counter()
+        app = create_app(dict(config, DATABASE=path + '.tmp'))
+        seed(app, posts, users)
+
+        # 풀의 커넥션을 모두 닫아야 WAL 파일의 내용이 데이터베이스 파일에 반영된다.
+        get_pool(app).close()
+        os.replace(path + '.tmp', path)
+        print('seeded {} posts / {} users in {:.1f}s'.format(posts, users, time.perf_counter() - start))
+
+    work = os.path.join(data_dir, 'work.sqlite')
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(work + suffix):
+            os.remove(work + suffix)
+
+    source = sqlite3.connect(path)
+    target = sqlite3.connect(work)
+    with target:
+        source.backup(target)
+    source.close()
+    target.close()
+
+    return create_app(dict(config, DATABASE=work))
+
+# 2. 시나리오 (bench.py)
+
+# 각 시나리오는 (app, client, posts, users)를 받아서 한 번의 요청을 실행하는 함수를 돌려준다.
+# 요청 전에 필요한 준비(로그인 등)는 시나리오 함수 안에서 한 번만 실행한다.
+def login(client, user=0):
+    response = client.post(
+        '/auth/login', data={'username': 'user{}'.format(user), 'password': PASSWORD}
+    )
+    assert response.status_code == 302, response.status
+
+def scenario_index(app, client, posts, users):
+    def run():
+        assert client.get('/').status_code == 200
+    return run
+
+def scenario_index_page(app, client, posts, users):
+    # 임의의 위치에서 시작하는 페이지 (before 커서)를 불러온다. 대부분 페이지 캐시에 없는 페이지이다.
+    def run():
+        i = random.randrange(posts) + 1
+        created = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(1500000000 + i - 1))
+        assert client.get('/', query_string={'before': '{},{}'.format(created, i)}).status_code == 200
+    return run
+
+def scenario_create(app, client, posts, users):
+    login(client)
+
+    def run():
+        response = client.post('/create', data={'title': 'benchmark', 'body': 'created'})
+        assert response.status_code == 302
+    return run
+
+def scenario_update(app, client, posts, users):
+    # user0은 author_id가 1인 글, 즉 번호가 1, 1 + users, 1 + 2 * users, ... 인 글을 수정할 수 있다.
+    login(client)
+
+    def run():
+        id = random.randrange(0, posts, users) + 1
+        response = client.post('/{}/update'.format(id), data={'title': 'updated', 'body': 'updated'})
+        assert response.status_code == 302
+    return run
+
+def scenario_login(app, client, posts, users):
+    def run():
+        login(client, random.randrange(users))
+    return run
+
+def scenario_load_logged_in_user(app, client, posts, users):
+    # before_app_request 훅만 따로 측정하기 위해 요청 컨텍스트 안에서 직접 호출한다.
+    def run():
+        with app.test_request_context('/'):
+            session['user_id'] = random.randrange(users) + 1
+            load_logged_in_user()
+    return run
+
+SCENARIOS = {
+    'index': scenario_index,
+    'index_page': scenario_index_page,
+    'create': scenario_create,
+    'update': scenario_update,
+    'login': scenario_login,
+    'load_logged_in_user': scenario_load_logged_in_user,
+}
+
+# 로그인은 의도적으로 느린 해시 계산을 포함하므로 반복 횟수를 줄인다.
+ITERATIONS = {'login': 0.1}
+
+# 3. 측정과 기준값 비교 (bench.py)
+
+def percentile(samples, p):
+    # samples는 정렬되어 있어야 한다. (nearest-rank 방식)
+    index = max(int(round(p / 100.0 * len(samples) + 0.5)) - 1, 0)
+    return samples[min(index, len(samples) - 1)]
+
+def measure(run, iterations, warmup):
+    for _ in range(warmup):
+        run()
+
+    samples = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        t = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - t)
+    elapsed = time.perf_counter() - start
+
+    samples.sort()
+    return {
+        'iterations': iterations,
+        'throughput': iterations / elapsed,
+        'p50': percentile(samples, 50) * 1000,
+        'p95': percentile(samples, 95) * 1000,
+        'p99': percentile(samples, 99) * 1000,
+    }
+
+def run_benchmarks(app, posts, users, names, iterations, warmup):
+    results = {}
+    for name in names:
+        n = max(int(iterations * ITERATIONS.get(name, 1)), 1)
+        run = SCENARIOS[name](app, app.test_client(), posts, users)
+        results[name] = measure(run, n, min(warmup, n))
+    return results
+
+# 기준값보다 처리량이 tolerance 비율 이상 줄었거나, p95가 tolerance 비율 이상 늘었다면 성능 저하로 판단한다.
+# 기준값이 없는 시나리오는 비교할 수 없으므로 missing에 따로 모은다. (그대로 통과시키면 저하를 놓친다)
+def compare(results, baseline, tolerance):
+    regressions = []
+    missing = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            missing.append(name)
+            continue
+        if result['throughput'] < base['throughput'] * (1 - tolerance):
+            regressions.append('{}: throughput {:.0f}/s < baseline {:.0f}/s'.format(
+                name, result['throughput'], base['throughput']))
+        if result['p95'] > base['p95'] * (1 + tolerance):
+            regressions.append('{}: p95 {:.2f}ms > baseline {:.2f}ms'.format(
+                name, result['p95'], base['p95']))
+    return regressions, missing
+
+def report(size, results):
+    print('\n{} posts'.format(size))
+    print('{:<22}{:>12}{:>10}{:>10}{:>10}'.format('scenario', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms'))
+    for name, r in results.items():
+        print('{:<22}{:>12.1f}{:>10.2f}{:>10.2f}{:>10.2f}'.format(
+            name, r['throughput'], r['p50'], r['p95'], r['p99']))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark flaskr hot endpoints.')
+    parser.add_argument('--posts', type=int, action='append',
+                        help='Number of posts to seed (repeatable; default 1000).')
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help='Scenario to run (repeatable; default all).')
+    parser.add_argument('--iterations', type=int, default=500)
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'flaskr-bench'))
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--allow-missing', action='store_true',
+                        help='Only warn about scenarios without a baseline entry.')
+    parser.add_argument('--hash-method', default=None,
+                        help='Override PASSWORD_HASH_METHOD for the benchmark app.')
+    args = parser.parse_args(argv)
+
+    sizes = args.posts or [1000]
+    names = args.scenario or list(SCENARIOS)
+    config = {}
+    if args.hash_method:
+        config['PASSWORD_HASH_METHOD'] = args.hash_method
+    os.makedirs(args.data_dir, exist_ok=True)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    random.seed(0)
+    regressions = []
+    missing = []
+    for size in sizes:
+        app = prepare(args.data_dir, size, args.users, config)
+        results = run_benchmarks(app, size, args.users, names, args.iterations, args.warmup)
+        get_pool(app).close()
+        get_pool(app, read_only=True).close()
+        report(size, results)
+
+        key = str(size)
+        if args.save_baseline:
+            baseline.setdefault(key, {}).update(results)
+        else:
+            found, absent = compare(results, baseline.get(key, {}), args.tolerance)
+            regressions += found
+            missing += ['{} posts: {}'.format(size, name) for name in absent]
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print('\nsaved baseline to {}'.format(args.baseline))
+        return 0
+
+    if missing:
+        print('\nno baseline in {} (save one with --save-baseline):'.format(args.baseline))
+        for line in missing:
+            print('  ' + line)
+
+    if regressions:
+        print('\nregressions:')
+        for line in regressions:
+            print('  ' + line)
+        return 1
+
+    if missing and not args.allow_missing:
+        return 1
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,15 @@
 import os
+import time
+
+# flask를 불러오는 데 걸리는 시간도 시작 시간에 포함해서 측정한다. (logs.py 참고)
+_import_started = time.perf_counter()
 
 from flask import Flask
 
+from flaskr.logs import StartupProfiler
+
+_import_duration = time.perf_counter() - _import_started
+
 
 # Flask 어플리케이션은 Flask 클래스의 인스턴스 형태로 만들어진다. 
 # 따라서 어플리케이션과 관련된 설정, URL 등은 클래스 내에 등록되게 된다.
@@ -19,6 +27,10 @@ from flask import Flask
 # 2. 파이썬 엔진이 flaskr 디렉토리를 하나의 패키지처럼 인식하도록 안내한는 기능
 
 def create_app(test_config=None):
+
+    # create_app()의 각 단계가 걸린 시간을 측정한다. (logs.py 참고)
+    profiler = StartupProfiler()
+    profiler.record('import flask', _import_duration)
     
     # 앱 인스턴스를 생성하고 환경설정을 불러온다.
     # 1. __name__
@@ -29,6 +41,7 @@ def create_app(test_config=None):
     # 인스턴스 폴더는 flaskr 패키지 외부에 위치하고, git과 같은 툴을 통한 버전 관리 때 저장되면 안되는
     # 민감한 정보(비밀번호, 설정 값, DB 파일 등)를 담고 있기 때문에 별도로 관리해야 함.
     app = Flask(__name__, instance_relative_config=True)
+    profiler.mark('Flask()')
 
     # app.config.from_mapping()는 앱의 기본 설정을 세팅한다.
     # SECRET_KEY는 Flask 내에서 데이터 보안을 위해 사용된다. 
@@ -36,9 +49,17 @@ def create_app(test_config=None):
     # 실 가동 환경에서는 꼭 랜덤 값으로 써줘야 함
     # DATABASE는 SQLite 데이터베이스 파일의 경로이다. 
     # 해당 파일들은 app.instance_path 하위에 위치한다.
+    # POSTS_PER_PAGE는 메인 페이지에서 한 번에 보여줄 글의 개수이다.
+    # FEED_RENDERING은 메인 페이지를 한 번에 랜더링할지('buffered'), 스트리밍할지('streamed') 정한다.
+    # SEARCH_MAX_PAGE는 검색 결과에서 이동할 수 있는 마지막 페이지 번호이다. (넘으면 404)
+    # ANONYMOUS_ENDPOINTS는 로그인한 사용자 정보(g.user)를 불러오지 않아도 되는 엔드포인트이다.
     app.config.from_mapping(
         SECRET_KEY='dev',
         DATABASE=os.path.join(app.instance_path, 'flaskr.sqlite'),
+        POSTS_PER_PAGE=10,
+        FEED_RENDERING='buffered',
+        SEARCH_MAX_PAGE=100,
+        ANONYMOUS_ENDPOINTS=('static', 'hello', 'metrics'),
     )
 
     # app.config.from_pyfile(): instance 폴더에 config.py 파일이 존재하는 경우, 해당 파일로부터 산출되는 값으로 기본 환경을 설정
@@ -50,6 +71,7 @@ def create_app(test_config=None):
     else:
         # load the test config if passed in
         app.config.from_mapping(test_config)
+    profiler.mark('config')
     
     # 인스턴스 폴더의 존재 여부를 보장하기 위한 코드이다.
     # os.makedirs()는 app.instance_path에 instance 폴더가 존재하는지 확인해서 없으면 만드는 부분이다.
@@ -64,10 +86,20 @@ def create_app(test_config=None):
     @app.route('/hello')
     def hello():
         return "Hello, World!"
-    
-    print("============================================================")
-    print("flaskr/__init__.py에서 app이 생성되었습니다.")
-    
+
+    # 로그 레벨과 큐를 이용한 로그 출력을 설정한다. (logs.py 참고)
+    # 운영 환경(LOG_LEVEL=WARNING)에서는 아래의 DEBUG, INFO 로그가 출력되지 않는다.
+    from . import logs
+    logs.init_app(app, profiler)
+    app.logger.debug('flaskr/__init__.py에서 app이 생성되었습니다.')
+    profiler.mark('logging')
+
+    # 템플릿 바이트코드 캐시와 compile-templates 명령어를 등록한다. (templating.py 참고)
+    # app.jinja_env가 만들어지기 전에 등록해야 하므로, 로그 설정 다음이자 다른 모듈과 블루프린트보다 먼저 실행한다.
+    from . import templating
+    templating.init_app(app)
+    profiler.mark('templating.init_app')
+
     # db.py의 DB 초기화 함수 실행 (__init__.py)
 
     # 현재 폴더인 flaskr에서 db.py를 불러온다.
@@ -75,6 +107,55 @@ def create_app(test_config=None):
     
     # init_app 함수에서 생성된 어플리케이션을 인자로 전달한다.
     db.init_app(app)
+    profiler.mark('db.init_app')
+
+    # 엔드포인트별 응답 시간, 상태 코드, 쿼리 수를 모으고 /metrics에서 보여준다. (metrics.py 참고)
+    # 다른 before_request 함수보다 먼저 실행되어야 모든 요청을 측정할 수 있으므로 db 다음에 바로 등록한다.
+    from . import metrics
+    metrics.init_app(app)
+    profiler.mark('metrics.init_app')
+
+    # 랜더링된 페이지를 저장할 캐시를 등록한다. (cache.py 참고)
+    from . import cache
+    cache.init_app(app)
+    profiler.mark('cache.init_app')
+
+    # 비밀번호 해시 정책과 해시 프로세스 풀 설정을 등록한다. (hashing.py 참고)
+    from . import hashing
+    hashing.init_app(app)
+    profiler.mark('hashing.init_app')
+
+    # 글 작성/수정/삭제를 한 트랜잭션으로 묶어서 커밋하는 쓰기 묶음 처리 설정을 등록한다. (writequeue.py 참고)
+    from . import writequeue
+    writequeue.init_app(app)
+    profiler.mark('writequeue.init_app')
+
+    # 사용자와 글을 내보내고 가져오는 export, import 명령어를 등록한다. (transfer.py 참고)
+    from . import transfer
+    transfer.init_app(app)
+    profiler.mark('transfer.init_app')
+
+    # 응답 압축과 미리 압축된 정적 파일을 보내는 기능, compress-static 명령어를 등록한다. (compress.py 참고)
+    from . import compress
+    compress.init_app(app)
+    profiler.mark('compress.init_app')
+
+    # 정적 파일 주소에 내용의 지문(?v=)을 붙이고, 지문이 붙은 주소는 오랫동안 캐시하도록 한다. (assets.py 참고)
+    from . import assets
+    assets.init_app(app)
+    profiler.mark('assets.init_app')
+
+    # 읽기, 쓰기, 인증 요청의 동시 처리 수를 제한하고, 기다리는 줄이 가득 차면 503을 돌려준다. (admission.py 참고)
+    # 사용자 정보를 불러오기 전에 실행되도록 블루프린트보다 먼저 등록한다.
+    from . import admission
+    admission.init_app(app)
+    profiler.mark('admission.init_app')
+
+    # PROFILE_SAMPLE_RATE 또는 서명된 헤더로 선택된 요청을 cProfile로 측정하고, profiles 명령어를 등록한다. (profiling.py 참고)
+    # 요청 수 제한을 통과한 요청만 측정하도록 admission 다음에 등록한다.
+    from . import profiling
+    profiling.init_app(app)
+    profiler.mark('profiling.init_app')
 
     # 블루프린트 등록 (__init__.py)
 
@@ -82,6 +163,7 @@ def create_app(test_config=None):
     # 뷰와 코드는 블루프린트에 등록되며, 블루프린트는 앱에 등록됨을 알 수 있다.
     from . import auth
     app.register_blueprint(auth.bp)
+    profiler.mark('blueprint auth')
 
     # 블루프린트 등록 (__init__.py)
 
@@ -92,7 +174,21 @@ def create_app(test_config=None):
     from . import blog
     app.register_blueprint(blog.bp)
     app.add_url_rule('/', endpoint='index')
+    profiler.mark('blueprint blog')
+
+    # 블루프린트 등록 (__init__.py)
+
+    # api 블루프린트는 글을 JSON으로 주고받는 경로를 '/api' 아래에 등록한다. (api.py 참고)
+    from . import api
+    app.register_blueprint(api.bp)
+    profiler.mark('blueprint api')
+
+    # TEMPLATE_WARMUP이 True라면 요청을 받기 전에 모든 템플릿을 한 번씩 랜더링한다. (templating.py 참고)
+    if app.config['TEMPLATE_WARMUP']:
+        templating.warmup(app)
+        profiler.mark('template warm-up')
 
+    profiler.report(app.logger)
     return app
 
     # 어플리케이션 실행
@@ -0,0 +1,169 @@
+# 요청 수 제한 (admission.py)
+# SQLite가 느려지면 요청들이 WSGI 서버 안에서 계속 쌓이고, 결국 모든 요청이 시간 초과로 실패한다.
+# 이번에는 동시에 처리하는 요청 수를 종류별(읽기, 쓰기, 인증)로 제한하고,
+# 제한을 넘은 요청은 정해진 수만큼만 줄을 세워 기다리게 한다.
+# 줄이 가득 찼거나 너무 오래 기다린 요청은 바로 503과 Retry-After를 돌려받으므로,
+# 과부하 상황에서도 처리 중인 요청은 정상적으로 끝나고 나머지는 빠르게 실패한다.
+
+# 튜토리얼 진행순서
+# 1. 동시 요청 제한기 (admission.py)
+# 2. 요청 종류 구분 (admission.py)
+# 3. 어플리케이션에 제한 설정 등록 (admission.py) -> (__init__.py)
+
+import os
+import threading
+
+from flask import current_app, g, request
+from werkzeug.exceptions import ServiceUnavailable
+
+# 1. 동시 요청 제한기 (admission.py)
+
+# AdmissionLimiter는 동시에 limit개의 요청만 처리하고, queue_size개의 요청까지 기다리게 한다.
+# 기다리는 요청이 있다면 새 요청은 빈 자리가 있어도 줄의 뒤에 선다. (먼저 온 요청이 먼저 처리된다)
+# timeout초 동안 자리가 나지 않거나 줄이 가득 찼다면 ServiceUnavailable(503)을 발생시킨다.
+class AdmissionLimiter(object):
+
+    def __init__(self, name, limit, queue_size=0, timeout=None, retry_after=1):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            if self.active < self.limit and not self.waiting:
+                self.active += 1
+                self.admitted += 1
+                return
+
+            if self.waiting >= self.queue_size:
+                self.rejected += 1
+                raise self._unavailable()
+
+            self.waiting += 1
+            try:
+                admitted = self._cond.wait_for(lambda: self.active < self.limit, self.timeout)
+            finally:
+                self.waiting -= 1
+
+            if not admitted:
+                self.rejected += 1
+                raise self._unavailable()
+
+            self.active += 1
+            self.admitted += 1
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    def _unavailable(self):
+        return ServiceUnavailable(
+            'The server is too busy. Please try again later.', retry_after=self.retry_after
+        )
+
+    def snapshot(self):
+        with self._cond:
+            return {
+                'limit': self.limit,
+                'active': self.active,
+                'waiting': self.waiting,
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+            }
+
+# 제한기는 앱마다 종류별로 하나씩 만들어서 app.extensions에 저장한다.
+# fork된 자식 프로세스는 부모의 카운터를 물려받으므로 새로 만든다.
+_limiters_lock = threading.Lock()
+
+def get_limiters():
+    app = current_app._get_current_object()
+    limiters = app.extensions.get('flaskr.admission')
+    if limiters is None or limiters['pid'] != os.getpid():
+        with _limiters_lock:
+            limiters = app.extensions.get('flaskr.admission')
+            if limiters is None or limiters['pid'] != os.getpid():
+                limiters = app.extensions['flaskr.admission'] = create_limiters(app.config)
+    return limiters
+
+def create_limiters(config):
+    limiters = {'pid': os.getpid()}
+    for kind in REQUEST_KINDS:
+        limiters[kind] = AdmissionLimiter(
+            kind,
+            config['ADMISSION_{}_LIMIT'.format(kind.upper())],
+            queue_size=config['ADMISSION_QUEUE_SIZE'],
+            timeout=config['ADMISSION_TIMEOUT'],
+            retry_after=config['ADMISSION_RETRY_AFTER'],
+        )
+    return limiters
+
+# 2. 요청 종류 구분 (admission.py)
+
+# 요청은 다음 세 종류로 나뉜다.
+#  - 'auth': 비밀번호 해시를 계산하는 로그인, 회원가입 요청 (POST)
+#  - 'write': 글 작성, 수정, 삭제처럼 DB에 쓰는 요청 (POST, PUT, DELETE)
+#  - 'read': 메인 페이지, 글 수정 화면, API 글 목록 등 나머지 요청 (GET, HEAD)
+# ADMISSION_EXEMPT_ENDPOINTS에 있는 엔드포인트(정적 파일 등)와 없는 주소(404)는 제한하지 않는다.
+REQUEST_KINDS = ('read', 'write', 'auth')
+AUTH_ENDPOINTS = ('auth.login', 'auth.register')
+
+def request_kind():
+    endpoint = request.endpoint
+    if endpoint is None or endpoint in current_app.config['ADMISSION_EXEMPT_ENDPOINTS']:
+        return None
+    if request.method in ('GET', 'HEAD', 'OPTIONS'):
+        return 'read'
+    if endpoint in AUTH_ENDPOINTS:
+        return 'auth'
+    return 'write'
+
+# before_request로 등록되어 요청을 처리하기 전에 자리를 얻고, teardown_request에서 자리를 돌려준다.
+# 스트리밍 응답은 전송이 끝날 때 teardown_request가 실행되므로, 전송하는 동안에도 자리를 차지한다.
+def admit_request():
+    if not current_app.config['ADMISSION_CONTROL']:
+        return
+
+    kind = request_kind()
+    if kind is None:
+        return
+
+    limiter = get_limiters()[kind]
+    limiter.acquire()
+    g.admission_limiter = limiter
+
+def release_request(exception=None):
+    limiter = g.pop('admission_limiter', None)
+    if limiter is not None:
+        limiter.release()
+
+# 3. 어플리케이션에 제한 설정 등록 (admission.py)
+
+# ADMISSION_CONTROL: 요청 수 제한을 사용할지 여부
+# ADMISSION_READ_LIMIT: 동시에 처리할 읽기 요청 수
+# ADMISSION_WRITE_LIMIT: 동시에 처리할 쓰기 요청 수 (SQLite는 한 번에 하나의 쓰기만 가능하므로 작게 둔다)
+# ADMISSION_AUTH_LIMIT: 동시에 처리할 로그인, 회원가입 요청 수 (기본값: 해시 프로세스 수)
+# ADMISSION_QUEUE_SIZE: 종류마다 기다릴 수 있는 요청 수 (넘으면 바로 503)
+# ADMISSION_TIMEOUT: 자리가 나기를 기다리는 최대 시간 (초, 넘으면 503)
+# ADMISSION_RETRY_AFTER: 503 응답의 Retry-After 값 (초)
+# ADMISSION_EXEMPT_ENDPOINTS: 제한하지 않는 엔드포인트
+# before_request 함수는 등록된 순서대로 실행되므로, 사용자 정보를 불러오는 auth 블루프린트보다 먼저 등록한다.
+def init_app(app):
+    app.config.setdefault('ADMISSION_CONTROL', True)
+    app.config.setdefault('ADMISSION_READ_LIMIT', 2 * app.config['DB_READ_POOL_SIZE'])
+    app.config.setdefault('ADMISSION_WRITE_LIMIT', 4)
+    app.config.setdefault('ADMISSION_AUTH_LIMIT', app.config['HASH_POOL_WORKERS'] or 1)
+    app.config.setdefault('ADMISSION_QUEUE_SIZE', 64)
+    app.config.setdefault('ADMISSION_TIMEOUT', 5)
+    app.config.setdefault('ADMISSION_RETRY_AFTER', 1)
+    app.config.setdefault('ADMISSION_EXEMPT_ENDPOINTS', ('static', 'hello', 'metrics'))
+
+    app.before_request(admit_request)
+    app.teardown_request(release_request)
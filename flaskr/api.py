@@ -0,0 +1,206 @@
+# API 블루프린트 (api.py)
+# 다른 서비스가 글 목록을 사용하려면 지금은 blog/index.html을 받아서 HTML을 해석해야 한다.
+# 이번에는 같은 글 목록을 JSON으로 주고받는 api 블루프린트를 만든다.
+# 경로는 모두 '/api'로 시작하며, 로그인은 웹 화면과 같은 세션(쿠키)을 사용한다.
+#  - GET    /api/posts             글 목록 (?before=, ?after= 커서, ?limit=, ?fields=)
+#  - GET    /api/posts/<id>        글 하나 (?fields=)
+#  - POST   /api/posts             글 작성 ({"title": ..., "body": ...})
+#  - PUT    /api/posts/<id>        글 수정 ({"title": ..., "body": ...})
+#  - DELETE /api/posts/<id>        글 삭제
+
+# 튜토리얼 진행순서
+# 1. 블루프린트 생성: 블루프린트 객체 생성 (api.py) -> 블루프린트 객체 등록 (__init__.py)
+# 2. JSON 직렬화 (api.py)
+# 3. Read: 글 목록, 글 하나 (api.py)
+# 4. Create, Update, Delete (api.py)
+
+import functools
+import json
+
+from flask import Blueprint, current_app, g, request, stream_with_context, url_for
+from werkzeug.exceptions import HTTPException, abort
+
+from flaskr.blog import (
+    LazyPage, delete_post, get_cursor_args, get_page, get_post, insert_post, invalidate_feed,
+    update_post
+)
+from flaskr.db import get_read_db
+from flaskr.writequeue import execute_write
+
+# orjson이 설치되어 있다면 표준 json 모듈 대신 사용한다. (pip install -e .[speedups])
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 1. 블루프린트 생성: 블루프린트 객체 생성 (api.py)
+bp = Blueprint('api', __name__, url_prefix='/api')
+
+# API에서는 오류도 HTML 페이지 대신 {"error": "..."} 형태의 JSON으로 돌려준다.
+@bp.errorhandler(HTTPException)
+def handle_error(e):
+    response = json_response(dumps({'error': e.description}), e.code)
+    for key, value in e.get_headers():
+        if key.lower() != 'content-type':
+            response.headers[key] = value
+    return response
+
+# 웹 화면의 login_required는 로그인 화면으로 이동시키지만, API는 401을 돌려준다.
+def api_login_required(view):
+    @functools.wraps(view)
+    def wrapped_view(**kwargs):
+        if g.user is None:
+            abort(401, 'Login required.')
+
+        return view(**kwargs)
+
+    return wrapped_view
+
+# 2. JSON 직렬화 (api.py)
+
+# dumps()는 값 하나를 JSON 바이트 문자열로 바꾼다.
+# sqlite3가 돌려주는 작성 시각(datetime)은 ISO 8601 문자열이 된다. (예: "2018-01-01T00:00:00")
+# json_dumps()는 orjson.dumps()와 같은 결과를 만드는 표준 json 모듈 버전이다.
+def json_dumps(value):
+    return json.dumps(
+        value, ensure_ascii=False, separators=(',', ':'), default=_default
+    ).encode('utf8')
+
+def _default(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError('Object of type {} is not JSON serializable'.format(type(value).__name__))
+
+dumps = orjson.dumps if orjson is not None else json_dumps
+
+def json_response(data, status=200, **kwargs):
+    return current_app.response_class(data, status=status, mimetype='application/json', **kwargs)
+
+# FIELDS는 API에서 선택할 수 있는 필드와 SELECT 문에서의 컬럼이다.
+# ?fields=id,title 처럼 필요한 필드만 요청하면 그 컬럼만 읽고 보낸다.
+# 커서를 만들기 위해 id와 created는 항상 읽는다.
+FIELDS = {
+    'id': 'p.id',
+    'title': 'title',
+    'body': 'body',
+    'created': 'created',
+    'author_id': 'author_id',
+    'username': 'author_name AS username',
+}
+MAX_LIMIT = 100
+
+def get_fields():
+    value = request.args.get('fields')
+    if not value:
+        return list(FIELDS)
+
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in FIELDS]
+    if unknown or not fields:
+        abort(400, 'Unknown fields: {}.'.format(', '.join(unknown) or value))
+    return fields
+
+def select_query(fields):
+    columns = [FIELDS[field] for field in fields]
+    for field in ('id', 'created'):
+        if field not in fields:
+            columns.append(FIELDS[field])
+    return 'SELECT {} FROM post p'.format(', '.join(columns))
+
+# RowEncoder는 행을 딕셔너리로 바꾸지 않고, 미리 만들어둔 '"필드":' 조각과 값의 JSON을 이어붙여서 직렬화한다.
+class RowEncoder(object):
+
+    def __init__(self, fields):
+        self.fields = fields
+        self.prefixes = [
+            ('{' if i == 0 else ',').encode() + dumps(field) + b':'
+            for i, field in enumerate(fields)
+        ]
+
+    def encode(self, row):
+        return b''.join(
+            prefix + dumps(row[field]) for prefix, field in zip(self.prefixes, self.fields)
+        ) + b'}'
+
+# 3. Read: 글 목록, 글 하나 (api.py)
+
+# 글 목록은 {"posts": [...], "prev": 커서, "next": 커서} 형태이다.
+# 메인 페이지의 스트리밍 랜더링과 같이 커서에서 한 줄씩 읽어서 바로 응답으로 보낸다.
+# 이전/다음 페이지 커서는 글을 모두 보낸 뒤에 알 수 있으므로 JSON의 마지막에 위치한다.
+@bp.route('/posts')
+def list_posts():
+    fields = get_fields()
+    before, after = get_cursor_args()
+    limit = request.args.get('limit', current_app.config['POSTS_PER_PAGE'], type=int)
+    limit = min(max(limit, 1), MAX_LIMIT)
+
+    db = get_read_db()
+    query = select_query(fields)
+    if after is None:
+        page = LazyPage(db, query, before, per_page=limit)
+    else:
+        page = get_page(db, query, before, after, per_page=limit)
+    encoder = RowEncoder(fields)
+
+    def generate():
+        yield b'{"posts":['
+        for i, row in enumerate(page.posts):
+            yield encoder.encode(row) if i == 0 else b',' + encoder.encode(row)
+        yield b'],"prev":' + dumps(page.prev_cursor) + b',"next":' + dumps(page.next_cursor) + b'}'
+
+    return json_response(stream_with_context(generate()))
+
+@bp.route('/posts/<int:id>')
+def get_post_json(id):
+    fields = get_fields()
+    post = get_read_db().execute(select_query(fields) + ' WHERE p.id = ?', (id,)).fetchone()
+    if post is None:
+        abort(404, "Post id {0} doesn't exist.".format(id))
+
+    return json_response(RowEncoder(fields).encode(post))
+
+# 4. Create, Update, Delete (api.py)
+
+# 요청 본문은 {"title": ..., "body": ...} 형태의 JSON이다.
+# 글 저장과 캐시 무효화는 blog.py의 뷰와 같은 함수를 사용한다.
+def get_post_data():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        abort(400, 'Request body must be a JSON object.')
+
+    title = data.get('title')
+    body = data.get('body', '')
+    if not title or not isinstance(title, str):
+        abort(400, 'Title is required.')
+    if not isinstance(body, str):
+        abort(400, 'Body must be a string.')
+    return title, body
+
+def post_response(id, status=200, **kwargs):
+    post = get_read_db().execute(select_query(list(FIELDS)) + ' WHERE p.id = ?', (id,)).fetchone()
+    return json_response(RowEncoder(list(FIELDS)).encode(post), status, **kwargs)
+
+@bp.route('/posts', methods=['POST'])
+@api_login_required
+def create_post():
+    title, body = get_post_data()
+    id = execute_write(insert_post, title, body, g.user['id'])
+    invalidate_feed('feed:head')
+    return post_response(id, 201, headers={'Location': url_for('api.get_post_json', id=id)})
+
+@bp.route('/posts/<int:id>', methods=['PUT'])
+@api_login_required
+def update_post_json(id):
+    get_post(id)
+    title, body = get_post_data()
+    execute_write(update_post, id, title, body)
+    invalidate_feed('post:{}'.format(id))
+    return post_response(id)
+
+@bp.route('/posts/<int:id>', methods=['DELETE'])
+@api_login_required
+def delete_post_json(id):
+    get_post(id)
+    execute_write(delete_post, id)
+    invalidate_feed('post:{}'.format(id))
+    return json_response(b'', 204)
@@ -0,0 +1,223 @@
+# 비동기 뷰와 ASGI (asgi.py)
+# 지금까지의 뷰는 모두 동기 함수이기 때문에, SQLite를 읽는 동안 워커(스레드)가 그대로 묶여 있다.
+# 응답을 천천히 받아가는 클라이언트가 많으면, 적은 수의 워커로는 금방 모든 워커가 기다리는 상태가 된다.
+# 이번에는 자주 호출되는 읽기 경로(index, get_post, load_logged_in_user)의 비동기 버전을 만들고,
+# DB 작업은 전용 스레드 풀(DB 실행기)에서 실행하여 이벤트 루프가 막히지 않도록 한다.
+# 그리고 create_app()으로 만든 앱을 ASGI 서버(uvicorn, hypercorn 등)에서 실행할 수 있는 진입점을 만든다.
+
+# Flask의 비동기 뷰와 ASGI 어댑터는 asgiref 패키지가 필요하다.
+# $ pip install -e .[async]
+# $ uvicorn --factory flaskr.asgi:create_asgi_app
+
+# 튜토리얼 진행순서
+# 1. DB 실행기 (asgi.py)
+# 2. 비동기 읽기 경로 (asgi.py)
+# 3. ASGI 진입점 (asgi.py)
+
+import asyncio
+import atexit
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app, g, redirect, request, session, url_for
+
+try:
+    from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+except ImportError:
+    WsgiToAsgi = None
+
+from flaskr import auth, blog, create_app
+from flaskr.cache import get_user_cache
+from flaskr.db import create_pool
+
+# 1. DB 실행기 (asgi.py)
+
+# DatabaseExecutor는 workers개의 스레드에서 DB 작업을 실행한다.
+# 각 스레드는 처음 작업을 실행할 때 커넥션을 하나 만들고, 이후에는 그 커넥션만 사용한다. (스레드별 커넥션)
+# 커넥션은 읽기 전용 풀과 같은 설정(mode=ro, query_only)으로 만들어지지만, SQL 계측(SQL_INSTRUMENTATION)은 적용되지 않는다.
+# run(fn, *args)는 fn(커넥션, *args)를 실행하는 awaitable을 돌려준다.
+class DatabaseExecutor(object):
+
+    def __init__(self, pool, workers):
+        self.pid = os.getpid()
+        self._pool = pool
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix='flaskr-db')
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._pool.connect()
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _call(self, fn, args):
+        return fn(self._connection(), *args)
+
+    def run(self, fn, *args):
+        return asyncio.wrap_future(self._executor.submit(self._call, fn, args))
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            for conn in self._connections:
+                self._pool.discard(conn)
+            self._connections.clear()
+
+_executor_lock = threading.Lock()
+
+# get_db_executor는 현재 앱의 DB 실행기를 돌려준다. (커넥션 풀의 get_pool()과 같은 방식)
+# DB_EXECUTOR_WORKERS는 실행기의 스레드 수이며, 기본값은 읽기 전용 풀의 크기(DB_READ_POOL_SIZE)와 같다.
+def get_db_executor():
+    app = current_app._get_current_object()
+    executor = app.extensions.get('flaskr.db_executor')
+    if executor is None or executor.pid != os.getpid():
+        with _executor_lock:
+            executor = app.extensions.get('flaskr.db_executor')
+            if executor is None or executor.pid != os.getpid():
+                executor = app.extensions['flaskr.db_executor'] = DatabaseExecutor(
+                    create_pool(app.config, read_only=True), app.config['DB_EXECUTOR_WORKERS']
+                )
+                atexit.register(executor.shutdown)
+    return executor
+
+def run_db(fn, *args):
+    return get_db_executor().run(fn, *args)
+
+# 2. 비동기 읽기 경로 (asgi.py)
+
+# 각 함수는 blog.py, auth.py의 같은 이름의 함수와 똑같이 동작하며, DB를 읽는 부분만 run_db()로 실행한다.
+# 페이지 캐시, 사용자 캐시, 조건부 GET은 그대로 사용한다.
+async def load_logged_in_user():
+    user_id = session.get('user_id')
+
+    if user_id is None or request.endpoint in current_app.config['ANONYMOUS_ENDPOINTS']:
+        g.user = None
+        return
+
+    user_cache = get_user_cache()
+    user = user_cache.get(user_id) if user_cache is not None else None
+
+    if user is None:
+        user = await run_db(auth.fetch_user, user_id)
+        if user is not None and user_cache is not None:
+            user_cache.set(user_id, user)
+
+    g.user = user
+
+# run_reads()는 blog.run_reads()와 같지만, 흐름이 yield한 DB 작업을 DB 실행기에서 실행한다.
+# index와 update는 blog.py의 흐름(index_flow, update_flow)을 그대로 사용하므로, 캐시와 조건부 GET도 같다.
+async def run_reads(flow):
+    try:
+        fn, args = next(flow)
+        while True:
+            fn, args = flow.send(await run_db(fn, *args))
+    except StopIteration as stop:
+        return stop.value
+
+async def index():
+    return await run_reads(blog.index_flow())
+
+# 비동기 함수는 login_required로 감쌀 수 없으므로 로그인 여부를 직접 확인한다.
+async def update(id):
+    if g.user is None:
+        return redirect(url_for('auth.login'))
+
+    return await run_reads(blog.update_flow(id))
+
+# 3. ASGI 진입점 (asgi.py)
+
+# make_async(app)은 create_app()으로 만든 앱의 읽기 경로를 비동기 버전으로 바꿔준다.
+# URL과 엔드포인트 이름은 그대로이므로 url_for()와 템플릿은 바꿀 필요가 없다.
+def make_async(app):
+    app.config.setdefault('DB_EXECUTOR_WORKERS', app.config['DB_READ_POOL_SIZE'])
+
+    app.view_functions['blog.index'] = index
+    app.view_functions['blog.update'] = update
+
+    funcs = app.before_request_funcs[None]
+    funcs[funcs.index(auth.load_logged_in_user)] = load_logged_in_user
+
+    return app
+
+# Flask는 WSGI 앱이므로 asgiref의 WsgiToAsgi로 감싸야 한다.
+# 그런데 WsgiToAsgi는 모든 요청을 sync_to_async(thread_sensitive=True)로 실행하므로,
+# 모든 요청이 하나의 스레드에서 차례대로 처리된다. (0.5초 걸리는 요청 4개가 2초 걸린다)
+# ThreadPoolWsgiToAsgi는 요청마다 workers개의 스레드 풀 중 하나에서 WSGI 앱을 실행하여 요청들이 동시에 처리되도록 한다.
+# Flask의 요청 처리는 스레드마다 독립적이므로(요청 컨텍스트, g) 같은 스레드에서 실행할 필요가 없다.
+if WsgiToAsgi is not None:
+
+    class ThreadPoolWsgiToAsgiInstance(WsgiToAsgiInstance):
+
+        def __init__(self, wsgi_application, executor, duplicate_header_limit=100):
+            super().__init__(wsgi_application, duplicate_header_limit)
+            self.executor = executor
+
+        # 부모 클래스의 run_wsgi_app은 sync_to_async로 감싸져 있어서 실행할 스레드를 고를 수 없다.
+        # 같은 내용을 동기 함수(call_wsgi_app)로 옮겨두고, 요청마다 스레드 풀에서 실행한다.
+        async def run_wsgi_app(self, body):
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self.executor, self.call_wsgi_app, body)
+
+        def call_wsgi_app(self, body):
+            # 중복된 헤더가 너무 많으면 build_environ()이 ValueError를 낸다. (duplicate_header_limit)
+            try:
+                environ = self.build_environ(self.scope, body)
+            except ValueError:
+                self.sync_send({
+                    'type': 'http.response.start',
+                    'status': 400,
+                    'headers': [(b'content-type', b'text/plain')],
+                })
+                self.sync_send({
+                    'type': 'http.response.body',
+                    'body': b'Bad Request: Too many duplicate headers',
+                })
+                return
+
+            # 첫 번째 본문 조각을 보낼 때 응답 헤더를 함께 보내고,
+            # Content-Length가 있다면 그 길이를 넘는 본문은 보내지 않는다.
+            bytes_sent = 0
+            for output in self.wsgi_application(environ, self.start_response):
+                if not self.response_started:
+                    self.response_started = True
+                    self.sync_send(self.response_start)
+                if self.response_content_length is not None:
+                    output = output[:self.response_content_length - bytes_sent]
+                self.sync_send({'type': 'http.response.body', 'body': output, 'more_body': True})
+                bytes_sent += len(output)
+                if bytes_sent == self.response_content_length:
+                    break
+
+            if not self.response_started:
+                self.response_started = True
+                self.sync_send(self.response_start)
+            self.sync_send({'type': 'http.response.body'})
+
+    class ThreadPoolWsgiToAsgi(WsgiToAsgi):
+
+        def __init__(self, wsgi_application, workers, duplicate_header_limit=100):
+            super().__init__(wsgi_application, duplicate_header_limit)
+            self.executor = ThreadPoolExecutor(workers, thread_name_prefix='flaskr-wsgi')
+
+        async def __call__(self, scope, receive, send):
+            await ThreadPoolWsgiToAsgiInstance(
+                self.wsgi_application, self.executor, self.duplicate_header_limit
+            )(scope, receive, send)
+
+# create_asgi_app()은 ASGI 서버에서 사용할 앱을 만든다.
+# ASGI 서버가 느린 클라이언트와의 송수신을 이벤트 루프에서 처리하기 때문에, 요청을 처리하는 동안만 스레드를 사용한다.
+# ASGI_WORKERS는 요청을 처리할 스레드 수이다. 요청 수 제한(admission.py)에서 기다리는 요청도 스레드를 차지한다.
+def create_asgi_app(test_config=None):
+    if WsgiToAsgi is None:
+        raise RuntimeError(
+            "The ASGI entry point requires asgiref. Install it with 'pip install flaskr[async]'."
+        )
+
+    app = make_async(create_app(test_config))
+    app.config.setdefault('ASGI_WORKERS', 32)
+    return ThreadPoolWsgiToAsgi(app, app.config['ASGI_WORKERS'])
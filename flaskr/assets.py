@@ -0,0 +1,125 @@
+# 정적 파일 지문 (assets.py)
+# base.html은 url_for('static', filename='style.css')로 스타일 파일을 불러온다.
+# 주소가 항상 같기 때문에 브라우저는 파일이 바뀌었는지 계속 확인해야 하고, 오랫동안 캐시하도록 할 수도 없다.
+# 이번에는 파일 내용의 해시(지문)를 주소에 붙여서 '/static/style.css?v=<해시>'처럼 만든다.
+# 파일이 바뀌면 주소도 바뀌기 때문에, 지문이 붙은 주소는 1년 동안 다시 확인하지 않고 캐시해도 된다.
+
+# 튜토리얼 진행순서
+# 1. 지문 계산 (assets.py)
+# 2. url_for에 지문 붙이기, 캐시 헤더 (assets.py)
+# 3. 어플리케이션에 지문 설정 등록 (assets.py) -> (__init__.py)
+# 4. 배포 버전 (assets.py)
+
+import hashlib
+import os
+import threading
+
+from flask import current_app, request
+
+# 1. 지문 계산 (assets.py)
+
+# build_manifest()는 static 폴더의 모든 파일에 대해 {'style.css': '해시 앞 12자리'} 형태의 목록을 만든다.
+# 미리 압축된 '.gz' 파일은 원본과 같은 주소로 제공되므로 제외한다. (compress.py 참고)
+def build_manifest(static_folder):
+    manifest = {}
+    for root, dirs, files in os.walk(static_folder):
+        for name in files:
+            if name.endswith(('.gz', '.tmp')):
+                continue
+
+            path = os.path.join(root, name)
+            digest = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(65536), b''):
+                    digest.update(chunk)
+
+            filename = os.path.relpath(path, static_folder).replace(os.sep, '/')
+            manifest[filename] = digest.hexdigest()[:12]
+    return manifest
+
+# 목록은 앱마다 처음 한 번만 만들어서 app.extensions에 저장한다.
+_manifest_lock = threading.Lock()
+
+def get_manifest():
+    app = current_app._get_current_object()
+    manifest = app.extensions.get('flaskr.static_manifest')
+    if manifest is None:
+        with _manifest_lock:
+            manifest = app.extensions.get('flaskr.static_manifest')
+            if manifest is None:
+                manifest = app.extensions['flaskr.static_manifest'] = build_manifest(
+                    app.static_folder
+                )
+    return manifest
+
+# 2. url_for에 지문 붙이기, 캐시 헤더 (assets.py)
+
+# url_defaults로 등록된 함수는 url_for()가 주소를 만들기 전에 실행되어 인자를 추가할 수 있다.
+# 'static' 엔드포인트의 주소를 만들 때 파일의 지문을 ?v=로 붙인다.
+# 템플릿은 그대로 url_for('static', filename='style.css')를 사용하면 된다.
+def add_fingerprint(endpoint, values):
+    if endpoint != 'static' or 'v' in values or not current_app.config['STATIC_FINGERPRINT']:
+        return
+
+    fingerprint = get_manifest().get(values.get('filename'))
+    if fingerprint is not None:
+        values['v'] = fingerprint
+
+# 요청한 지문이 현재 파일의 지문과 같다면, 내용이 절대 바뀌지 않는 주소이므로 immutable로 1년 동안 캐시하게 한다.
+# 지문이 없거나 오래된 지문이라면 Flask의 기본 캐시 설정을 그대로 사용한다.
+def set_static_cache(response):
+    if (
+        request.endpoint != 'static'
+        or response.status_code not in (200, 304)
+        or not current_app.config['STATIC_FINGERPRINT']
+    ):
+        return response
+
+    fingerprint = request.args.get('v')
+    if fingerprint is not None and fingerprint == get_manifest().get(request.view_args['filename']):
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = current_app.config['STATIC_MAX_AGE']
+        response.cache_control.immutable = True
+    return response
+
+# 3. 어플리케이션에 지문 설정 등록 (assets.py)
+
+# STATIC_FINGERPRINT: 정적 파일 주소에 지문을 붙일지 여부
+# STATIC_MAX_AGE: 지문이 붙은 주소의 캐시 유효 시간 (초, 기본 1년)
+def init_app(app):
+    app.config.setdefault('STATIC_FINGERPRINT', True)
+    app.config.setdefault('STATIC_MAX_AGE', 365 * 24 * 60 * 60)
+
+    app.url_defaults(add_fingerprint)
+    app.after_request(set_static_cache)
+
+# 4. 배포 버전 (assets.py)
+
+# 메인 페이지의 ETag와 페이지 캐시 키는 feed_version으로 만들기 때문에, 글이 바뀌지 않으면 배포 후에도 그대로이다.
+# 그러면 템플릿이나 정적 파일(?v= 지문)이 바뀌어도 클라이언트는 304를 받고 예전 HTML을 계속 사용한다.
+# get_build_version()은 정적 파일 목록(지문)과 템플릿 파일의 수정 시각으로 배포 버전을 만든다.
+# 이 값을 ETag와 캐시 키에 넣으면, 배포로 화면이 바뀔 때 예전 ETag와 캐시된 페이지가 더 이상 맞지 않게 된다.
+def build_version(app):
+    digest = hashlib.sha256()
+    for filename, fingerprint in sorted(build_manifest(app.static_folder).items()):
+        digest.update('{} {}\n'.format(filename, fingerprint).encode())
+
+    template_folder = os.path.join(app.root_path, app.template_folder)
+    for root, dirs, files in os.walk(template_folder):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            filename = os.path.relpath(path, template_folder).replace(os.sep, '/')
+            digest.update('{} {}\n'.format(filename, os.stat(path).st_mtime_ns).encode())
+    return digest.hexdigest()[:12]
+
+def get_build_version():
+    app = current_app._get_current_object()
+    version = app.extensions.get('flaskr.build_version')
+    if version is None:
+        with _manifest_lock:
+            version = app.extensions.get('flaskr.build_version')
+            if version is None:
+                version = app.extensions['flaskr.build_version'] = build_version(app)
+    return version
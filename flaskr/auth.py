@@ -22,15 +22,18 @@
 # 5. 로그인 한 유저화면 불러오기 (auth.py)
 # 6. 로그아웃 코드 (auth.py)
 # 7. 로그인 한 유저의 다른 화면을 위한 조건 (auth.py)
+# 8. 사용자 이름 변경 (auth.py)
 
 import functools
 
 from flask import (
-    Blueprint, flash, g, redirect, render_template, request, session, url_for
+    Blueprint, current_app, flash, g, redirect, render_template, request, session,
+    url_for
 )
-from werkzeug.security import generate_password_hash, check_password_hash
 
-from flaskr.db import get_db
+from flaskr.cache import get_page_cache, get_user_cache, invalidate_user
+from flaskr.db import get_db, get_read_db
+from flaskr.hashing import hash_password, needs_rehash, verify_password
 
 # 1. 블루프린트 객체 생성 (auth.py)
 # 이 코드는 'auth'라는 이름의 블루프린트를 생성한다.
@@ -82,10 +85,11 @@ def register():
             error = 'User {} is already registered.'.format(username)
         
         # 중복체크까지 성공했다면 신규 사용자 정보를 DB에 저장한다.
-        # 보안을 위해 암호는 DB에 바로 저장하지 않고, generate_password_hash()를 이용하여 암호화 한 후 저장한다.
+        # 보안을 위해 암호는 DB에 바로 저장하지 않고, hash_password()를 이용하여 암호화 한 후 저장한다.
+        # hash_password()는 해시 계산을 별도의 프로세스 풀에서 실행한다. (hashing.py 참고)
         if error is None:
             db.execute(
-                'INSERT INTO user (username, password) VALUES (?, ?)', (username, generate_password_hash(password))
+                'INSERT INTO user (username, password) VALUES (?, ?)', (username, hash_password(password))
             )
             # 데이터를 저장한 후, db.commit()을 이용해 DB의 데이터를 변경하였음을 확정한다.
             db.commit()
@@ -124,9 +128,17 @@ def login():
         if user is None:
             error = 'Incorrect username.'
         
-        # check_password_hash()를 이용해서 비밀번호를 암호화하고, DB에 저장된 값과 비교한다.
-        elif not check_password_hash(user['password'], password):
+        # verify_password()를 이용해서 비밀번호를 암호화하고, DB에 저장된 값과 비교한다.
+        elif not verify_password(user['password'], password):
             error = 'Incorrect password.'
+
+        # 저장된 해시가 현재 해시 정책보다 오래된 방식이라면, 로그인에 성공한 지금 새로운 방식으로 다시 저장한다.
+        elif needs_rehash(user['password']):
+            db.execute(
+                'UPDATE user SET password = ? WHERE id = ?', (hash_password(password), user['id'])
+            )
+            db.commit()
+            invalidate_user(user['id'])
         
         # 사용자 인증이 완료되면 사용자 정보는 세션에 저장한다.
         # 세션은 딕셔너리 형태로 되어있다.
@@ -147,21 +159,38 @@ def login():
 # 이 함수를 이용해 각 뷰 함수가 실행되기 전에 실행할 함수를 생성한다.
 # 사용자가 호출하는 URL이 무엇이든 load_logged_in_user()가 먼저 실행되도록 설정한다.
 # load_logged_in_user()은 세션에 저장되어 있는 사용자 user_id를 가져오고, 이를 g.user에 저장한다.
+# ANONYMOUS_ENDPOINTS에 포함된 엔드포인트(정적 파일 등)는 g.user를 사용하지 않으므로 사용자를 조회하지 않는다.
 @bp.before_app_request
 def load_logged_in_user():
     
     # 세션에 사용자의 아이디가 저장되어 있다면, DB에 저장된 사용자의 기록을 불러온다.
     user_id = session.get('user_id')
 
-    # 유저에 대한 기록이 있다면, g.user에 DB에 기록된 정보를 저장한다.
-    if user_id is None:
+    # 유저에 대한 기록이 없다면, g.user에 None을 저장한다.
+    if user_id is None or request.endpoint in current_app.config['ANONYMOUS_ENDPOINTS']:
         g.user = None
     
-    # 유저에 대한 기록이 없다면, g.user에 None을 저장한다.
+    # 유저에 대한 기록이 있다면, g.user에 DB에 기록된 정보를 저장한다.
     else:
-        g.user = get_db().execute(
-            "SELECT * FROM user WHERE id = ?", (user_id,)
-        ).fetchone()
+        g.user = get_user(user_id)
+
+# get_user()는 사용자 캐시를 먼저 확인하고, 없을 때만 DB를 조회한다. (cache.py 참고)
+# g.user는 화면에 이름을 표시하고 글의 작성자를 확인하는 데만 사용되므로, 비밀번호 해시는 가져오지 않는다.
+def get_user(user_id):
+    user_cache = get_user_cache()
+    user = user_cache.get(user_id) if user_cache is not None else None
+
+    if user is None:
+        user = fetch_user(get_read_db(), user_id)
+        if user is not None and user_cache is not None:
+            user_cache.set(user_id, user)
+
+    return user
+
+def fetch_user(db, user_id):
+    return db.execute(
+        "SELECT id, username FROM user WHERE id = ?", (user_id,)
+    ).fetchone()
 
 # 6. 로그아웃 코드 (auth.py)
 
@@ -187,4 +216,42 @@ def login_required(view):
         
         return view(**kwargs)
     
-    return wrapped_view
\ No newline at end of file
+    return wrapped_view
+
+# 8. 사용자 이름 변경 (auth.py)
+# 사용자 이름은 그 사용자의 글(post.author_name)과 로그인한 사용자의 화면(nav)에 함께 나타난다.
+# user_username_update 트리거가 같은 트랜잭션 안에서 글의 author_name을 바꾸고 feed_version을 올리므로, ETag는 바로 바뀐다.
+# 커밋한 뒤에는 그 사용자의 이름이 들어간 캐시된 페이지('user:<id>' 태그)와 사용자 캐시의 항목을 지운다.
+def rename_user(user_id, username):
+    db = get_db()
+    db.execute('UPDATE user SET username = ? WHERE id = ?', (username, user_id))
+    db.commit()
+
+    page_cache = get_page_cache()
+    if page_cache is not None:
+        page_cache.invalidate('user:{}'.format(user_id))
+    invalidate_user(user_id)
+
+# 로그인한 사용자는 /auth/rename에서 자신의 이름을 바꿀 수 있다.
+# 회원가입과 같은 방법으로 이름이 비어있지 않은지, 이미 사용 중인 이름이 아닌지 확인한다.
+@bp.route('/rename', methods=['GET', 'POST'])
+@login_required
+def rename():
+    if request.method == 'POST':
+        username = request.form['username']
+        error = None
+
+        if not username:
+            error = 'Username is required.'
+        elif get_db().execute(
+            'SELECT id FROM user WHERE username = ?', (username,)
+        ).fetchone() is not None:
+            error = 'User {} is already registered.'.format(username)
+
+        if error is None:
+            rename_user(g.user['id'], username)
+            return redirect(url_for('index'))
+
+        flash(error)
+
+    return render_template('auth/rename.html')
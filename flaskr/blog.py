@@ -11,15 +11,24 @@
 # 2. Read: 글 보여주기 코드 (blog.py) -> 글 보여주기 탬플릿 (/template/blog/index.html)
 # 3. Create: 글 작성 코드 (blog.py) -> 글 작성 탬플릿 (/template/blog/create.html)
 # 4. Update, Delete: 글 수정 가능여부 식별 코드 (blog.py) -> 글 수정 코드 (blog.py), 글 삭제 코드 (blog.py) -> 글 수정 탬플릿 (/template/blog/update.html)
+# 5. Search: 글 검색 코드 (blog.py) -> 글 검색 탬플릿 (/template/blog/search.html)
+
+from datetime import datetime
 
 from flask import (
-    Blueprint, flash, g, redirect, render_template, request, url_for
+    Blueprint, current_app, flash, g, make_response, redirect, render_template,
+    request, session, stream_template, url_for
 )
+from markupsafe import Markup, escape
 from werkzeug.exceptions import abort
 from werkzeug.security import check_password_hash
 
+from flaskr.assets import get_build_version
 from flaskr.auth import login_required
-from flaskr.db import get_db
+from flaskr.cache import get_page_cache, make_etag, not_modified, set_validators
+from flaskr.compress import compress_data, use_compressed
+from flaskr.db import get_read_db
+from flaskr.writequeue import execute_write
 
 # 1. 블루프린트 생셩: 블루프린트 객체 생성 (blog.py)
 
@@ -29,23 +38,311 @@ bp = Blueprint('blog', __name__)
 
 # 2. Read
 
+# 페이지네이션 (blog.py)
+# 포스트가 많아지면 전체 목록을 한 번에 불러오는 것은 느리고, 요청마다 모든 글을 메모리에 올리게 된다.
+# 따라서 OFFSET 대신 커서(keyset) 방식으로 한 페이지씩 불러온다.
+# 커서는 "작성 시각,글 번호" 형태의 문자열로, 페이지의 마지막(또는 첫) 글의 위치를 나타낸다.
+#  - ?before=<커서>: 커서보다 오래된 글을 최신 순으로 불러온다. (다음 페이지)
+#  - ?after=<커서>: 커서보다 최신 글을 불러온다. (이전 페이지)
+# (created, id) 인덱스를 따라 커서 위치부터 LIMIT 만큼만 읽기 때문에, 테이블 크기와 관계없이 일정한 시간이 걸린다.
+# 작성자 이름은 post 테이블의 author_name을 사용하므로, user 테이블과 JOIN하지 않고 post 한 테이블만 읽는다. (schema.sql 참고)
+FEED_QUERY = (
+    'SELECT p.id, title, body, created, author_id, author_name AS username'
+    ' FROM post p'
+)
+
+
+def make_cursor(post):
+    return '{},{}'.format(post['created'], post['id'])
+
+
+def parse_cursor(value):
+    # 잘못된 커서가 들어오면 400 'Bad Request'를 반환한다.
+    # SQLite의 정수는 64비트이므로, 범위를 넘는 id는 쿼리에 넘기면 OverflowError가 발생한다.
+    created, _, id = value.rpartition(',')
+    try:
+        created, id = datetime.fromisoformat(created).isoformat(' '), int(id)
+    except ValueError:
+        abort(400, "Invalid cursor {0!r}.".format(value))
+    if not -2 ** 63 <= id < 2 ** 63:
+        abort(400, "Invalid cursor {0!r}.".format(value))
+    return created, id
+
+
+class Page(object):
+
+    # 한 페이지의 글 목록과 이전/다음 페이지로 이동하기 위한 커서를 담는다.
+    # lookahead는 다음 페이지가 있는지 확인하기 위해 더 불러온 글이다.
+    def __init__(self, posts, prev_cursor=None, next_cursor=None, lookahead=None):
+        self.posts = posts
+        self.prev_cursor = prev_cursor
+        self.next_cursor = next_cursor
+        self.lookahead = lookahead
+
+
+def page_query(query, before=None, after=None, per_page=10, where=None, params=()):
+    # query는 'SELECT ... FROM ...' 부분이고, where와 params로 추가 조건을 전달할 수 있다.
+    # 다음 페이지가 있는지 알기 위해 per_page보다 한 개 더 불러온다.
+    conditions = [where] if where else []
+
+    if after is not None:
+        conditions.append('(created, p.id) > (?, ?)')
+        params = tuple(params) + after
+        order = 'ORDER BY created ASC, p.id ASC'
+    else:
+        if before is not None:
+            conditions.append('(created, p.id) < (?, ?)')
+            params = tuple(params) + before
+        order = 'ORDER BY created DESC, p.id DESC'
+
+    sql = query
+    if conditions:
+        sql += ' WHERE ' + ' AND '.join(conditions)
+    return '{} {} LIMIT ?'.format(sql, order), tuple(params) + (per_page + 1,)
+
+
+def get_page(db, query, before=None, after=None, per_page=10, where=None, params=()):
+    rows = db.execute(
+        *page_query(query, before, after, per_page, where, params)
+    ).fetchall()
+
+    has_more = len(rows) > per_page
+    posts = rows[:per_page]
+
+    # after로 불러온 경우 오래된 순으로 정렬되어 있으므로 뒤집어준다.
+    # 이 때 더 불러온 글이 있다면 더 최신 글(이전 페이지)이 있다는 의미이고,
+    # 커서에 해당하는 글보다 오래된 글(다음 페이지)은 항상 존재한다.
+    if after is not None:
+        posts.reverse()
+        has_prev, has_next = has_more, bool(posts)
+    else:
+        has_prev, has_next = before is not None and bool(posts), has_more
+
+    return Page(
+        posts,
+        make_cursor(posts[0]) if has_prev else None,
+        make_cursor(posts[-1]) if has_next else None,
+        rows[per_page] if has_more else None,
+    )
+
+
+# LazyPage는 스트리밍 랜더링에 사용되는 페이지로, 글 목록을 미리 불러오지 않는다.
+# 템플릿이 posts를 순회할 때마다 커서에서 한 줄씩 가져오고, 순회가 끝나면 이전/다음 페이지 커서가 채워진다.
+# 따라서 템플릿에서 페이지 링크는 글 목록 뒤에 위치해야 한다.
+# 커서를 거꾸로 읽어야 하는 after 페이지는 get_page()를 사용한다.
+class LazyPage(Page):
+
+    def __init__(self, db, query, before=None, per_page=10, where=None, params=()):
+        super(LazyPage, self).__init__(None)
+        cursor = db.execute(*page_query(query, before, None, per_page, where, params))
+        self.posts = self._iter_posts(cursor, before is not None, per_page)
+
+    def _iter_posts(self, cursor, has_prev, per_page):
+        last = None
+        for count, post in enumerate(cursor):
+            if count == per_page:
+                self.lookahead = post
+                self.next_cursor = make_cursor(last)
+                break
+            if count == 0 and has_prev:
+                self.prev_cursor = make_cursor(post)
+            last = post
+            yield post
+
+
+def get_cursor_args():
+    # request의 before/after 인자를 커서로 변환한다.
+    before = request.args.get('before')
+    after = request.args.get('after')
+    return (
+        parse_cursor(before) if before else None,
+        parse_cursor(after) if after else None,
+    )
+
+
+# 페이지 캐시 (blog.py)
+# 랜더링된 메인 페이지는 페이지 위치(커서)와 보는 사람(g.user)을 키로 캐시에 저장된다.
+# 로그인한 사용자는 자신의 글에만 "Edit" 링크를 보기 때문에 사용자마다 다른 페이지가 된다.
+# 각 페이지에는 다음 태그가 붙으며, 글이 바뀌면 해당 태그를 가진 페이지만 무효화된다.
+#  - 'post:<id>': 페이지에 포함된 글 (다음 페이지 확인용으로 더 불러온 글 포함) -> 수정, 삭제 시 무효화
+#  - 'feed:head': before 커서가 없는 페이지 (가장 최신 글이 들어가는 위치) -> 새 글 작성 시 무효화
+#  - 'user:<id>': 페이지에 포함된 글의 작성자와 보는 사람 -> 사용자 이름 변경 시 무효화 (auth.py의 rename_user 참고)
+# 태그 토큰은 DB를 읽기 전에 feed_tokens()로 읽어두고, 랜더링이 끝난 뒤 set()에 함께 전달한다. (cache.py의 PageCache 참고)
+def feed_tokens(page_cache, before, viewer):
+    tags = [] if before is not None else ['feed:head']
+    if viewer is not None:
+        tags.append('user:{}'.format(viewer))
+    return page_cache.tokens(*tags)
+
+
+def feed_tags(page, before, viewer):
+    tags = ['post:{}'.format(post['id']) for post in page.posts]
+    if page.lookahead is not None:
+        tags.append('post:{}'.format(page.lookahead['id']))
+    if before is None:
+        tags.append('feed:head')
+    authors = {post['author_id'] for post in page.posts}
+    if viewer is not None:
+        authors.add(viewer)
+    tags.extend('user:{}'.format(author) for author in sorted(authors))
+    return tags
+
+
+def invalidate_feed(*tags):
+    page_cache = get_page_cache()
+    if page_cache is not None:
+        page_cache.invalidate(*tags)
+
+
+# 조건부 GET (blog.py)
+# feed_version 테이블은 글이 작성/수정/삭제될 때마다 트리거에 의해 version이 증가한다. (schema.sql 참고)
+# 이 값과 보는 사람의 id로 ETag를 만들고, 클라이언트가 같은 ETag를 보내면 JOIN과 랜더링 없이 304를 돌려준다.
+# 배포로 템플릿이나 정적 파일이 바뀌면 ETag도 바뀌도록 배포 버전을 함께 넣는다. (assets.py 참고)
+# db를 전달하지 않으면 get_read_db()의 커넥션을 사용한다. (asgi.py의 비동기 뷰는 자신의 커넥션을 전달한다)
+def get_feed_version(db=None):
+    if db is None:
+        db = get_read_db()
+    return db.execute('SELECT version, updated FROM feed_version').fetchone()
+
+
+def feed_validators(*parts):
+    return feed_etag(get_feed_version(), *parts)
+
+
+def feed_etag(version, *parts):
+    return make_etag(get_build_version(), version['version'], *parts), version['updated']
+
+
+# 읽기 흐름 (blog.py)
+# index와 update는 동기 뷰(blog.py)와 비동기 뷰(asgi.py)가 같은 흐름(index_flow, update_flow)을 사용한다.
+# 흐름은 제너레이터로 작성하고, DB를 읽을 때는 (함수, 인자)를 yield해서 결과를 돌려받는다.
+# 함수는 fetch_post(db, id)처럼 첫 번째 인자로 커넥션을 받는다.
+# run_reads()는 get_read_db()의 커넥션으로 바로 실행하고, asgi.py의 run_reads()는 DB 실행기에서 실행한다.
+def run_reads(flow):
+    try:
+        fn, args = next(flow)
+        while True:
+            fn, args = flow.send(fn(get_read_db(), *args))
+    except StopIteration as stop:
+        return stop.value
+
+
 # 글 보여주기 코드 (blog.py)
 # 인덱스 (디폴트 뷰)
 # 인덱스는 메인 페이지로 전체 포스트 목록을 최신 글부터 보여줍니다.
-# 해당 페이지에서 DB에 있는 사용자가 작성한 글을 모두 보여줍니다.
+# 해당 페이지에서 DB에 있는 사용자가 작성한 글을 한 페이지(POSTS_PER_PAGE)씩 보여줍니다.
 # 글에는 '글 번호 / 글 제목 / 글 내용 / 작성 시각 / 작성자 id / 작성자 닉네임'이 포함됩니다.
-# 포스트 목록과 작성자를 함께 표시하기 위해 SQL 문을 이용해서 DB에서 목록을 불러올 때 JOIN을 이용한다.
+# 작성자 닉네임은 post 테이블에 함께 저장되어 있으므로(author_name), JOIN 없이 post 테이블만 읽는다.
 @bp.route('/')
 def index():
-    db = get_db()
-    posts = db.execute(
-        'SELECT p.id, title, body, created, author_id, username FROM post p JOIN user u ON p.author_id = u.id ORDER BY created DESC'
-    ).fetchall()
+    return run_reads(index_flow())
+
+
+def index_flow():
+    before, after = get_cursor_args()
+    per_page = current_app.config['POSTS_PER_PAGE']
+    viewer = g.user['id'] if g.user else None
+
+    def render(page):
+        # render_template의 두 번째 인자는 **context이다.
+        # jinja2에는 전달할 변수명을 짓고, 해당 변수에 데이터를 저장한다. (변수명: posts)
+        # jinja2에서는 {{ posts }} 와 같이 해당 변수명을 입력하여 읽어낼 수 있다.
+        return render_template('blog/index.html', posts=page.posts, page=page)
+
+    # flash 메시지가 남아있는 경우에는 페이지 내용이 달라지므로 캐시와 조건부 GET을 사용하지 않는다.
+    # 스트리밍 중에는 세션을 저장할 수 없기 때문에, flash 메시지는 항상 한 번에 랜더링한다.
+    if '_flashes' in session:
+        return render((yield get_page, (FEED_QUERY, before, after, per_page)))
+
+    # FEED_RENDERING이 'streamed'라면 페이지 캐시를 사용하지 않고 템플릿을 스트리밍한다.
+    # 스트리밍 랜더링은 뷰가 응답을 돌려준 뒤에 DB 커서를 읽기 때문에, 비동기 뷰에서도 get_read_db()를 사용한다.
+    if current_app.config['FEED_RENDERING'] == 'streamed' and after is None:
+        return stream_index(before, per_page, viewer)
 
-    # render_template의 두 번째 인자는 **context이다.
-    # jinja2에는 전달할 변수명을 짓고, 해당 변수에 데이터를 저장한다. (변수명: posts)
-    # jinja2에서는 {{ posts }} 와 같이 해당 변수명을 입력하여 읽어낼 수 있다.
-    return render_template('blog/index.html', posts=posts)
+    # 캐시에 저장된 페이지가 있다면 DB에 접근하지 않고, 저장해둔 ETag로 조건부 GET까지 처리한다.
+    # gzip으로 압축한 본문도 함께 저장해두므로, 캐시된 페이지는 요청마다 다시 압축하지 않는다. (compress.py 참고)
+    page_cache = get_page_cache()
+    key = ('blog.index', get_build_version(), before, after, per_page, viewer)
+    cached = page_cache.get(key) if page_cache is not None else None
+    if cached is not None:
+        html, compressed, etag, last_modified = cached
+        return not_modified(etag, last_modified) or set_validators(
+            use_compressed(make_response(html), compressed), etag, last_modified
+        )
+
+    etag, last_modified = feed_etag((yield get_feed_version, ()), viewer)
+    response = not_modified(etag, last_modified)
+    if response is not None:
+        return response
+
+    tokens = feed_tokens(page_cache, before, viewer) if page_cache is not None else None
+    page = yield get_page, (FEED_QUERY, before, after, per_page)
+    html = render(page)
+
+    response = make_response(html)
+    if page_cache is not None:
+        compressed = compress_data(response.get_data())
+        page_cache.set(
+            key, (html, compressed, etag, last_modified), feed_tags(page, before, viewer), tokens
+        )
+        use_compressed(response, compressed)
+
+    return set_validators(response, etag, last_modified)
+
+
+# 스트리밍 랜더링 (blog.py)
+# stream_template()은 템플릿을 한 번에 문자열로 만들지 않고, 만들어지는 대로 조금씩 응답으로 보낸다.
+# 헤더(base.html의 nav 등)는 바로 전송되고, 글은 DB 커서에서 가져오는 대로 전송된다.
+# 따라서 글이 많아져도 첫 바이트가 도착하는 시간과 메모리 사용량이 늘어나지 않는다.
+# stream_template()은 내부적으로 stream_with_context()를 사용하기 때문에, 스트리밍이 끝날 때까지 g.read_db를 사용할 수 있다.
+def stream_index(before, per_page, viewer):
+    etag, last_modified = feed_validators(viewer)
+    response = not_modified(etag, last_modified)
+    if response is not None:
+        return response
+
+    page = LazyPage(get_read_db(), FEED_QUERY, before, per_page=per_page)
+    response = current_app.response_class(
+        stream_template('blog/index.html', posts=page.posts, page=page)
+    )
+    return set_validators(response, etag, last_modified)
+
+
+# 작성자별 글 목록 (blog.py)
+# /user/<username>은 한 사용자가 작성한 글만 메인 페이지와 같은 커서 페이지네이션으로 보여준다.
+# (author_id, created, id) 인덱스를 따라 읽기 때문에, 전체 글이 많아도 그 사용자의 글 LIMIT 만큼만 읽는다.
+# 글 수는 user.post_count를 그대로 사용한다. (schema.sql의 post_count 트리거 참고)
+def fetch_author(db, username):
+    return db.execute(
+        'SELECT id, username, post_count FROM user WHERE username = ?', (username,)
+    ).fetchone()
+
+
+@bp.route('/user/<username>')
+def user_feed(username):
+    before, after = get_cursor_args()
+    viewer = g.user['id'] if g.user else None
+
+    db = get_read_db()
+    author = fetch_author(db, username)
+    if author is None:
+        abort(404, "User {0} doesn't exist.".format(username))
+
+    # 메인 페이지와 같은 feed_version으로 조건부 GET을 처리한다. 작성자의 id도 ETag에 포함된다.
+    etag, last_modified = feed_validators(viewer, 'user', author['id'])
+    if '_flashes' not in session:
+        response = not_modified(etag, last_modified)
+        if response is not None:
+            return response
+
+    page = get_page(
+        db, FEED_QUERY, before, after, per_page=current_app.config['POSTS_PER_PAGE'],
+        where='author_id = ?', params=(author['id'],),
+    )
+    response = make_response(
+        render_template('blog/user.html', author=author, posts=page.posts, page=page)
+    )
+    return set_validators(response, etag, last_modified)
 
 # 3. Create
 
@@ -72,15 +369,36 @@ def create():
         if error is not None:
             flash(error)
         else:
-            db = get_db()
-            db.execute(
-                'INSERT INTO post (title, body, author_id) VALUES (?, ?, ?)', (title, body, g.user['id'])
-            )
-            db.commit()
+            # 글 저장과 커밋은 execute_write()가 처리한다. (writequeue.py 참고)
+            execute_write(insert_post, title, body, g.user['id'])
+
+            # 새 글은 가장 앞에 추가되므로 첫 페이지들만 무효화된다.
+            invalidate_feed('feed:head')
             return redirect(url_for('blog.index'))
     
     return render_template('blog/create.html')
 
+# 글을 저장, 수정, 삭제하는 쿼리는 execute_write()에 전달할 수 있도록 db를 첫 번째 인자로 받는다.
+def insert_post(db, title, body, author_id):
+    # 작성자 이름(author_name)을 INSERT 문에서 함께 넣는다. (schema.sql의 post_author_name 참고)
+    return db.execute(
+        'INSERT INTO post (title, body, author_id, author_name)'
+        ' SELECT ?, ?, id, username FROM user WHERE id = ?',
+        (title, body, author_id)
+    ).lastrowid
+
+def update_post(db, id, title, body):
+    db.execute(
+        'UPDATE post SET title = ?, body = ?'
+        'WHERE id = ?',
+        (title, body, id)
+    )
+
+def delete_post(db, id):
+    db.execute(
+        'DELETE FROM post WHERE id = ?', (id,)
+    )
+
 # 4. Update, Delete
 
 # 글 수정 가능여부 식별 코드
@@ -94,9 +412,10 @@ def get_post(id, check_author=True):
     # 1. 글이 존재하는지?
     # 2. 로그인한 유저의 id와 글의 작성자가 같은 사람인지?
     # 만약 유효성 식별에서 적합하지 않다면, 페이지에 오류 메세지를 전달한다.
-    post = get_db().execute(
-        'SELECT p.id, title, body, created, author_id, username FROM post p JOIN user u ON p.author_id = u.id WHERE p.id = ?', (id,)
-    ).fetchone()
+    return check_post(fetch_post(get_read_db(), id), id, check_author)
+
+# check_post()는 읽어온 글의 유효성을 검사한다. (update_flow는 글을 yield로 읽은 뒤에 사용한다)
+def check_post(post, id, check_author=True):
 
     # abort()는 미리 정의된 예외상황에 따른 HTTP 코드 값을 반환한다.
     # 이 코드에서 사용된 404는 'Not Found', 403은 'Forbidden'을 의미한다.
@@ -108,6 +427,11 @@ def get_post(id, check_author=True):
     
     return post
 
+def fetch_post(db, id):
+    return db.execute(
+        FEED_QUERY + ' WHERE p.id = ?', (id,)
+    ).fetchone()
+
 # 글 수정 코드 (blog.py)
 
 # 지금까지 만들어온 뷰와 다르게 update 함수는 id라는 인자 값을 받아온다.
@@ -118,6 +442,10 @@ def get_post(id, check_author=True):
 @bp.route('/<int:id>/update', methods=['GET', 'POST'])
 @login_required
 def update(id):
+    return run_reads(update_flow(id))
+
+
+def update_flow(id):
 
     # 1. 로그인을 검증하기 위해 login_required 데코레이터를 사용했다.
     # 2. get_post() 함수를 통해 수정이 가능한 글인지에 대한 유효성 검사를 한다.
@@ -132,7 +460,20 @@ def update(id):
     #   - 반면에, 다른 함수에서 html 파일을 랜더링하면 request 객체를 초기화하여 웹 페이지로 전달할 수 있다.
     # 4. 글 제목이 존재한다면, 사용자가 작성한 내용으로 글을 수정한다.
     #   - redirect 함수를 통해 index 함수에서 index.html이 랜더링 된다.
-    post = get_post(id)
+    # 5. 글 수정 화면도 메인 페이지와 같이 조건부 GET을 지원한다.
+    #   - 없는 글(404)과 다른 사람의 글(403)은 ETag가 같더라도 304보다 먼저 처리한다.
+    #   - feed_version은 글을 읽기 전에 읽는다. 글을 먼저 읽으면 그 사이에 수정된 경우 예전 글에 새 ETag가 붙는다.
+    # 6. 글과 feed_version은 yield로 읽는다. (읽기 흐름 참고)
+    validators = None
+    if request.method == 'GET' and '_flashes' not in session:
+        validators = feed_etag((yield get_feed_version, ()), g.user['id'], id)
+
+    post = check_post((yield fetch_post, (id,)), id)
+
+    if validators is not None:
+        response = not_modified(*validators)
+        if response is not None:
+            return response
 
     if request.method == 'POST':
         title = request.form['title']
@@ -145,16 +486,14 @@ def update(id):
         if error is not None:
             flash(error)
         else:
-            db = get_db()
-            db.execute(
-                'UPDATE post SET title = ?, body = ?'
-                'WHERE id = ?',
-                (title, body, id)
-            )
-            db.commit()
+            execute_write(update_post, id, title, body)
+            invalidate_feed('post:{}'.format(id))
             return redirect(url_for('blog.index'))
 
-    return render_template('blog/update.html', post = post)
+    response = make_response(render_template('blog/update.html', post = post))
+    if validators is not None:
+        set_validators(response, *validators)
+    return response
 
 # 글 삭제 코드 (blog.py)
 
@@ -170,9 +509,70 @@ def delete(id):
     #   - 가능하지 않다면, get_post() 함수 내부의 abort를 통해서 사용자 페이지에 오류가 전달된다.
     # 3. 해당 글을 삭제하고 메인 페이지로 이동한다.
     get_post(id)
-    db = get_db()
-    db.execute(
-        'DELETE FROM post WHERE id = ?', (id,)
+    execute_write(delete_post, id)
+    invalidate_feed('post:{}'.format(id))
+    return redirect(url_for('blog.index'))
+
+# 5. Search
+
+# 글 검색 코드 (blog.py)
+# post_fts는 post 테이블의 제목과 본문으로 만든 FTS5 전문 검색 인덱스이다. (schema.sql 참고)
+# LIKE '%검색어%'는 모든 글을 처음부터 끝까지 읽어야 하지만, 전문 검색 인덱스는 단어로 바로 글을 찾는다.
+# 결과는 bm25() 점수로 정렬되며, 제목에서 찾은 단어에 본문보다 높은 가중치를 준다.
+# 관련도 순서에는 커서로 사용할 값이 없기 때문에 ?page=<번호>로 페이지를 나눈다.
+# OFFSET은 건너뛸 결과를 모두 읽어야 하고 너무 큰 값은 SQLite 정수 범위를 넘으므로, SEARCH_MAX_PAGE를 넘는 페이지는 404를 반환한다.
+SEARCH_QUERY = (
+    "SELECT p.id, created, author_id, author_name AS username,"
+    " highlight(post_fts, 0, char(2), char(3)) AS title,"
+    " snippet(post_fts, 1, char(2), char(3), '...', 32) AS snippet"
+    " FROM post_fts JOIN post p ON p.id = post_fts.rowid"
+    " WHERE post_fts MATCH ? ORDER BY bm25(post_fts, 10.0, 1.0) LIMIT ? OFFSET ?"
+)
+
+
+def fts_query(q):
+    # 사용자가 입력한 검색어에 FTS5 문법(AND, OR, 따옴표 등)이 섞여 있으면 오류가 나므로,
+    # 각 단어를 따옴표로 감싸고 '*'를 붙여서 그 단어로 시작하는 단어를 모두 찾도록 한다.
+    # (예: '블로그'로 '블로그를', '블로그에서'도 찾을 수 있다.)
+    return ' '.join('"{}"*'.format(term.replace('"', '""')) for term in q.split())
+
+
+def highlight(text):
+    # highlight()와 snippet()은 찾은 단어를 char(2), char(3)으로 감싸서 돌려준다.
+    # 글 내용은 먼저 escape하고, 표시 문자만 <mark> 태그로 바꿔준다.
+    return Markup(
+        str(escape(text)).replace('\x02', '<mark>').replace('\x03', '</mark>')
+    )
+
+
+@bp.route('/search')
+def search():
+    q = request.args.get('q', '').strip()
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = current_app.config['POSTS_PER_PAGE']
+    max_page = current_app.config['SEARCH_MAX_PAGE']
+    if page > max_page:
+        abort(404, "Page {0} doesn't exist.".format(page))
+
+    results = []
+    has_next = False
+    if q:
+        rows = get_read_db().execute(
+            SEARCH_QUERY, (fts_query(q), per_page + 1, (page - 1) * per_page)
+        ).fetchall()
+        has_next = len(rows) > per_page and page < max_page
+        results = [
+            {
+                'id': row['id'],
+                'created': row['created'],
+                'author_id': row['author_id'],
+                'username': row['username'],
+                'title': highlight(row['title']),
+                'snippet': highlight(row['snippet']),
+            }
+            for row in rows[:per_page]
+        ]
+
+    return render_template(
+        'blog/search.html', q=q, results=results, page=page, has_next=has_next
     )
-    db.commit()
-    return redirect(url_for('blog.index'))
\ No newline at end of file
@@ -0,0 +1,210 @@
+# 캐시 (cache.py)
+# 메인 페이지는 글이 작성/수정/삭제될 때만 바뀌지만, 요청마다 JOIN 쿼리를 실행하고 템플릿을 다시 랜더링한다.
+# 이번에는 랜더링된 페이지를 캐시에 저장해두고, 글이 바뀌었을 때만 필요한 페이지를 무효화하는 방법을 배운다.
+
+# 튜토리얼 진행순서
+# 1. LRU 캐시 (cache.py)
+# 2. 태그를 이용한 페이지 캐시 (cache.py)
+# 3. 어플리케이션에 페이지 캐시 등록 (cache.py) -> (__init__.py)
+# 4. 조건부 GET (cache.py)
+# 5. 로그인한 사용자 캐시 (cache.py)
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from datetime import timezone
+
+from flask import current_app, request
+from werkzeug.http import is_resource_modified
+from werkzeug.utils import import_string
+
+# 1. LRU 캐시 (cache.py)
+
+# LRUCache는 프로세스 안에서 동작하는 기본 캐시 저장소이다.
+# maxsize를 넘어서면 가장 오랫동안 사용되지 않은 항목부터 지운다.
+# ttl(초)을 지정하면 저장된 지 ttl이 지난 항목은 없는 것으로 취급한다.
+# 다른 저장소(예: memcached, redis)를 사용하고 싶다면 get/set/delete/clear 메소드를 가진 객체를 만들면 된다.
+class LRUCache(object):
+
+    def __init__(self, maxsize=128, ttl=None, timer=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._timer = timer
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value, expires = self._data[key]
+            except KeyError:
+                return default
+
+            if expires is not None and expires <= self._timer():
+                del self._data[key]
+                return default
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        expires = self._timer() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+# 2. 태그를 이용한 페이지 캐시 (cache.py)
+
+# 페이지를 저장할 때 그 페이지가 의존하는 태그(예: 'post:1')를 함께 기록한다.
+# 각 태그는 저장소 안에 임의의 토큰 값을 가지며, invalidate(tag)는 토큰을 새 값으로 바꾼다.
+# 페이지를 읽을 때 저장 당시의 토큰과 현재 토큰이 하나라도 다르면 캐시에 없는 것으로 취급한다.
+# 태그 토큰도 저장소에 저장되기 때문에, 여러 프로세스가 같은 저장소를 공유하면 무효화도 함께 공유된다.
+#
+# 페이지를 만드는 동안(DB를 읽은 뒤 set()을 호출하기 전) 글이 바뀌면, set()이 읽는 토큰은 이미 무효화된 새 토큰이다.
+# 그러면 오래된 페이지가 새 토큰으로 저장되어 다시는 무효화되지 않는다.
+# 이를 막기 위해 DB를 읽기 전에 tokens()로 토큰을 읽어두고 set()에 전달한다.
+# 글 번호처럼 DB를 읽은 뒤에야 알 수 있는 태그를 위해, 모든 무효화마다 바뀌는 GENERATION 토큰도 함께 읽어둔다.
+# set()을 호출할 때 GENERATION 토큰이 바뀌었다면 그 사이에 무효화가 있었으므로 페이지를 저장하지 않는다.
+class PageCache(object):
+
+    GENERATION = '*'
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def _token(self, tag, create=False):
+        token = self.backend.get(('tag', tag))
+        if token is None and create:
+            token = uuid.uuid4().hex
+            self.backend.set(('tag', tag), token)
+        return token
+
+    def tokens(self, *tags):
+        return {tag: self._token(tag, create=True) for tag in (self.GENERATION,) + tags}
+
+    def get(self, key):
+        entry = self.backend.get(('page', key))
+        if entry is None:
+            return None
+
+        value, tokens = entry
+        for tag, token in tokens.items():
+            if self._token(tag) != token:
+                return None
+
+        return value
+
+    def set(self, key, value, tags=(), tokens=None):
+        saved = {}
+        for tag in tags:
+            token = tokens.get(tag) if tokens is not None else None
+            saved[tag] = token or self._token(tag, create=True)
+
+        # 태그 토큰을 모두 읽은 뒤에 GENERATION 토큰을 확인한다.
+        # invalidate()는 GENERATION 토큰을 먼저 바꾸므로, 여기서 바뀌지 않았다면 위에서 읽은 토큰도 무효화되기 전의 값이다.
+        if tokens is not None and self._token(self.GENERATION) != tokens[self.GENERATION]:
+            return
+
+        self.backend.set(('page', key), (value, saved))
+
+    def invalidate(self, *tags):
+        self.backend.set(('tag', self.GENERATION), uuid.uuid4().hex)
+        for tag in tags:
+            self.backend.set(('tag', tag), uuid.uuid4().hex)
+
+    def clear(self):
+        self.backend.clear()
+
+# 3. 어플리케이션에 페이지 캐시 등록 (cache.py)
+
+# PAGE_CACHE_ENABLED가 False라면 get_page_cache()는 None을 돌려준다.
+# PAGE_CACHE_BACKEND에는 app을 인자로 받아 저장소를 돌려주는 함수나, 그 함수의 import 경로를 지정할 수 있다.
+# 지정하지 않으면 PAGE_CACHE_SIZE 크기의 LRUCache를 사용한다.
+def get_page_cache():
+    return current_app.extensions.get('flaskr.page_cache')
+
+def init_app(app):
+    app.config.setdefault('PAGE_CACHE_ENABLED', True)
+    app.config.setdefault('PAGE_CACHE_SIZE', 1024)
+    app.config.setdefault('PAGE_CACHE_BACKEND', None)
+    app.config.setdefault('USER_CACHE_SIZE', 4096)
+    app.config.setdefault('USER_CACHE_TTL', 60)
+
+    # 로그인한 사용자 캐시를 만든다. (5. 로그인한 사용자 캐시 참고)
+    app.extensions['flaskr.user_cache'] = (
+        LRUCache(app.config['USER_CACHE_SIZE'], ttl=app.config['USER_CACHE_TTL'])
+        if app.config['USER_CACHE_SIZE'] > 0 else None
+    )
+
+    if not app.config['PAGE_CACHE_ENABLED']:
+        app.extensions['flaskr.page_cache'] = None
+        return
+
+    factory = app.config['PAGE_CACHE_BACKEND']
+    if factory is None:
+        backend = LRUCache(app.config['PAGE_CACHE_SIZE'])
+    else:
+        if isinstance(factory, str):
+            factory = import_string(factory)
+        backend = factory(app)
+
+    app.extensions['flaskr.page_cache'] = PageCache(backend)
+
+# 4. 조건부 GET (cache.py)
+
+# 브라우저나 프록시는 이전에 받은 응답의 ETag와 Last-Modified를 If-None-Match, If-Modified-Since 헤더로 보낸다.
+# 페이지가 바뀌지 않았다면 본문 없이 304 'Not Modified'만 돌려주어 전송량과 랜더링 비용을 줄인다.
+# no-cache는 캐시된 응답을 사용하기 전에 항상 다시 확인하라는 의미이고,
+# 로그인 여부에 따라 페이지가 달라지므로 Vary: Cookie를 함께 보낸다.
+def make_etag(*parts):
+    return 'W/"{}"'.format('-'.join(str(part) for part in parts))
+
+def set_validators(response, etag, last_modified):
+    response.headers['ETag'] = etag
+    response.last_modified = _utc(last_modified)
+    response.cache_control.no_cache = True
+    response.vary.add('Cookie')
+    return response
+
+# not_modified는 요청의 조건부 헤더와 etag, last_modified를 비교해서
+# 바뀌지 않았다면 304 응답을, 바뀌었다면 None을 돌려준다.
+# last_modified는 SQLite의 CURRENT_TIMESTAMP(UTC) 값을 그대로 받는다.
+def not_modified(etag, last_modified):
+    last_modified = _utc(last_modified)
+    if is_resource_modified(request.environ, etag, last_modified=last_modified):
+        return None
+
+    return set_validators(current_app.response_class(status=304), etag, last_modified)
+
+def _utc(value):
+    if value is not None and value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+# 5. 로그인한 사용자 캐시 (cache.py)
+
+# load_logged_in_user()는 모든 요청마다 실행되므로, 조회한 사용자 정보를 프로세스 안의 LRU 캐시에 저장해둔다.
+# USER_CACHE_SIZE는 저장할 최대 사용자 수(0이면 사용하지 않음), USER_CACHE_TTL은 저장된 정보의 유효 시간(초)이다.
+# 사용자 정보가 바뀌면 invalidate_user()로 바로 지우고, 다른 프로세스의 캐시는 TTL이 지나면 다시 조회된다.
+def get_user_cache():
+    return current_app.extensions.get('flaskr.user_cache')
+
+def invalidate_user(user_id):
+    user_cache = get_user_cache()
+    if user_cache is not None:
+        user_cache.delete(user_id)
@@ -0,0 +1,169 @@
+# 응답 압축 (compress.py)
+# 메인 페이지의 HTML과 static/style.css는 압축되지 않은 채로 전송된다.
+# 텍스트는 gzip으로 압축하면 크기가 크게 줄어들기 때문에, 글이 많은 페이지일수록 전송 시간이 줄어든다.
+# 이번에는 브라우저가 Accept-Encoding 헤더로 gzip을 지원한다고 알려준 경우에만 응답을 압축하고,
+# 정적 파일은 미리 압축해두어 요청마다 압축하지 않도록 한다.
+
+# 튜토리얼 진행순서
+# 1. 응답 압축 (compress.py)
+# 2. 정적 파일 미리 압축하기 (compress.py)
+# 3. 어플리케이션에 압축 설정 등록 (compress.py) -> (__init__.py)
+
+import gzip
+import mimetypes
+import os
+
+import click
+from flask import current_app, request, send_from_directory
+from flask.cli import with_appcontext
+from werkzeug.security import safe_join
+
+# 1. 응답 압축 (compress.py)
+
+# after_request로 등록되어 모든 응답이 전송되기 전에 실행된다.
+# 다음 경우에는 압축하지 않는다.
+#  - 브라우저가 gzip을 지원하지 않는 경우
+#  - COMPRESS_MIMETYPES에 없는 형식(이미지 등 이미 압축된 형식)이거나, 본문이 COMPRESS_MIN_SIZE보다 작은 경우
+#  - 이미 압축되었거나(Content-Encoding), 파일을 그대로 전송하는 경우(direct_passthrough)
+#  - 스트리밍 응답인 경우 (본문을 모두 모아야 압축할 수 있으므로, 스트리밍의 장점이 사라진다)
+# 압축 여부가 Accept-Encoding에 따라 달라지므로, 압축할 수 있는 형식에는 항상 Vary: Accept-Encoding을 붙인다.
+def compress_response(response):
+    config = current_app.config
+    if not config['COMPRESS_ENABLED'] or response.mimetype not in config['COMPRESS_MIMETYPES']:
+        return response
+
+    response.vary.add('Accept-Encoding')
+
+    if (
+        not accepts_gzip()
+        or response.status_code < 200
+        or response.status_code in (204, 206, 304)
+        or 'Content-Encoding' in response.headers
+        or response.direct_passthrough
+        or response.is_streamed
+    ):
+        return response
+
+    compressed = compress_data(response.get_data())
+    if compressed is None:
+        return response
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+def accepts_gzip():
+    return request.accept_encodings['gzip'] > 0
+
+# compress_data()는 본문을 압축해서 돌려주고, 압축을 사용하지 않거나 본문이 COMPRESS_MIN_SIZE보다 작다면 None을 돌려준다.
+# 페이지 캐시처럼 같은 본문을 여러 번 보내는 경우에는 압축한 본문을 함께 저장해두고,
+# use_compressed()로 응답에 넣어서 요청마다 다시 압축하지 않도록 한다. (blog.py의 index 참고)
+# Content-Encoding이 붙은 응답은 compress_response()에서 다시 압축하지 않는다.
+def compress_data(data):
+    config = current_app.config
+    if not config['COMPRESS_ENABLED'] or len(data) < config['COMPRESS_MIN_SIZE']:
+        return None
+    return gzip.compress(data, compresslevel=config['COMPRESS_LEVEL'], mtime=0)
+
+def use_compressed(response, compressed):
+    config = current_app.config
+    if (
+        compressed is not None
+        and config['COMPRESS_ENABLED']
+        and len(response.get_data()) >= config['COMPRESS_MIN_SIZE']
+        and accepts_gzip()
+    ):
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+# 2. 정적 파일 미리 압축하기 (compress.py)
+
+# flask compress-static 명령어는 static 폴더의 파일을 가장 높은 압축 수준(9)으로 압축해서 '파일명.gz'로 저장한다.
+# 배포 전에 한 번 실행해두면, 정적 파일 요청은 압축된 파일을 그대로 보내기만 하면 된다.
+# 원본 파일이 바뀌면 다시 압축하고, 압축해도 작아지지 않는 파일은 저장하지 않는다.
+def compress_static(static_folder, types, min_size):
+    written = []
+    for root, dirs, files in os.walk(static_folder):
+        for name in files:
+            path = os.path.join(root, name)
+            if name.endswith('.gz') or guess_mimetype(name) not in types:
+                continue
+
+            stat = os.stat(path)
+            target = path + '.gz'
+            if stat.st_size < min_size or (
+                os.path.exists(target) and os.stat(target).st_mtime >= stat.st_mtime
+            ):
+                continue
+
+            with open(path, 'rb') as f:
+                data = gzip.compress(f.read(), compresslevel=9, mtime=0)
+            if len(data) >= stat.st_size:
+                continue
+
+            with open(target + '.tmp', 'wb') as f:
+                f.write(data)
+            os.replace(target + '.tmp', target)
+            written.append((os.path.relpath(path, static_folder), stat.st_size, len(data)))
+    return written
+
+def guess_mimetype(filename):
+    return mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+@click.command('compress-static')
+@with_appcontext
+def compress_static_command():
+    config = current_app.config
+    written = compress_static(
+        current_app.static_folder, config['COMPRESS_MIMETYPES'], config['COMPRESS_MIN_SIZE']
+    )
+    for path, size, compressed in written:
+        click.echo('{} {} -> {} bytes'.format(path, size, compressed))
+    click.echo('Compressed {} static files.'.format(len(written)))
+
+# before_request로 등록되어 정적 파일 요청에 미리 압축된 파일이 있다면 그 파일을 보낸다.
+# Content-Type은 원본 파일의 형식을 그대로 사용한다.
+# 압축한 뒤에 원본 파일이 바뀌었다면 (compress-static을 다시 실행하기 전) 압축된 파일은 사용하지 않는다.
+def serve_precompressed():
+    if (
+        request.endpoint != 'static'
+        or not current_app.config['COMPRESS_ENABLED']
+        or not accepts_gzip()
+    ):
+        return None
+
+    filename = request.view_args.get('filename', '')
+    source = safe_join(current_app.static_folder, filename)
+    if source is None or not os.path.isfile(source) or not os.path.isfile(source + '.gz'):
+        return None
+    if os.stat(source + '.gz').st_mtime < os.stat(source).st_mtime:
+        return None
+
+    response = send_from_directory(
+        current_app.static_folder, filename + '.gz',
+        mimetype=guess_mimetype(filename),
+        max_age=current_app.get_send_file_max_age(filename),
+    )
+    response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
+
+# 3. 어플리케이션에 압축 설정 등록 (compress.py)
+
+# COMPRESS_ENABLED: 응답 압축을 사용할지 여부
+# COMPRESS_LEVEL: gzip 압축 수준 (1~9, 높을수록 더 작아지지만 느리다)
+# COMPRESS_MIN_SIZE: 이보다 작은 응답은 압축하지 않는다 (바이트)
+# COMPRESS_MIMETYPES: 압축할 응답 형식
+def init_app(app):
+    app.config.setdefault('COMPRESS_ENABLED', True)
+    app.config.setdefault('COMPRESS_LEVEL', 6)
+    app.config.setdefault('COMPRESS_MIN_SIZE', 500)
+    app.config.setdefault('COMPRESS_MIMETYPES', (
+        'text/html', 'text/css', 'text/plain', 'text/javascript',
+        'application/javascript', 'application/json', 'image/svg+xml',
+    ))
+
+    app.before_request(serve_precompressed)
+    app.after_request(compress_response)
+    app.cli.add_command(compress_static_command)
@@ -14,6 +14,11 @@
 # 4. 가상 환경에서 사용될 함수 이름 정의 (db.py)
 # 5. 어플리케이션에 DB 연결함수와 해지 함수를 등록 (db.py)
 # 6. db.py의 DB 초기화 함수 실행 (__init__.py)
+# 7. 커넥션 풀 (db.py)
+# 8. SQL 계측 (db.py)
+# 9. 검색 인덱스 재생성 (db.py)
+# 10. 읽기 전용 커넥션 (db.py)
+# 11. 기존 데이터베이스 업그레이드 (db.py)
 
 # 1. 데이터베이스 연결, DB 연결 함수 정의, DB 연결 해지 함수 정의 (db.py)
 # 데이터베이스를 사용하기 위해 첫 번째 할 일은 앱과 데이터베이스를 연결해주는 일이다.
@@ -21,7 +26,14 @@
 
 # 웹 어플리케이션은 통상적으로 request를 통해 커넥션을 연결시키고, response를 보내기 직전에 닫아준다.
 
+import logging
+import os
+import queue
+import re
 import sqlite3
+import threading
+import time
+from urllib.request import pathname2url
 
 # click은 터미널에서 실행되며, 빌트인, 확장, 어플리케이션에서 정의한 명령어를 사용할 수 있게 한다.
 import click
@@ -44,36 +56,28 @@ def get_db():
     # 1. flask와 sqlite 간에 연결된 "db"라는 객체명이 없다면,
     if 'db' not in g:
 
-        # 데이터베이스 설정 키 값에서 지정한 파일로 커넥션을 맺어준다
-        g.db = sqlite3.connect(
-            
-            # DATABASE는 flask_tutorial/instance/flask.sqlite이다.
-            # 아직 이 파일이 있을 필요는 없고, 뒤에서 초기화 시켜줄 때 생성된다.
-            current_app.config['DATABASE'],
-            
-            # sqlite3.PARSE_DECLTYPES
-            # db에 있는 컬럼 데이터를 가져올 때, 타입이 무엇인지 판별하는 역할을 한다.
-            # 가장 앞에 있는 단어를 통해 판별 (ex. integer primary key -> integer로 인식)
-            detect_types=sqlite3.PARSE_DECLTYPES
-        )
-        # sqlite3.Row는 커넥션이 결과값을 딕셔너리 형태로 돌려주게 한다.
-        # 이를 db의 row_factory 객체로 저장하여 사용한다.
-        # 이를 통해 각 컬럼에 컬럼명을 이용해 접근할 수 있다.
-        g.db.row_factory = sqlite3.Row
+        # 커넥션 풀에서 커넥션을 하나 빌려온다. (7. 커넥션 풀 참고)
+        # 요청마다 sqlite3.connect()를 새로 호출하지 않기 때문에 연결, 스키마 파싱, PRAGMA 설정 비용이 들지 않는다.
+        g.db = get_pool().checkout()
 
     return g.db
 
 # close_db 함수는 g 객체의 db 값을 확인해서 커넥션이 생성되었는지 확인하고, 커넥션이 생성되었으면 닫아준다.
+# 풀에서 빌려온 커넥션은 실제로 닫지 않고 풀에 반납한다.
 def close_db(e=None):
     db = g.pop('db', None)
     if db is not None:
         db.close()
-    
-    # click.echo는 터미널에 출력되는 문구이다.
-    click.echo("------------------------------------------------------")
-    click.echo("close.db(): teardown_appcontext로 설정한 close_db()가 활성화 되었습니다")
-    click.echo("close.db(): flask와 sqlite 간의 연결을 종료합니다.")
-    click.echo("======================================================")
+
+    # get_read_db()로 빌려온 읽기 전용 커넥션도 반납한다. (10. 읽기 전용 커넥션 참고)
+    read_db = g.pop('read_db', None)
+    if read_db is not None:
+        read_db.close()
+
+    # SQL 계측이 켜져 있다면 이번 요청에서 실행된 쿼리의 요약을 남긴다. (8. SQL 계측 참고)
+    queries = g.get('sql_queries')
+    if queries:
+        log_query_summary(queries)
 
 # 3. DB 초기화 함수 정의 (db.py)
 
@@ -114,12 +118,29 @@ def init_db_command():
 # 어플리케이션 팩토리에서 init_app(app) 기능을 import해서 실행시켜준다.
 def init_app(app):
 
+    # 커넥션 풀과 PRAGMA의 기본 설정 값이다. (7. 커넥션 풀 참고)
+    # 인스턴스 폴더의 config.py나 test_config로 바꿀 수 있다.
+    for key, value in (
+        ('DB_POOL_SIZE', 5),
+        ('DB_READ_POOL_SIZE', 5),
+        ('DB_POOL_PRE_PING', True),
+        ('SQLITE_JOURNAL_MODE', 'WAL'),
+        ('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        ('SQLITE_MMAP_SIZE', 256 * 1024 * 1024),
+        ('SQLITE_CACHE_SIZE', -16000),
+        ('SQLITE_BUSY_TIMEOUT', 5000),
+        ('SQL_INSTRUMENTATION', False),
+    ):
+        app.config.setdefault(key, value)
+
     # app.teardown_appcontext()는 response를 리턴할 때 마다 Flask에 에 해당 함수를 호출하도록 지시한다.
     # 여기에서 close_db 함수는 response 후에 객체를 제거(정리)하는 목적으로 사용
     app.teardown_appcontext(close_db)
 
     # app.cli.add_command()는 터미널에서 사용할 수 있는 flask command를 추가할 수 있다.
     app.cli.add_command(init_db_command)
+    app.cli.add_command(rebuild_search_index_command)
+    app.cli.add_command(upgrade_db_command)
 
 # 이후 __init__.py로 이동하여 init_app 함수를 import해서 등록해준다.
 
@@ -128,3 +149,487 @@ def init_app(app):
 # create_app()이 실행된 결과로 instance 폴더와 그 하위에 flaskr.sqlite가 생성되었다.
 # flaskr.sqlite은 sqlite 데이터베이스 파일이다.
 # init_db_command를 통해서 schema.sql에 적힌 sql문을 실행시킨 후, 그 내용들이 flaskr.sqlite로 저장된 것으로 보인다.
+
+# 7. 커넥션 풀 (db.py)
+
+# 커넥션 풀은 프로세스마다 하나씩 만들어지며, 사용이 끝난 커넥션을 닫지 않고 보관해두었다가 다음 요청에 재사용한다.
+# 풀에서 만드는 커넥션은 처음 한 번만 PRAGMA를 설정하며, 각 값은 앱 설정에서 바꿀 수 있다.
+#  - SQLITE_JOURNAL_MODE: WAL 모드에서는 읽기와 쓰기가 서로를 막지 않는다.
+#  - SQLITE_SYNCHRONOUS: WAL 모드에서 NORMAL은 커밋마다 fsync를 하지 않아도 안전하다.
+#  - SQLITE_MMAP_SIZE: 데이터베이스 파일을 메모리에 매핑해서 읽는 최대 크기 (바이트)
+#  - SQLITE_CACHE_SIZE: 커넥션마다 가지는 페이지 캐시 크기 (음수는 KiB 단위)
+#  - SQLITE_BUSY_TIMEOUT: 다른 커넥션이 잠금을 가지고 있을 때 기다리는 시간 (밀리초)
+# DB_POOL_SIZE는 풀에 보관할 최대 커넥션 수이다. 이보다 많은 커넥션이 동시에 필요하면 새로 만들고, 반납할 때 닫는다.
+# DB_POOL_PRE_PING이 True라면 커넥션을 빌려줄 때마다 'SELECT 1'로 상태를 확인하고, 문제가 있으면 새 커넥션으로 바꿔준다.
+class ConnectionPool(object):
+
+    def __init__(self, database, size=5, pragmas=(), pre_ping=True, handle_class=None,
+                 read_only=False):
+        self.database = database
+        self.size = size
+        self.pragmas = tuple(pragmas)
+        self.pre_ping = pre_ping
+
+        # 읽기 전용 풀의 커넥션은 mode=ro로 열린다. (10. 읽기 전용 커넥션 참고)
+        self.read_only = read_only
+
+        # checkout()이 돌려줄 핸들의 클래스 (8. SQL 계측 참고)
+        self.handle_class = handle_class or PooledConnection
+
+        # 풀을 만든 프로세스의 pid를 기록해두고, fork된 프로세스에서는 새 풀을 만든다.
+        self.pid = os.getpid()
+
+        # 가장 최근에 반납된 커넥션부터 재사용한다. (페이지 캐시가 따뜻하게 유지된다)
+        self._idle = queue.LifoQueue(maxsize=size) if size > 0 else None
+
+    @property
+    def idle(self):
+        return self._idle.qsize() if self._idle is not None else 0
+
+    def connect(self):
+
+        # 데이터베이스 설정 키 값에서 지정한 파일로 커넥션을 맺어준다
+        # DATABASE는 flask_tutorial/instance/flask.sqlite이다.
+        # 아직 이 파일이 있을 필요는 없고, 뒤에서 초기화 시켜줄 때 생성된다.
+        conn = sqlite3.connect(
+            self.uri if self.read_only else self.database,
+
+            # sqlite3.PARSE_DECLTYPES
+            # db에 있는 컬럼 데이터를 가져올 때, 타입이 무엇인지 판별하는 역할을 한다.
+            # 가장 앞에 있는 단어를 통해 판별 (ex. integer primary key -> integer로 인식)
+            detect_types=sqlite3.PARSE_DECLTYPES,
+
+            # 풀에 반납된 커넥션은 다른 스레드의 요청에서 사용될 수 있다.
+            # 한 커넥션은 한 번에 하나의 요청에만 빌려주기 때문에 동시에 사용되지는 않는다.
+            check_same_thread=False,
+            uri=self.read_only,
+        )
+
+        # sqlite3.Row는 커넥션이 결과값을 딕셔너리 형태로 돌려주게 한다.
+        # 이를 통해 각 컬럼에 컬럼명을 이용해 접근할 수 있다.
+        conn.row_factory = sqlite3.Row
+
+        for pragma in self.pragmas:
+            conn.execute(pragma)
+
+        return conn
+
+    @property
+    def uri(self):
+        return 'file:{}?mode=ro'.format(pathname2url(os.path.abspath(self.database)))
+
+    def checkout(self):
+        conn = None
+        if self._idle is not None:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                pass
+
+        if conn is None:
+            conn = self.connect()
+        elif self.pre_ping and not self.is_healthy(conn):
+            self.discard(conn)
+            conn = self.connect()
+
+        return self.handle_class(self, conn)
+
+    def checkin(self, conn):
+
+        # 요청이 커밋하지 않고 끝났다면, 다음 요청에 트랜잭션이 넘어가지 않도록 롤백한다.
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self.discard(conn)
+            return
+
+        if self._idle is None or os.getpid() != self.pid:
+            self.discard(conn)
+            return
+
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            self.discard(conn)
+
+    def is_healthy(self, conn):
+        try:
+            conn.execute('SELECT 1').fetchone()
+        except sqlite3.Error:
+            return False
+        return True
+
+    def discard(self, conn):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def close(self):
+
+        # 풀에 보관된 커넥션을 모두 닫는다.
+        while self.idle:
+            try:
+                self.discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+# PooledConnection은 get_db()가 돌려주는 객체로, 풀에서 빌려온 sqlite3 커넥션을 감싼다.
+# sqlite3.Connection처럼 사용할 수 있고, close()를 호출하면 커넥션을 풀에 반납한다.
+# 반납한 뒤에 사용하면 닫힌 커넥션과 같이 sqlite3.ProgrammingError가 발생한다.
+class PooledConnection(object):
+
+    __slots__ = ('_pool', '_conn')
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    @property
+    def connection(self):
+        if self._conn is None:
+            raise sqlite3.ProgrammingError('Cannot operate on a closed database.')
+        return self._conn
+
+    def execute(self, sql, parameters=()):
+        return self.connection.execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.connection.executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.connection.executescript(sql_script)
+
+    def commit(self):
+        self.connection.commit()
+
+    def rollback(self):
+        self.connection.rollback()
+
+    def __getattr__(self, name):
+        return getattr(self.connection, name)
+
+    def __enter__(self):
+        return self.connection.__enter__()
+
+    def __exit__(self, *exc_info):
+        return self.connection.__exit__(*exc_info)
+
+    def close(self):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            self._pool.checkin(conn)
+
+_pool_lock = threading.Lock()
+
+# get_pool 함수는 현재 앱의 커넥션 풀을 돌려준다.
+# 풀은 app.extensions에 저장되며, 프로세스가 fork된 경우에는 부모 프로세스의 커넥션을 공유하지 않도록 새로 만든다.
+# read_only가 True라면 읽기 전용 풀을 돌려준다. (10. 읽기 전용 커넥션 참고)
+def get_pool(app=None, read_only=False):
+    if app is None:
+        app = current_app._get_current_object()
+
+    key = 'flaskr.db_read_pool' if read_only else 'flaskr.db_pool'
+    pool = app.extensions.get(key)
+    if pool is None or pool.pid != os.getpid():
+        with _pool_lock:
+            pool = app.extensions.get(key)
+            if pool is None or pool.pid != os.getpid():
+                pool = app.extensions[key] = create_pool(app.config, read_only)
+
+    return pool
+
+def create_pool(config, read_only=False):
+    pragmas = [
+        'PRAGMA mmap_size = {:d}'.format(config['SQLITE_MMAP_SIZE']),
+        'PRAGMA cache_size = {:d}'.format(config['SQLITE_CACHE_SIZE']),
+        'PRAGMA busy_timeout = {:d}'.format(config['SQLITE_BUSY_TIMEOUT']),
+    ]
+
+    # journal_mode는 데이터베이스 파일에 기록되는 설정이므로 쓰기 커넥션에서만 바꾼다.
+    if read_only:
+        pragmas.append('PRAGMA query_only = ON')
+    else:
+        pragmas[:0] = [
+            'PRAGMA journal_mode = {}'.format(config['SQLITE_JOURNAL_MODE']),
+            'PRAGMA synchronous = {}'.format(config['SQLITE_SYNCHRONOUS']),
+        ]
+
+    return ConnectionPool(
+        config['DATABASE'],
+        size=config['DB_READ_POOL_SIZE' if read_only else 'DB_POOL_SIZE'],
+        pragmas=pragmas,
+        pre_ping=config['DB_POOL_PRE_PING'],
+        handle_class=get_handle_class(config),
+        read_only=read_only,
+    )
+
+# 8. SQL 계측 (db.py)
+
+# SQL_INSTRUMENTATION이 True라면 get_db()는 InstrumentedConnection을 돌려준다.
+# execute/executemany/executescript가 호출될 때마다 SQL 문, 파라미터 개수, 실행 시간, 결과 행 수를 기록한다.
+# 기록은 요청마다 g.sql_queries에 쌓이고, app context가 종료될 때 close_db에서 요약을 로그로 남긴다.
+# False라면 풀은 PooledConnection을 그대로 돌려주므로 계측 비용이 전혀 들지 않는다.
+class QueryRecord(object):
+
+    __slots__ = ('sql', 'params', 'duration', 'rows')
+
+    def __init__(self, sql, params, duration=0.0, rows=0):
+        self.sql = sql
+        self.params = params
+        self.duration = duration
+        self.rows = rows
+
+    def __repr__(self):
+        return '<QueryRecord {:.3f}ms rows={} {!r}>'.format(
+            self.duration * 1000, self.rows, self.sql
+        )
+
+# SELECT 문은 결과를 fetch할 때 실제로 실행되므로, 커서를 감싸서 fetch 시간과 행 수도 함께 기록한다.
+class InstrumentedCursor(object):
+
+    __slots__ = ('_cursor', '_record')
+
+    def __init__(self, cursor, record):
+        self._cursor = cursor
+        self._record = record
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._record.duration += time.perf_counter() - start
+        if row is not None:
+            self._record.rows += 1
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = self._cursor.fetchmany(self._cursor.arraysize if size is None else size)
+        self._record.duration += time.perf_counter() - start
+        self._record.rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._record.duration += time.perf_counter() - start
+        self._record.rows += len(rows)
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+class InstrumentedConnection(PooledConnection):
+
+    __slots__ = ()
+
+    def _record(self, sql, params, call, *args):
+        start = time.perf_counter()
+        cursor = call(sql, *args)
+        record = QueryRecord(sql, params, time.perf_counter() - start, max(cursor.rowcount, 0))
+        g.setdefault('sql_queries', []).append(record)
+        return InstrumentedCursor(cursor, record)
+
+    def execute(self, sql, parameters=()):
+        return self._record(sql, len(parameters), self.connection.execute, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        seq_of_parameters = list(seq_of_parameters)
+        return self._record(
+            sql, sum(len(p) for p in seq_of_parameters),
+            self.connection.executemany, seq_of_parameters,
+        )
+
+    def executescript(self, sql_script):
+        return self._record(sql_script, 0, self.connection.executescript)
+
+# METRICS_ENABLED가 True라면 (metrics.py 참고) 쿼리를 하나씩 기록하지 않고,
+# 요청마다 g.sql_totals에 쿼리 수, 전체 시간(fetch 포함), 행 수만 더하는 CountingConnection을 사용한다.
+# QueryTotals는 QueryRecord와 같은 duration, rows 속성을 가지므로 InstrumentedCursor를 그대로 사용한다.
+class QueryTotals(object):
+
+    __slots__ = ('count', 'duration', 'rows')
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.rows = 0
+
+class CountingConnection(PooledConnection):
+
+    __slots__ = ()
+
+    def _record(self, call, *args):
+        totals = g.get('sql_totals')
+        if totals is None:
+            totals = g.sql_totals = QueryTotals()
+
+        start = time.perf_counter()
+        cursor = call(*args)
+        totals.count += 1
+        totals.duration += time.perf_counter() - start
+        return InstrumentedCursor(cursor, totals)
+
+    def execute(self, sql, parameters=()):
+        return self._record(self.connection.execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._record(self.connection.executemany, sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self._record(self.connection.executescript, sql_script)
+
+def get_handle_class(config):
+    if config['SQL_INSTRUMENTATION']:
+        return InstrumentedConnection
+    if config.get('METRICS_ENABLED'):
+        return CountingConnection
+    return None
+
+# log_query_summary는 현재 요청에서 실행된 쿼리의 개수와 전체 시간을 로그로 남긴다.
+# 개별 쿼리는 DEBUG 레벨로 남긴다.
+def log_query_summary(queries):
+    logger = current_app.logger
+    total = sum(q.duration for q in queries)
+    logger.info(
+        '%d queries in %.3fms (%d rows)',
+        len(queries), total * 1000, sum(q.rows for q in queries),
+    )
+    if logger.isEnabledFor(logging.DEBUG):
+        for q in queries:
+            logger.debug(
+                '%.3fms rows=%d params=%d %s', q.duration * 1000, q.rows, q.params, q.sql
+            )
+
+# 9. 검색 인덱스 재생성 (db.py)
+
+# schema_statements()는 schema.sql을 SQL 문 단위로 나누어 돌려준다.
+# 트리거처럼 문장 안에 ';'가 들어있는 경우도 있기 때문에 sqlite3.complete_statement()로 문장의 끝을 판단한다.
+# 앞에 붙은 '--' 주석 줄은 제거한다.
+def schema_statements():
+    with current_app.open_resource('schema.sql') as f:
+        lines = f.read().decode('utf8').splitlines(keepends=True)
+
+    statement = ''
+    for line in lines:
+        if not statement and (not line.strip() or line.lstrip().startswith('--')):
+            continue
+        statement += line
+        if sqlite3.complete_statement(statement):
+            yield statement.strip()
+            statement = ''
+
+# rebuild_search_index()는 검색 인덱스(post_fts)와 트리거가 없다면 schema.sql에서 찾아서 만들고,
+# post 테이블의 내용으로 인덱스를 처음부터 다시 만든다.
+# 검색 기능이 추가되기 전에 만들어진 데이터베이스나, 인덱스가 어긋난 경우에 사용한다.
+def rebuild_search_index():
+    db = get_db()
+    for statement in schema_statements():
+        if statement.startswith('CREATE') and 'post_fts' in statement:
+            db.execute(statement)
+
+    db.execute("INSERT INTO post_fts (post_fts) VALUES ('rebuild')")
+    db.commit()
+
+    return db.execute('SELECT COUNT(*) FROM post').fetchone()[0]
+
+@click.command('rebuild-search-index')
+@with_appcontext
+def rebuild_search_index_command():
+    count = rebuild_search_index()
+    click.echo('Rebuilt the search index ({} posts).'.format(count))
+
+# 10. 읽기 전용 커넥션 (db.py)
+
+# get_db()는 글을 읽기만 하는 요청에도 쓰기 커넥션을 빌려준다.
+# get_read_db()는 별도의 읽기 전용 풀(DB_READ_POOL_SIZE)에서 커넥션을 빌려준다.
+#  - URI의 mode=ro로 열기 때문에 파일 자체를 읽기 전용으로 연다.
+#  - PRAGMA query_only는 실수로 실행한 INSERT, UPDATE, DELETE를 오류로 만든다.
+# WAL 모드에서는 읽기 커넥션이 쓰기 트랜잭션의 잠금을 기다리지 않으므로, 글이 작성되는 중에도 읽기 요청이 막히지 않는다.
+# GET 요청을 처리하는 뷰는 get_read_db()를, 데이터를 바꾸는 뷰는 get_db()를 사용한다.
+# 같은 요청에서 get_db()로 커밋한 내용은 그 이후에 시작한 get_read_db()의 쿼리에서 보인다.
+def get_read_db():
+    if 'read_db' not in g:
+        g.read_db = get_pool(read_only=True).checkout()
+
+    return g.read_db
+
+# 11. 기존 데이터베이스 업그레이드 (db.py)
+
+# init-db는 테이블을 모두 지우고 다시 만들기 때문에 이미 사용 중인 데이터베이스에는 쓸 수 없다.
+# upgrade_db()는 기존 데이터를 그대로 두고 데이터베이스를 schema.sql에 맞춘다.
+#  - UPGRADE_COLUMNS의 열이 없으면 ALTER TABLE로 추가하고 기존 행의 값을 채운다.
+#  - schema.sql에 있는데 데이터베이스에 없는 테이블, 인덱스, 트리거를 만든다.
+#  - 내용이 바뀐 트리거는 지우고 다시 만든다.
+# 이미 최신인 데이터베이스에서는 아무것도 바꾸지 않으므로 배포할 때마다 실행해도 된다.
+
+# (테이블, 열, ALTER TABLE에 쓸 정의, 기존 행의 값을 채우는 UPDATE 문)
+UPGRADE_COLUMNS = (
+    ('post', 'author_name', "TEXT NOT NULL DEFAULT ''",
+     'UPDATE post SET author_name = (SELECT username FROM user WHERE id = post.author_id)'),
+    ('user', 'post_count', 'INTEGER NOT NULL DEFAULT 0',
+     'UPDATE user SET post_count = (SELECT COUNT(*) FROM post WHERE author_id = user.id)'),
+)
+
+SCHEMA_OBJECT = re.compile(
+    r'CREATE (?:VIRTUAL )?(TABLE|INDEX|TRIGGER) (IF NOT EXISTS )?(\w+)'
+)
+
+def upgrade_db():
+    db = get_db()
+    changes = []
+
+    for table, column, definition, backfill in UPGRADE_COLUMNS:
+        columns = [row[1] for row in db.execute('PRAGMA table_info({})'.format(table))]
+        if column not in columns:
+            db.execute('ALTER TABLE {} ADD COLUMN {} {}'.format(table, column, definition))
+            db.execute(backfill)
+            changes.append('added column {}.{}'.format(table, column))
+
+    existing = dict(
+        db.execute('SELECT name, sql FROM sqlite_master WHERE sql IS NOT NULL').fetchall()
+    )
+    created = set()
+    for statement in schema_statements():
+        match = SCHEMA_OBJECT.match(statement)
+        if match is None:
+            # feed_version의 첫 행처럼 새로 만든 테이블에 넣는 기본 데이터
+            if statement.startswith('INSERT INTO') and statement.split()[2] in created:
+                db.execute(statement)
+            continue
+
+        kind, name = match.group(1), match.group(3)
+        # SQLite는 sqlite_master에 IF NOT EXISTS와 마지막 ';'를 빼고 저장한다.
+        sql = statement.replace(match.group(2) or '', '', 1).rstrip(';')
+        if name not in existing:
+            db.execute(statement)
+            created.add(name)
+            changes.append('created {} {}'.format(kind.lower(), name))
+        elif kind == 'TRIGGER' and existing[name] != sql:
+            db.execute('DROP TRIGGER {}'.format(name))
+            db.execute(statement)
+            changes.append('replaced trigger {}'.format(name))
+
+    # 검색 인덱스를 새로 만들었다면 기존 글로 채운다.
+    if 'post_fts' in created:
+        db.execute("INSERT INTO post_fts (post_fts) VALUES ('rebuild')")
+    # 캐시된 페이지와 ETag가 예전 데이터를 가리키지 않도록 feed_version을 올린다.
+    if changes:
+        db.execute(
+            'UPDATE feed_version SET version = version + 1, updated = CURRENT_TIMESTAMP'
+        )
+    db.commit()
+
+    return changes
+
+@click.command('upgrade-db')
+@with_appcontext
+def upgrade_db_command():
+    changes = upgrade_db()
+    for change in changes:
+        click.echo(change)
+    click.echo('Upgraded the database ({} changes).'.format(len(changes)))
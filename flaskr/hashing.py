@@ -0,0 +1,140 @@
+# 비밀번호 해시 (hashing.py)
+# generate_password_hash()와 check_password_hash()는 일부러 느리게 만들어진 함수이다. (PBKDF2, scrypt)
+# 요청을 처리하는 스레드에서 바로 실행하면, 로그인이 몰릴 때 모든 워커가 해시 계산에 묶여서
+# 메인 페이지처럼 가벼운 요청까지 처리하지 못하게 된다.
+# 이번에는 해시 계산을 별도의 프로세스 풀에서 실행하고, 풀이 가득 차면 기다리지 않고 바로 503을 돌려준다.
+
+# 튜토리얼 진행순서
+# 1. 해시 프로세스 풀 (hashing.py)
+# 2. 해시 정책과 재해시 (hashing.py)
+# 3. 어플리케이션에 해시 설정 등록 (hashing.py) -> (__init__.py)
+
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+
+from flask import current_app
+from werkzeug.exceptions import ServiceUnavailable
+from werkzeug.security import (
+    DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash,
+)
+
+# 1. 해시 프로세스 풀 (hashing.py)
+
+# HashPool은 workers개의 프로세스에서 해시를 계산한다.
+# 동시에 workers + queue_depth개의 작업까지만 받고, 그 이상은 ServiceUnavailable(503)을 발생시킨다.
+# workers가 0이라면 프로세스 풀 없이 요청 스레드에서 바로 계산한다. (테스트 등)
+class HashPool(object):
+
+    def __init__(self, workers, queue_depth=0, timeout=None, retry_after=1):
+        self.workers = workers
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self.pid = os.getpid()
+        self._slots = threading.BoundedSemaphore(workers + queue_depth) if workers > 0 else None
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # spawn 방식으로 만든 프로세스는 부모 프로세스의 스레드나 커넥션을 물려받지 않는다.
+                    self._executor = ProcessPoolExecutor(
+                        self.workers, mp_context=multiprocessing.get_context('spawn')
+                    )
+                    atexit.register(self.shutdown)
+        return self._executor
+
+    def run(self, fn, *args):
+        if self._slots is None:
+            return fn(*args)
+
+        if not self._slots.acquire(blocking=False):
+            raise ServiceUnavailable(
+                'Too many password requests. Please try again later.',
+                retry_after=self.retry_after,
+            )
+
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+
+        # 작업이 끝나야 자리가 비워지므로, 시간 초과로 응답을 먼저 돌려주더라도 자리는 작업이 끝난 뒤에 반납된다.
+        future.add_done_callback(lambda f: self._slots.release())
+        try:
+            return future.result(self.timeout)
+        except TimeoutError:
+            raise ServiceUnavailable(
+                'Password hashing timed out. Please try again later.',
+                retry_after=self.retry_after,
+            )
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+_pool_lock = threading.Lock()
+
+def get_hash_pool():
+    app = current_app._get_current_object()
+    pool = app.extensions.get('flaskr.hash_pool')
+    if pool is None or pool.pid != os.getpid():
+        with _pool_lock:
+            pool = app.extensions.get('flaskr.hash_pool')
+            if pool is None or pool.pid != os.getpid():
+                pool = app.extensions['flaskr.hash_pool'] = HashPool(
+                    app.config['HASH_POOL_WORKERS'],
+                    queue_depth=app.config['HASH_POOL_QUEUE_DEPTH'],
+                    timeout=app.config['HASH_POOL_TIMEOUT'],
+                    retry_after=app.config['HASH_POOL_RETRY_AFTER'],
+                )
+    return pool
+
+# 2. 해시 정책과 재해시 (hashing.py)
+
+# PASSWORD_HASH_METHOD는 새로 만드는 해시의 방식이다. (예: 'pbkdf2:sha256:600000', 'scrypt')
+# 저장된 해시는 '방식$salt$해시값' 형태이므로, 앞부분이 현재 정책과 다르면 오래된 해시로 판단한다.
+# 예를 들어 'pbkdf2:sha256:50000'으로 저장된 해시는 로그인에 성공했을 때 현재 정책으로 다시 해시된다.
+def hash_password(password):
+    return get_hash_pool().run(
+        generate_password_hash, password, current_app.config['PASSWORD_HASH_METHOD']
+    )
+
+def verify_password(pwhash, password):
+    return get_hash_pool().run(check_password_hash, pwhash, password)
+
+def needs_rehash(pwhash):
+    return pwhash.split('$', 1)[0] != _method_prefix(current_app.config['PASSWORD_HASH_METHOD'])
+
+# 'scrypt'처럼 인자를 생략한 방식은 실제 해시에서 'scrypt:32768:8:1'로 기록되므로,
+# 설정된 방식 문자열에 Werkzeug의 기본값을 채워서 실제 접두어를 만든다.
+# 해시를 직접 만들어 보면 요청 스레드에서 해시 한 번만큼의 시간이 걸리므로 계산하지 않는다.
+def _method_prefix(method):
+    name, *args = method.split(':')
+    if name == 'scrypt':
+        n, r, p = map(int, args) if args else (2 ** 15, 8, 1)
+        return 'scrypt:{}:{}:{}'.format(n, r, p)
+    if name == 'pbkdf2':
+        hash_name = args[0] if args else 'sha256'
+        iterations = int(args[1]) if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return 'pbkdf2:{}:{}'.format(hash_name, iterations)
+    return method
+
+# 3. 어플리케이션에 해시 설정 등록 (hashing.py)
+
+# HASH_POOL_WORKERS: 해시를 계산할 프로세스 수 (0이면 요청 스레드에서 계산)
+# HASH_POOL_QUEUE_DEPTH: 모든 프로세스가 바쁠 때 대기할 수 있는 작업 수
+# HASH_POOL_TIMEOUT: 해시 계산을 기다리는 최대 시간 (초)
+# HASH_POOL_RETRY_AFTER: 503 응답의 Retry-After 값 (초)
+def init_app(app):
+    app.config.setdefault('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+    app.config.setdefault('HASH_POOL_WORKERS', os.cpu_count() or 1)
+    app.config.setdefault('HASH_POOL_QUEUE_DEPTH', 2 * app.config['HASH_POOL_WORKERS'])
+    app.config.setdefault('HASH_POOL_TIMEOUT', 10)
+    app.config.setdefault('HASH_POOL_RETRY_AFTER', 1)
@@ -0,0 +1,127 @@
+# 로그와 시작 시간 측정 (logs.py)
+# create_app()은 print()로 안내 문구를 출력하고, close_db()는 요청이 끝날 때마다 click.echo()로 네 줄을 출력한다.
+# 표준 출력에 쓰는 동안 요청을 처리하는 스레드는 기다려야 하고, 운영 환경에서는 불필요한 출력이 로그를 가린다.
+# 이번에는 레벨이 있는 로그(logging)를 사용하고, 실제로 쓰는 일은 별도의 스레드에서 처리하도록 한다.
+# 또한 create_app()의 각 단계(모듈 불러오기, 설정, 블루프린트 등록 등)가 얼마나 걸리는지 측정한다.
+
+# 튜토리얼 진행순서
+# 1. 큐를 이용한 로그 (logs.py)
+# 2. 시작 시간 측정 (logs.py)
+# 3. 어플리케이션에 로그 설정 등록 (logs.py) -> (__init__.py)
+
+import atexit
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from flask.logging import default_handler
+
+# 1. 큐를 이용한 로그 (logs.py)
+
+# app.logger에는 QueueHandler만 붙인다. QueueHandler는 로그를 큐에 넣기만 하므로 요청 스레드는 기다리지 않는다.
+# QueueListener는 별도의 스레드에서 큐의 로그를 꺼내서 표준 에러로 출력한다.
+# 리스너는 프로세스마다 하나만 실행되며, fork된 자식 프로세스에서는 새로 시작한다.
+# 같은 프로세스에서 여러 앱을 만들더라도 app.logger는 같은 'flaskr' 로거이므로 핸들러는 한 번만 붙인다.
+LOG_FORMAT = '[%(asctime)s] %(levelname)s in %(module)s: %(message)s'
+
+_log_queue = queue.SimpleQueue()
+_listener = None
+_listener_lock = threading.Lock()
+
+def start_listener():
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            return _listener
+
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        _listener = QueueListener(_log_queue, handler, respect_handler_level=True)
+        _listener.start()
+        return _listener
+
+def stop_listener():
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            # 큐에 남아있는 로그를 모두 출력한 뒤에 종료한다.
+            _listener.stop()
+            _listener = None
+
+def _reset_listener_in_child():
+    # fork된 프로세스에는 리스너 스레드가 없으므로, 새 리스너를 시작할 수 있도록 초기화한다.
+    global _listener, _listener_lock
+    _listener = None
+    _listener_lock = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_listener_in_child)
+
+atexit.register(stop_listener)
+
+def configure_logging(app):
+    logger = app.logger
+    logger.setLevel(app.config['LOG_LEVEL'])
+
+    # Flask의 기본 핸들러는 요청 스레드에서 바로 출력하므로 제거한다.
+    logger.removeHandler(default_handler)
+    if not any(isinstance(handler, QueueHandler) for handler in logger.handlers):
+        logger.addHandler(QueueHandler(_log_queue))
+
+    start_listener()
+
+# 2. 시작 시간 측정 (logs.py)
+
+# StartupProfiler는 mark(이름)가 호출될 때마다 이전 mark 이후 걸린 시간을 기록한다.
+# create_app()의 각 단계 끝에서 mark()를 호출하고, 마지막에 report()로 결과를 로그에 남긴다.
+# 결과는 app.extensions['flaskr.startup_profile']에 저장되어 flask startup-profile 명령어로 볼 수 있다.
+class StartupProfiler(object):
+
+    def __init__(self, timer=time.perf_counter):
+        self.steps = []
+        self._timer = timer
+        self._last = timer()
+
+    def record(self, name, duration):
+        self.steps.append((name, duration))
+
+    def mark(self, name):
+        now = self._timer()
+        self.steps.append((name, now - self._last))
+        self._last = now
+
+    @property
+    def total(self):
+        return sum(duration for name, duration in self.steps)
+
+    def report(self, logger):
+        logger.info(
+            'Started in %.1fms: %s', self.total * 1000,
+            ', '.join('{} {:.1f}ms'.format(name, duration * 1000) for name, duration in self.steps),
+        )
+
+@click.command('startup-profile')
+@with_appcontext
+def startup_profile_command():
+    profiler = current_app.extensions['flaskr.startup_profile']
+    for name, duration in sorted(profiler.steps, key=lambda step: step[1], reverse=True):
+        click.echo('{:>9.2f}ms  {}'.format(duration * 1000, name))
+    click.echo('{:>9.2f}ms  total'.format(profiler.total * 1000))
+
+# 3. 어플리케이션에 로그 설정 등록 (logs.py)
+
+# LOG_LEVEL: app.logger의 로그 레벨 (기본값: 디버그 모드에서는 DEBUG, 그 외에는 WARNING)
+# 운영 환경에서는 WARNING 이상만 출력되므로, 요청마다 남기는 DEBUG, INFO 로그는 출력되지 않는다.
+def init_app(app, profiler):
+    app.config.setdefault('LOG_LEVEL', 'DEBUG' if app.debug else 'WARNING')
+    configure_logging(app)
+
+    app.extensions['flaskr.startup_profile'] = profiler
+    app.cli.add_command(startup_profile_command)
@@ -0,0 +1,299 @@
+# 지표 수집 (metrics.py)
+# 지금은 어떤 엔드포인트가 느린지, 오류가 얼마나 나는지, 요청마다 쿼리를 몇 번 실행하는지 알 수 있는 방법이 없다.
+# 이번에는 요청마다 지표를 모으고, /metrics 주소에서 Prometheus 텍스트 형식으로 보여준다.
+#  - flaskr_request_duration_seconds: 엔드포인트별 응답 시간 히스토그램
+#  - flaskr_requests_total: 엔드포인트와 상태 코드별 요청 수
+#  - flaskr_sql_queries_total, flaskr_sql_query_seconds_total: 엔드포인트별 get_db(), get_read_db()의 쿼리 수와 시간
+#  - flaskr_requests_in_flight: 처리 중인 요청 수
+#  - 요청 수 제한(admission.py)과 쓰기 묶음 처리(writequeue.py)의 통계
+# 지표는 프로세스마다 따로 모이므로, 워커가 여러 개라면 Prometheus가 워커마다 수집하거나 더해서 보아야 한다.
+# 엔드포인트 이름과 요청 수는 외부에 공개할 정보가 아니므로, 기본값으로는 꺼져 있고
+# METRICS_TOKEN을 지정하면 'Authorization: Bearer <토큰>' 헤더를 보낸 요청만 /metrics를 읽을 수 있다.
+
+# 튜토리얼 진행순서
+# 1. 스레드별 지표 (metrics.py)
+# 2. 요청마다 지표 기록 (metrics.py)
+# 3. Prometheus 텍스트 형식 (metrics.py)
+# 4. 어플리케이션에 지표 설정 등록 (metrics.py) -> (__init__.py)
+
+import bisect
+import hmac
+import os
+import threading
+import time
+
+from flask import abort, current_app, g, request
+
+from flaskr.admission import REQUEST_KINDS
+
+# 1. 스레드별 지표 (metrics.py)
+
+# 모든 요청이 하나의 카운터와 잠금을 사용하면, 요청이 많을 때 지표 기록이 병목이 된다.
+# ThreadMetrics는 스레드마다 하나씩 만들어지며, 그 스레드만 값을 더한다.
+# 잠금은 /metrics를 읽을 때 값을 합치는 동안에만 경쟁이 생기므로, 요청을 처리하는 동안에는 거의 기다리지 않는다.
+# 히스토그램의 각 칸은 누적하지 않은 개수로 저장하고, 출력할 때 누적한다.
+class ThreadMetrics(object):
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.durations = {}
+        self.duration_sums = {}
+        self.statuses = {}
+        self.queries = {}
+        self.in_flight = 0
+        self.lock = threading.Lock()
+
+    def start(self):
+        with self.lock:
+            self.in_flight += 1
+
+    def finish(self, endpoint, status, duration, query_count, query_time):
+        index = bisect.bisect_left(self.buckets, duration)
+        with self.lock:
+            self.in_flight -= 1
+
+            counts = self.durations.get(endpoint)
+            if counts is None:
+                counts = self.durations[endpoint] = [0] * (len(self.buckets) + 1)
+                self.duration_sums[endpoint] = 0.0
+            counts[index] += 1
+            self.duration_sums[endpoint] += duration
+
+            key = (endpoint, status)
+            self.statuses[key] = self.statuses.get(key, 0) + 1
+
+            queries = self.queries.get(endpoint)
+            if queries is None:
+                queries = self.queries[endpoint] = [0, 0.0]
+            queries[0] += query_count
+            queries[1] += query_time
+
+    def merge_into(self, total):
+        with self.lock:
+            for endpoint, counts in self.durations.items():
+                target = total.durations.setdefault(endpoint, [0] * len(counts))
+                for i, count in enumerate(counts):
+                    target[i] += count
+                total.duration_sums[endpoint] = (
+                    total.duration_sums.get(endpoint, 0.0) + self.duration_sums[endpoint]
+                )
+            for key, count in self.statuses.items():
+                total.statuses[key] = total.statuses.get(key, 0) + count
+            for endpoint, (count, seconds) in self.queries.items():
+                target = total.queries.setdefault(endpoint, [0, 0.0])
+                target[0] += count
+                target[1] += seconds
+            total.in_flight += self.in_flight
+
+# MetricsRegistry는 스레드별 지표를 모아두고, collect()로 합친 결과를 돌려준다.
+# 개발 서버처럼 요청마다 스레드를 새로 만드는 경우를 위해, 종료된 스레드의 지표는 retired에 합치고 목록에서 지운다.
+class MetricsRegistry(object):
+
+    def __init__(self, buckets):
+        self.pid = os.getpid()
+        self.buckets = tuple(buckets)
+        self._local = threading.local()
+        self._threads = []
+        self._retired = ThreadMetrics(self.buckets)
+        self._lock = threading.Lock()
+
+    def local(self):
+        metrics = getattr(self._local, 'metrics', None)
+        if metrics is None:
+            metrics = self._local.metrics = ThreadMetrics(self.buckets)
+            with self._lock:
+                self._threads.append((threading.current_thread(), metrics))
+        return metrics
+
+    def collect(self):
+        total = ThreadMetrics(self.buckets)
+        with self._lock:
+            alive = []
+            for thread, metrics in self._threads:
+                if thread.is_alive():
+                    alive.append((thread, metrics))
+                    metrics.merge_into(total)
+                else:
+                    metrics.merge_into(self._retired)
+            self._threads = alive
+            self._retired.merge_into(total)
+        return total
+
+# 지표는 앱마다 하나씩 app.extensions에 저장하고, fork된 자식 프로세스에서는 새로 만든다.
+_registry_lock = threading.Lock()
+
+def get_registry():
+    app = current_app._get_current_object()
+    registry = app.extensions.get('flaskr.metrics')
+    if registry is None or registry.pid != os.getpid():
+        with _registry_lock:
+            registry = app.extensions.get('flaskr.metrics')
+            if registry is None or registry.pid != os.getpid():
+                registry = app.extensions['flaskr.metrics'] = MetricsRegistry(
+                    app.config['METRICS_BUCKETS']
+                )
+    return registry
+
+# 2. 요청마다 지표 기록 (metrics.py)
+
+# before_request에서 시작 시각을 기록하고, after_request에서 상태 코드를, teardown_request에서 나머지를 기록한다.
+# 스트리밍 응답은 전송이 끝날 때 teardown_request가 실행되므로, 응답 시간에 전송 시간까지 포함된다.
+# 쿼리 수와 시간은 get_db()와 get_read_db()의 커넥션이 요청마다 더해둔 값이다. (db.py의 CountingConnection 참고)
+# 응답을 만들지 못하고 예외가 발생한 요청은 500으로 기록한다.
+def start_request():
+    if not current_app.config['METRICS_ENABLED']:
+        return
+
+    metrics = get_registry().local()
+    metrics.start()
+    g.metrics = (metrics, time.perf_counter())
+
+def record_status(response):
+    if 'metrics' in g:
+        g.metrics_status = response.status_code
+    return response
+
+def finish_request(exception=None):
+    started = g.pop('metrics', None)
+    if started is None:
+        return
+
+    metrics, start = started
+    query_count, query_time = request_queries()
+    metrics.finish(
+        request.endpoint or 'unknown',
+        g.pop('metrics_status', 500),
+        time.perf_counter() - start,
+        query_count,
+        query_time,
+    )
+
+def request_queries():
+    totals = g.get('sql_totals')
+    if totals is not None:
+        return totals.count, totals.duration
+
+    # SQL_INSTRUMENTATION이 켜져 있다면 쿼리마다 기록된 g.sql_queries를 사용한다.
+    queries = g.get('sql_queries') or ()
+    return len(queries), sum(q.duration for q in queries)
+
+# 3. Prometheus 텍스트 형식 (metrics.py)
+
+# 각 지표는 '# HELP', '# TYPE' 줄 다음에 '이름{라벨="값"} 값' 형태의 줄로 출력된다.
+# 히스토그램은 칸마다 그 값 이하인 요청 수(_bucket{le="..."})를 누적해서 출력하고, 합계(_sum)와 개수(_count)를 더한다.
+def render_metrics():
+    total = get_registry().collect()
+    lines = []
+
+    def metric(name, type, help):
+        lines.append('# HELP {} {}'.format(name, help))
+        lines.append('# TYPE {} {}'.format(name, type))
+
+    def sample(name, labels, value):
+        if labels:
+            name += '{' + ','.join(
+                '{}="{}"'.format(key, escape_label(label)) for key, label in labels
+            ) + '}'
+        lines.append('{} {}'.format(name, format_value(value)))
+
+    name = 'flaskr_request_duration_seconds'
+    metric(name, 'histogram', 'Request latency by endpoint.')
+    bounds = [format_value(bound) for bound in total.buckets] + ['+Inf']
+    for endpoint in sorted(total.durations):
+        cumulative = 0
+        for bound, count in zip(bounds, total.durations[endpoint]):
+            cumulative += count
+            sample(name + '_bucket', (('endpoint', endpoint), ('le', bound)), cumulative)
+        sample(name + '_sum', (('endpoint', endpoint),), total.duration_sums[endpoint])
+        sample(name + '_count', (('endpoint', endpoint),), cumulative)
+
+    metric('flaskr_requests_total', 'counter', 'Requests by endpoint and status code.')
+    for (endpoint, status), count in sorted(total.statuses.items()):
+        sample('flaskr_requests_total', (('endpoint', endpoint), ('status', status)), count)
+
+    metric('flaskr_sql_queries_total', 'counter', 'SQL queries executed through get_db().')
+    for endpoint, (count, seconds) in sorted(total.queries.items()):
+        sample('flaskr_sql_queries_total', (('endpoint', endpoint),), count)
+
+    metric('flaskr_sql_query_seconds_total', 'counter', 'Time spent in SQL queries.')
+    for endpoint, (count, seconds) in sorted(total.queries.items()):
+        sample('flaskr_sql_query_seconds_total', (('endpoint', endpoint),), seconds)
+
+    metric('flaskr_requests_in_flight', 'gauge', 'Requests currently being processed.')
+    sample('flaskr_requests_in_flight', (), total.in_flight)
+
+    render_admission(metric, sample)
+    render_write_batches(metric, sample)
+
+    lines.append('')
+    return '\n'.join(lines)
+
+def render_admission(metric, sample):
+    limiters = current_app.extensions.get('flaskr.admission')
+    if limiters is None or limiters['pid'] != os.getpid():
+        return
+
+    snapshots = [(kind, limiters[kind].snapshot()) for kind in REQUEST_KINDS]
+    for key, type, help in (
+        ('active', 'gauge', 'Requests holding an admission slot.'),
+        ('waiting', 'gauge', 'Requests waiting for an admission slot.'),
+        ('rejected', 'counter', 'Requests rejected with 503 by admission control.'),
+    ):
+        name = 'flaskr_admission_{}'.format(key if type == 'gauge' else key + '_total')
+        metric(name, type, help)
+        for kind, snapshot in snapshots:
+            sample(name, (('kind', kind),), snapshot[key])
+
+def render_write_batches(metric, sample):
+    batcher = current_app.extensions.get('flaskr.write_batcher')
+    if batcher is None or batcher.pid != os.getpid():
+        return
+
+    stats = batcher.stats.snapshot()
+    for key, help in (
+        ('batches', 'Write batches committed.'),
+        ('operations', 'Write operations submitted to the batcher.'),
+        ('errors', 'Write operations that failed.'),
+    ):
+        metric('flaskr_write_{}_total'.format(key), 'counter', help)
+        sample('flaskr_write_{}_total'.format(key), (), stats[key])
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def format_value(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+def metrics_view():
+    token = current_app.config['METRICS_TOKEN']
+    if token is not None:
+        authorization = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(authorization.encode(), 'Bearer {}'.format(token).encode()):
+            abort(403)
+
+    return current_app.response_class(
+        render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+# 4. 어플리케이션에 지표 설정 등록 (metrics.py)
+
+# METRICS_ENABLED: 지표를 모으고 /metrics를 제공할지 여부
+# METRICS_TOKEN: /metrics를 읽을 때 Authorization 헤더로 보내야 하는 토큰 (None이면 확인하지 않으므로, 내부망에서만 접근할 수 있어야 한다)
+# METRICS_BUCKETS: 응답 시간 히스토그램의 칸 경계 (초)
+# 다른 before_request 함수(압축된 정적 파일, 요청 수 제한 등)에서 응답한 요청까지 측정하도록 가장 먼저 등록한다.
+# /metrics는 요청 수 제한과 사용자 정보 불러오기를 거치지 않는다. (ADMISSION_EXEMPT_ENDPOINTS, ANONYMOUS_ENDPOINTS)
+def init_app(app):
+    app.config.setdefault('METRICS_ENABLED', False)
+    app.config.setdefault('METRICS_TOKEN', None)
+    app.config.setdefault('METRICS_BUCKETS', (
+        0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+    ))
+
+    app.before_request(start_request)
+    app.after_request(record_status)
+    app.teardown_request(finish_request)
+
+    if app.config['METRICS_ENABLED']:
+        app.add_url_rule('/metrics', 'metrics', metrics_view)
@@ -0,0 +1,175 @@
+# 요청 프로파일링 (profiling.py)
+# 운영 환경에서 어떤 함수가 느린지 알려면, 지금은 코드를 고쳐서 다시 배포해야 한다.
+# 이번에는 설정이나 서명된 헤더로 원하는 요청만 cProfile로 측정하고,
+# 결과(.pstats)를 인스턴스 폴더에 저장해서 flask profiles 명령어로 엔드포인트별로 모아볼 수 있도록 한다.
+#  - PROFILE_SAMPLE_RATE: 전체 요청 중 이 비율만큼 무작위로 측정한다. (예: 0.01이면 100개 중 1개)
+#  - 서명된 헤더: flask profiles token으로 만든 값을 PROFILE_HEADER 헤더에 담아 보내면 그 요청을 측정한다.
+
+# 튜토리얼 진행순서
+# 1. 서명된 헤더 (profiling.py)
+# 2. 요청 측정과 저장 (profiling.py)
+# 3. 프로파일 모아보기 명령어 (profiling.py)
+# 4. 어플리케이션에 프로파일링 설정 등록 (profiling.py) -> (__init__.py)
+
+import cProfile
+import io
+import itertools
+import os
+import pstats
+import random
+import time
+
+import click
+from flask import current_app, g, request
+from flask.cli import with_appcontext
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+# 1. 서명된 헤더 (profiling.py)
+
+# 헤더 값은 SECRET_KEY로 서명되어 있으므로, 키를 모르는 사용자는 프로파일링을 켤 수 없다.
+# 서명에는 만든 시각이 들어있어서 PROFILE_TOKEN_MAX_AGE초가 지나면 더 이상 사용할 수 없다.
+def get_serializer():
+    return URLSafeTimedSerializer(current_app.secret_key, salt='flaskr-profile')
+
+def make_token():
+    return get_serializer().dumps('profile')
+
+def verify_token(token):
+    try:
+        get_serializer().loads(token, max_age=current_app.config['PROFILE_TOKEN_MAX_AGE'])
+    except BadSignature:
+        return False
+    return True
+
+# 2. 요청 측정과 저장 (profiling.py)
+
+# before_request에서 프로파일러를 켜고, teardown_request에서 끈 뒤 결과를 저장한다.
+# cProfile은 프로파일러를 켠 스레드만 측정하므로, 같은 프로세스의 다른 요청은 영향을 받지 않는다.
+# 스트리밍 응답은 전송이 끝날 때 teardown_request가 실행되므로, 랜더링까지 모두 측정된다.
+# 이미 다른 프로파일러가 실행 중이라면 (디버거, 커버리지 도구 등) 측정하지 않는다.
+def should_profile():
+    if request.endpoint is None:
+        return False
+
+    token = request.headers.get(current_app.config['PROFILE_HEADER'])
+    if token is not None and verify_token(token):
+        return True
+
+    rate = current_app.config['PROFILE_SAMPLE_RATE']
+    return rate > 0 and random.random() < rate
+
+def start_profile():
+    if not should_profile():
+        return
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        return
+    g.profiler = profiler
+
+def stop_profile(exception=None):
+    profiler = g.pop('profiler', None)
+    if profiler is None:
+        return
+
+    profiler.disable()
+    path = save_profile(profiler, current_app.config['PROFILE_DIR'], request.endpoint)
+    current_app.logger.info('Saved profile for %s to %s', request.endpoint, path)
+
+# 결과는 'PROFILE_DIR/엔드포인트/시각-pid-번호.pstats'에 저장된다.
+# 임시 파일에 쓴 뒤 이름을 바꾸기 때문에, 명령어가 쓰는 중인 파일을 읽는 일은 없다.
+_counter = itertools.count()
+
+def save_profile(profiler, directory, endpoint):
+    directory = os.path.join(directory, endpoint)
+    os.makedirs(directory, exist_ok=True)
+
+    path = os.path.join(directory, '{}-{}-{}.pstats'.format(
+        int(time.time() * 1000), os.getpid(), next(_counter)
+    ))
+    profiler.dump_stats(path + '.tmp')
+    os.replace(path + '.tmp', path)
+    return path
+
+def profile_paths(directory, endpoint):
+    directory = os.path.join(directory, endpoint)
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory) if name.endswith('.pstats')
+    )
+
+# 3. 프로파일 모아보기 명령어 (profiling.py)
+
+# flask profiles list: 엔드포인트마다 저장된 프로파일 수와 마지막으로 저장된 시각을 출력한다.
+# flask profiles top 엔드포인트 [--sort cumulative] [--limit 20] [--last N]:
+#   그 엔드포인트의 프로파일을 모두(또는 최근 N개) 합쳐서 시간이 많이 걸린 함수를 출력한다.
+# flask profiles token: 요청에 붙일 서명된 헤더를 출력한다.
+@click.group('profiles')
+def profiles_command():
+    pass
+
+@profiles_command.command('list')
+@with_appcontext
+def list_command():
+    directory = current_app.config['PROFILE_DIR']
+    endpoints = sorted(os.listdir(directory)) if os.path.isdir(directory) else []
+
+    rows = []
+    for endpoint in endpoints:
+        paths = profile_paths(directory, endpoint)
+        if paths:
+            latest = max(os.path.getmtime(path) for path in paths)
+            rows.append((endpoint, len(paths), latest))
+
+    if not rows:
+        click.echo('No profiles in {}.'.format(directory))
+        return
+
+    for endpoint, count, latest in rows:
+        click.echo('{:<30} {:>6} profiles  latest {}'.format(
+            endpoint, count, time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(latest))
+        ))
+
+@profiles_command.command('top')
+@click.argument('endpoint')
+@click.option('--sort', default='cumulative', show_default=True,
+              type=click.Choice(['cumulative', 'tottime', 'calls']))
+@click.option('--limit', default=20, show_default=True, help='Number of functions to print.')
+@click.option('--last', type=int, help='Only aggregate the N most recent profiles.')
+@with_appcontext
+def top_command(endpoint, sort, limit, last):
+    paths = profile_paths(current_app.config['PROFILE_DIR'], endpoint)
+    if last:
+        paths = paths[-last:]
+    if not paths:
+        raise click.ClickException('No profiles for {}.'.format(endpoint))
+
+    out = io.StringIO()
+    stats = pstats.Stats(*paths, stream=out)
+    click.echo('{} profiles for {}'.format(len(paths), endpoint))
+    stats.strip_dirs().sort_stats(sort).print_stats(limit)
+    click.echo(out.getvalue())
+
+@profiles_command.command('token')
+@with_appcontext
+def token_command():
+    click.echo('{}: {}'.format(current_app.config['PROFILE_HEADER'], make_token()))
+
+# 4. 어플리케이션에 프로파일링 설정 등록 (profiling.py)
+
+# PROFILE_SAMPLE_RATE: 무작위로 측정할 요청의 비율 (0이면 서명된 헤더가 있는 요청만 측정)
+# PROFILE_HEADER: 서명된 값을 담을 헤더 이름
+# PROFILE_TOKEN_MAX_AGE: 서명된 값의 유효 시간 (초)
+# PROFILE_DIR: 프로파일을 저장할 폴더 (기본값: 인스턴스 폴더의 profiles)
+def init_app(app):
+    app.config.setdefault('PROFILE_SAMPLE_RATE', 0.0)
+    app.config.setdefault('PROFILE_HEADER', 'X-Flaskr-Profile')
+    app.config.setdefault('PROFILE_TOKEN_MAX_AGE', 60 * 60)
+    app.config.setdefault('PROFILE_DIR', os.path.join(app.instance_path, 'profiles'))
+
+    app.before_request(start_profile)
+    app.teardown_request(stop_profile)
+    app.cli.add_command(profiles_command)
@@ -1,9 +1,12 @@
 DROP TABLE IF EXISTS user;
 DROP TABLE IF EXISTS post;
+DROP TABLE IF EXISTS feed_version;
+DROP TABLE IF EXISTS post_fts;
 CREATE TABLE user (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     username TEXT UNIQUE NOT NULL,
-    password TEXT NOT NULL 
+    password TEXT NOT NULL,
+    post_count INTEGER NOT NULL DEFAULT 0
 );
 CREATE TABLE post (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -11,5 +14,69 @@ CREATE TABLE post (
     created TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     title TEXT NOT NULL,
     body TEXT NOT NULL,
+    author_name TEXT NOT NULL DEFAULT '',
     FOREIGN KEY (author_id) REFERENCES user (id) 
-);
\ No newline at end of file
+);
+-- 메인 페이지의 커서 페이지네이션은 (created, id) 순서로 글을 읽는다.
+CREATE INDEX post_created_id ON post (created DESC, id DESC);
+-- 작성자별 글 목록(/user/<username>)은 한 작성자의 글을 (created, id) 순서로 읽는다.
+-- 사용자 이름이 바뀔 때 그 사용자의 글을 찾는 트리거(user_username_update)도 이 인덱스를 사용한다.
+CREATE INDEX post_author_created_id ON post (author_id, created DESC, id DESC);
+
+-- user.post_count는 사용자가 작성한 글의 수이다.
+-- 요청마다 COUNT(*)로 세지 않도록, 글이 작성/삭제될 때 트리거로 1씩 더하고 뺀다.
+CREATE TRIGGER post_count_insert AFTER INSERT ON post BEGIN
+    UPDATE user SET post_count = post_count + 1 WHERE id = new.author_id;
+END;
+CREATE TRIGGER post_count_delete AFTER DELETE ON post BEGIN
+    UPDATE user SET post_count = post_count - 1 WHERE id = old.author_id;
+END;
+
+-- 메인 페이지와 글 하나를 읽을 때 user 테이블과 JOIN하지 않도록 작성자 이름을 post에도 저장한다. (author_name)
+-- 글이 작성되면 user에서 이름을 복사하고, 사용자 이름이 바뀌면 그 사용자의 모든 글에 새 이름을 반영한다.
+-- 앱은 INSERT 문에서 author_name을 직접 넣으므로(blog.insert_post), 트리거는 이름 없이 들어온 글에만 동작한다.
+-- (트리거가 post를 다시 UPDATE하면 post_update_version 트리거 때문에 feed_version이 한 번 더 올라간다.)
+CREATE TRIGGER post_author_name AFTER INSERT ON post WHEN new.author_name = '' BEGIN
+    UPDATE post SET author_name = (SELECT username FROM user WHERE id = new.author_id)
+    WHERE id = new.id;
+END;
+-- 사용자 이름은 로그인한 사용자의 화면에도 나타나므로, 글이 없는 사용자라도 feed_version을 올린다.
+CREATE TRIGGER user_username_update AFTER UPDATE OF username ON user BEGIN
+    UPDATE post SET author_name = new.username WHERE author_id = new.id;
+    UPDATE feed_version SET version = version + 1, updated = CURRENT_TIMESTAMP;
+END;
+
+-- 글이 작성/수정/삭제될 때마다 version이 1씩 증가한다.
+-- 조건부 GET(ETag, Last-Modified)은 이 한 줄만 읽어서 페이지가 바뀌었는지 확인한다.
+CREATE TABLE feed_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL,
+    updated TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+INSERT INTO feed_version (id, version) VALUES (1, 0);
+CREATE TRIGGER post_insert_version AFTER INSERT ON post BEGIN
+    UPDATE feed_version SET version = version + 1, updated = CURRENT_TIMESTAMP;
+END;
+CREATE TRIGGER post_update_version AFTER UPDATE ON post BEGIN
+    UPDATE feed_version SET version = version + 1, updated = CURRENT_TIMESTAMP;
+END;
+CREATE TRIGGER post_delete_version AFTER DELETE ON post BEGIN
+    UPDATE feed_version SET version = version + 1, updated = CURRENT_TIMESTAMP;
+END;
+
+-- 글 검색을 위한 FTS5 전문 검색 인덱스이다.
+-- 글 내용은 post 테이블에만 저장하고(content='post'), 인덱스는 아래 트리거로 post와 함께 갱신된다.
+-- 기존 데이터베이스에서는 'flask rebuild-search-index'로 인덱스를 만들 수 있도록 IF NOT EXISTS를 사용한다.
+CREATE VIRTUAL TABLE IF NOT EXISTS post_fts USING fts5(
+    title, body, content='post', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS post_fts_insert AFTER INSERT ON post BEGIN
+    INSERT INTO post_fts (rowid, title, body) VALUES (new.id, new.title, new.body);
+END;
+CREATE TRIGGER IF NOT EXISTS post_fts_delete AFTER DELETE ON post BEGIN
+    INSERT INTO post_fts (post_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+END;
+CREATE TRIGGER IF NOT EXISTS post_fts_update AFTER UPDATE OF title, body ON post BEGIN
+    INSERT INTO post_fts (post_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+    INSERT INTO post_fts (rowid, title, body) VALUES (new.id, new.title, new.body);
+END;
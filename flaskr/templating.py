@@ -0,0 +1,104 @@
+# 템플릿 컴파일 캐시 (templating.py)
+# Jinja는 템플릿을 처음 사용할 때 파이썬 코드로 컴파일하고, 그 결과를 프로세스 메모리에만 보관한다.
+# 따라서 배포나 오토스케일로 새 워커가 뜰 때마다 base.html, blog/*.html, auth/*.html을 다시 컴파일하고,
+# 그동안 들어온 첫 요청들은 느려진다.
+# 이번에는 컴파일 결과(바이트코드)를 인스턴스 폴더에 저장해서 워커끼리 공유하고,
+# 배포 시점에 미리 컴파일하는 명령어와 요청을 받기 전에 템플릿을 한 번씩 랜더링하는 워밍업을 만든다.
+
+# 튜토리얼 진행순서
+# 1. 바이트코드 캐시 (templating.py)
+# 2. 템플릿 미리 컴파일하기 (templating.py)
+# 3. 워밍업 (templating.py) -> (__init__.py)
+
+import os
+import time
+
+import click
+from flask import current_app, g, render_template
+from flask.cli import with_appcontext
+from jinja2 import FileSystemBytecodeCache
+
+# 1. 바이트코드 캐시 (templating.py)
+
+# FileSystemBytecodeCache는 컴파일된 템플릿을 TEMPLATE_CACHE_DIR에 파일로 저장한다.
+# 템플릿 파일이 바뀌면 Jinja가 자동으로 다시 컴파일하므로, 캐시를 직접 지울 필요는 없다.
+# app.jinja_env는 처음 사용할 때 만들어지므로, 그 전에 jinja_options에 캐시를 지정해야 한다.
+# TEMPLATE_BYTECODE_CACHE: 바이트코드 캐시를 사용할지 여부
+# TEMPLATE_CACHE_DIR: 바이트코드를 저장할 폴더 (기본값: 인스턴스 폴더의 jinja_cache)
+# TEMPLATE_WARMUP: create_app()이 끝나기 전에 모든 템플릿을 한 번씩 랜더링할지 여부
+
+# 캐시 폴더는 create_app()에서 미리 만들지 않고, 처음 바이트코드를 저장할 때 만든다.
+# 템플릿을 랜더링하지 않는 앱(CLI 명령어, 테스트 등)은 인스턴스 폴더에 빈 캐시 폴더를 남기지 않는다.
+class LazyFileSystemBytecodeCache(FileSystemBytecodeCache):
+    def dump_bytecode(self, bucket):
+        os.makedirs(self.directory, exist_ok=True)
+        super().dump_bytecode(bucket)
+
+def init_app(app):
+    app.config.setdefault('TEMPLATE_BYTECODE_CACHE', True)
+    app.config.setdefault('TEMPLATE_CACHE_DIR', os.path.join(app.instance_path, 'jinja_cache'))
+    app.config.setdefault('TEMPLATE_WARMUP', False)
+
+    if app.config['TEMPLATE_BYTECODE_CACHE']:
+        directory = app.config['TEMPLATE_CACHE_DIR']
+        app.jinja_options = dict(
+            app.jinja_options, bytecode_cache=LazyFileSystemBytecodeCache(directory)
+        )
+
+    app.cli.add_command(compile_templates_command)
+
+# 2. 템플릿 미리 컴파일하기 (templating.py)
+
+# flask compile-templates 명령어는 모든 템플릿을 불러와서 바이트코드 캐시에 저장한다.
+# 배포 과정에서 한 번 실행해두면, 새 워커는 템플릿을 컴파일하지 않고 캐시에서 바로 불러온다.
+def compile_templates(app):
+    names = app.jinja_env.list_templates()
+    for name in names:
+        app.jinja_env.get_template(name)
+    return names
+
+@click.command('compile-templates')
+@with_appcontext
+def compile_templates_command():
+    if not current_app.config['TEMPLATE_BYTECODE_CACHE']:
+        raise click.ClickException('TEMPLATE_BYTECODE_CACHE is disabled.')
+
+    start = time.perf_counter()
+    names = compile_templates(current_app)
+    click.echo('Compiled {} templates into {} in {:.2f}s.'.format(
+        len(names), current_app.config['TEMPLATE_CACHE_DIR'], time.perf_counter() - start
+    ))
+
+# 3. 워밍업 (templating.py)
+
+# warmup()은 가짜 요청 컨텍스트 안에서 모든 템플릿을 한 번씩 랜더링한다.
+# 컴파일뿐만 아니라 url_for()의 URL 규칙, 정적 파일 지문 목록(assets.py) 등 처음 랜더링할 때 만들어지는 것들도 준비된다.
+# 템플릿마다 필요한 변수는 warmup_contexts()에 빈 값으로 정의해두고, 랜더링에 실패한 템플릿은 경고만 남긴다.
+def warmup_contexts():
+    from flaskr.blog import Page
+
+    return {
+        'blog/index.html': {'posts': [], 'page': Page([])},
+        'blog/search.html': {'q': '', 'results': [], 'page': 1, 'has_next': False},
+        'blog/update.html': {'post': {'id': 0, 'title': '', 'body': ''}},
+        'blog/user.html': {
+            'author': {'id': 0, 'username': '', 'post_count': 0}, 'posts': [], 'page': Page([])
+        },
+    }
+
+def warmup(app):
+    start = time.perf_counter()
+    contexts = warmup_contexts()
+    names = app.jinja_env.list_templates()
+
+    with app.test_request_context():
+        g.user = None
+        for name in names:
+            try:
+                render_template(name, **contexts.get(name, {}))
+            except Exception:
+                app.logger.warning('Template warm-up failed for %s', name, exc_info=True)
+
+    app.logger.info(
+        'Warmed up %d templates in %.3fs', len(names), time.perf_counter() - start
+    )
@@ -0,0 +1,175 @@
+# 데이터 내보내기/가져오기 (transfer.py)
+# init-db는 데이터베이스를 초기화하기만 할 뿐, 다른 환경으로 데이터를 옮기는 방법은 없다.
+# 이번에는 사용자와 글을 JSON Lines(한 줄에 JSON 객체 하나) 형식으로 내보내고 가져오는 명령어를 만든다.
+# 두 명령어 모두 한 줄씩 읽고 쓰기 때문에, 데이터가 아무리 많아도 메모리 사용량은 일정하다.
+
+# 튜토리얼 진행순서
+# 1. 내보내기 (transfer.py)
+# 2. 가져오기 (transfer.py)
+# 3. 가상 환경에서 사용될 함수 이름 정의 (transfer.py) -> (__init__.py)
+
+import json
+import time
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from flaskr.db import get_db, schema_statements
+
+# 1. 내보내기 (transfer.py)
+
+# 사용자를 먼저 내보내고 글을 내보낸다. 가져올 때 글의 author_id가 가리키는 사용자가 먼저 만들어지도록 하기 위함이다.
+# 각 줄은 {"type": "user", ...} 또는 {"type": "post", ...} 형태이다.
+# sqlite3 커서는 순회할 때 한 줄씩 가져오므로 fetchall()처럼 모든 행을 메모리에 올리지 않는다.
+EXPORT_QUERIES = (
+    ('user', 'SELECT id, username, password FROM user ORDER BY id'),
+    ('post', 'SELECT id, author_id, created, title, body FROM post ORDER BY id'),
+)
+
+def export_rows(out):
+    db = get_db()
+    count = 0
+    for type, query in EXPORT_QUERIES:
+        for row in db.execute(query):
+            record = {'type': type}
+            for key in row.keys():
+                value = row[key]
+                record[key] = value if not hasattr(value, 'isoformat') else str(value)
+            out.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+            out.write('\n')
+            count += 1
+    return count
+
+# 2. 가져오기 (transfer.py)
+
+# 한 줄씩 INSERT하고 커밋하면 행마다 트랜잭션과 fsync가 발생해서 매우 느리다.
+# 대신 batch_size개씩 모아서 executemany()로 한 트랜잭션에 넣는다.
+# 또한 인덱스와 트리거가 있으면 행마다 인덱스와 검색 인덱스를 갱신해야 하므로,
+# defer_indexes가 True라면 가져오기 전에 지우고, 모두 가져온 뒤에 schema.sql로 다시 만든다.
+# 글은 작성자가 먼저 저장되어 있어야 하므로(트리거가 작성자 이름과 글 수를 채운다), 배치 하나가 가득 차면
+# 모아둔 사용자부터 글 순서로(IMPORT_QUERIES의 순서) 모든 배치를 한 트랜잭션에 넣는다.
+IMPORT_QUERIES = {
+    'user': (
+        'INSERT INTO user (id, username, password) VALUES (?, ?, ?)',
+        ('id', 'username', 'password'),
+    ),
+    'post': (
+        'INSERT INTO post (id, author_id, created, title, body) VALUES (?, ?, ?, ?, ?)',
+        ('id', 'author_id', 'created', 'title', 'body'),
+    ),
+}
+
+def drop_deferred_objects(db):
+    # 자동으로 만들어지는 인덱스(UNIQUE, PRIMARY KEY)는 sql이 NULL이므로 제외된다.
+    objects = db.execute(
+        "SELECT type, name FROM sqlite_master WHERE type IN ('index', 'trigger') AND sql IS NOT NULL"
+    ).fetchall()
+    for type, name in objects:
+        db.execute('DROP {} IF EXISTS "{}"'.format(type.upper(), name))
+    db.commit()
+
+def create_deferred_objects(db):
+    # 트리거 없이 가져온 글에는 작성자 이름(author_name)이 없고 사용자의 글 수(post_count)도 세어지지 않았으므로,
+    # 트리거를 다시 만들기 전에 한 번에 채운다.
+    db.execute(
+        'UPDATE post SET author_name = (SELECT username FROM user WHERE id = post.author_id)'
+    )
+    db.execute(
+        'UPDATE user SET post_count = (SELECT COUNT(*) FROM post WHERE author_id = user.id)'
+    )
+
+    for statement in schema_statements():
+        if statement.startswith(('CREATE INDEX', 'CREATE TRIGGER')):
+            db.execute(statement)
+
+    # 트리거 없이 가져온 글을 검색 인덱스와 feed_version에 반영한다.
+    db.execute("INSERT INTO post_fts (post_fts) VALUES ('rebuild')")
+    db.execute('UPDATE feed_version SET version = version + 1, updated = CURRENT_TIMESTAMP')
+    db.commit()
+
+# 가져오는 도중 오류가 발생하면 커밋하지 않은 배치는 되돌리고, 이미 커밋된 배치만 남긴 채로 인덱스와 트리거를 다시 만든다.
+# 그 다음 원래 오류를 그대로 발생시킨다. (인덱스를 다시 만들다 실패한 경우는 로그만 남긴다)
+def import_rows(lines, batch_size=10000, defer_indexes=True, progress=None):
+    db = get_db()
+    batches = {type: [] for type in IMPORT_QUERIES}
+    total = 0
+    start = time.perf_counter()
+
+    def flush():
+        nonlocal total
+        for type, (sql, columns) in IMPORT_QUERIES.items():
+            if batches[type]:
+                db.executemany(sql, batches[type])
+        db.commit()
+        for batch in batches.values():
+            total += len(batch)
+            batch.clear()
+        if progress is not None:
+            progress(total, time.perf_counter() - start)
+
+    if defer_indexes:
+        drop_deferred_objects(db)
+
+    try:
+        for line in lines:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            type = record['type']
+            batch = batches[type]
+            batch.append(tuple(record[column] for column in IMPORT_QUERIES[type][1]))
+            if len(batch) >= batch_size:
+                flush()
+
+        if any(batches.values()):
+            flush()
+    except BaseException:
+        db.rollback()
+        if defer_indexes:
+            try:
+                create_deferred_objects(db)
+            except Exception:
+                db.rollback()
+                current_app.logger.exception('Could not recreate indexes and triggers after a failed import')
+        raise
+
+    if defer_indexes:
+        create_deferred_objects(db)
+
+    return total
+
+# 3. 가상 환경에서 사용될 함수 이름 정의 (transfer.py)
+
+# flask export [파일]: 파일을 지정하지 않으면 표준 출력으로 내보낸다.
+# flask import 파일 [--batch-size N] [--no-defer-indexes]: 진행 상황과 초당 처리 행 수를 표준 에러로 출력한다.
+@click.command('export')
+@click.argument('output', type=click.File('w', encoding='utf8'), default='-')
+@with_appcontext
+def export_command(output):
+    start = time.perf_counter()
+    count = export_rows(output)
+    elapsed = time.perf_counter() - start
+    click.echo('Exported {} rows in {:.1f}s.'.format(count, elapsed), err=True)
+
+@click.command('import')
+@click.argument('input', type=click.File('r', encoding='utf8'))
+@click.option('--batch-size', default=10000, show_default=True, help='Rows per transaction.')
+@click.option('--defer-indexes/--no-defer-indexes', default=True, show_default=True,
+              help='Drop indexes and triggers during the import and rebuild them at the end.')
+@with_appcontext
+def import_command(input, batch_size, defer_indexes):
+
+    def progress(total, elapsed):
+        click.echo('{} rows ({:.0f} rows/s)'.format(total, total / elapsed if elapsed else 0), err=True)
+
+    start = time.perf_counter()
+    count = import_rows(input, batch_size, defer_indexes, progress)
+    elapsed = time.perf_counter() - start
+    click.echo('Imported {} rows in {:.1f}s ({:.0f} rows/s).'.format(
+        count, elapsed, count / elapsed if elapsed else 0
+    ), err=True)
+
+def init_app(app):
+    app.cli.add_command(export_command)
+    app.cli.add_command(import_command)
@@ -0,0 +1,259 @@
+# 쓰기 묶음 처리 (writequeue.py)
+# create, update, delete 뷰는 각자 db.commit()을 호출한다.
+# SQLite는 한 번에 하나의 쓰기 트랜잭션만 허용하기 때문에, 글이 몰리면 요청들이 차례로 잠금을 기다리고
+# 커밋마다 디스크 동기화(fsync) 비용을 따로 치르게 된다.
+# 이번에는 동시에 들어온 쓰기 작업을 큐에 모았다가 한 트랜잭션으로 커밋하는 방법(group commit)을 배운다.
+# 각 요청은 자신의 작업 결과(또는 오류)만 돌려받으며, 다른 작업의 실패에 영향을 받지 않는다.
+
+# 튜토리얼 진행순서
+# 1. 쓰기 묶음 처리기 (writequeue.py)
+# 2. 묶음 통계 (writequeue.py)
+# 3. 뷰에서 사용할 함수와 설정 등록 (writequeue.py) -> (__init__.py)
+
+import atexit
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+
+from flask import current_app
+from werkzeug.exceptions import ServiceUnavailable
+
+from flaskr.db import create_pool, get_db
+
+# 1. 쓰기 묶음 처리기 (writequeue.py)
+
+# WriteBatcher는 하나의 쓰기 스레드와 그 스레드만 사용하는 쓰기 커넥션을 가진다.
+# submit(fn, *args)은 작업을 큐에 넣고, 쓰기 스레드는 첫 작업이 도착한 뒤 max_delay초 동안
+# 또는 max_batch개가 모일 때까지 작업을 모아서 한 트랜잭션(BEGIN IMMEDIATE ... COMMIT)으로 실행한다.
+# 각 작업은 SAVEPOINT 안에서 fn(커넥션, *args)로 실행되므로, 실패한 작업만 되돌리고 나머지는 커밋된다.
+# 작업의 결과는 커밋이 끝난 뒤에 돌려주기 때문에, 결과를 받은 요청은 항상 저장된 데이터를 보게 된다.
+# timeout초 안에 실행되지 않은 작업은 취소하고 503을 돌려준다. 취소된 작업은 나중에 실행되지 않으므로, 다시 시도해도 두 번 저장되지 않는다.
+# 이미 실행 중인 작업은 취소할 수 없으므로 커밋될 때까지 기다린다.
+class WriteOperation(object):
+
+    __slots__ = ('fn', 'args', 'future')
+
+    def __init__(self, fn, args):
+        self.fn = fn
+        self.args = args
+        self.future = Future()
+
+class WriteBatcher(object):
+
+    def __init__(self, pool, max_batch=64, max_delay=0.002, timeout=None, retry_after=1,
+                 logger=None):
+        self.pid = os.getpid()
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self.stats = BatchStats()
+        self._pool = pool
+        self._logger = logger
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='flaskr-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, fn, *args):
+        op = WriteOperation(fn, args)
+        self._queue.put(op)
+        try:
+            return op.future.result(self.timeout)
+        except TimeoutError:
+            if not op.future.cancel():
+                return op.future.result()
+            raise ServiceUnavailable(
+                'The write queue is busy. Please try again later.',
+                retry_after=self.retry_after,
+            )
+
+    # 커넥션을 만들지 못하거나 ROLLBACK이 실패하면 (디스크 오류 등) 그 묶음의 작업들은 같은 오류를 돌려받는다.
+    # 쓰기 스레드는 종료되지 않고, 커넥션을 버린 뒤 다음 묶음에서 새 커넥션을 만든다.
+    def _run(self):
+        conn = None
+        try:
+            while True:
+                op = self._queue.get()
+                if op is None:
+                    break
+
+                batch, stop = self._collect(op)
+                # 기다리다 취소된 작업은 건너뛰고, 나머지는 실행 중으로 표시해서 더 이상 취소되지 않도록 한다.
+                batch = [op for op in batch if op.future.set_running_or_notify_cancel()]
+                if batch:
+                    try:
+                        if conn is None:
+                            conn = self._connect()
+                        self._apply(conn, batch)
+                    except Exception as e:
+                        self._fail(batch, e)
+                        if conn is not None:
+                            self._pool.discard(conn)
+                            conn = None
+                if stop:
+                    break
+        finally:
+            if conn is not None:
+                self._pool.discard(conn)
+
+    def _connect(self):
+        # 트랜잭션을 직접 시작하고 커밋하기 위해 isolation_level을 None으로 둔다.
+        conn = self._pool.connect()
+        conn.isolation_level = None
+        return conn
+
+    def _fail(self, batch, error):
+        for op in batch:
+            if not op.future.done():
+                op.future.set_exception(error)
+
+        self.stats.record(len(batch), len(batch), 0.0)
+        if self._logger is not None:
+            self._logger.exception('write batch failed: %d ops', len(batch))
+
+    def _collect(self, op):
+        batch = [op]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            try:
+                op = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                break
+            if op is None:
+                return batch, True
+            batch.append(op)
+        return batch, False
+
+    def _apply(self, conn, batch):
+        start = time.perf_counter()
+        results = []
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for op in batch:
+                conn.execute('SAVEPOINT write_op')
+                try:
+                    result = op.fn(conn, *op.args)
+                except Exception as e:
+                    conn.execute('ROLLBACK TO write_op')
+                    conn.execute('RELEASE write_op')
+                    results.append((None, e))
+                else:
+                    conn.execute('RELEASE write_op')
+                    results.append((result, None))
+            conn.execute('COMMIT')
+        except Exception as e:
+            # BEGIN이나 COMMIT이 실패했다면 (잠금 시간 초과 등) 묶음 전체가 같은 오류를 돌려받는다.
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            results = [(None, e)] * len(batch)
+        elapsed = time.perf_counter() - start
+
+        errors = 0
+        for op, (result, error) in zip(batch, results):
+            if error is not None:
+                errors += 1
+                op.future.set_exception(error)
+            else:
+                op.future.set_result(result)
+
+        self.stats.record(len(batch), errors, elapsed)
+        if self._logger is not None:
+            self._logger.debug(
+                'write batch: %d ops (%d failed), commit %.3fms', len(batch), errors, elapsed * 1000
+            )
+
+    def close(self):
+        # 큐에 남은 작업을 모두 처리한 뒤 쓰기 스레드를 종료한다.
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+# 2. 묶음 통계 (writequeue.py)
+
+# 묶음을 크게 만들수록 커밋 횟수는 줄지만, 작업이 커밋될 때까지 기다리는 시간은 늘어난다.
+# WRITE_BATCH_SIZE와 WRITE_BATCH_DELAY를 조정할 수 있도록 묶음 크기와 커밋 시간을 기록한다.
+# snapshot()은 지금까지의 통계를 딕셔너리로 돌려준다.
+class BatchStats(object):
+
+    def __init__(self):
+        self.batches = 0
+        self.operations = 0
+        self.errors = 0
+        self.max_batch_size = 0
+        self.commit_time = 0.0
+        self.max_commit_time = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, size, errors, elapsed):
+        with self._lock:
+            self.batches += 1
+            self.operations += size
+            self.errors += errors
+            self.max_batch_size = max(self.max_batch_size, size)
+            self.commit_time += elapsed
+            self.max_commit_time = max(self.max_commit_time, elapsed)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'batches': self.batches,
+                'operations': self.operations,
+                'errors': self.errors,
+                'avg_batch_size': self.operations / self.batches if self.batches else 0.0,
+                'max_batch_size': self.max_batch_size,
+                'avg_commit_ms': self.commit_time / self.batches * 1000 if self.batches else 0.0,
+                'max_commit_ms': self.max_commit_time * 1000,
+            }
+
+# 3. 뷰에서 사용할 함수와 설정 등록 (writequeue.py)
+
+# execute_write(fn, *args)는 fn(db, *args)를 실행하고 커밋한 뒤 fn의 결과를 돌려준다.
+# WRITE_BATCHING이 False라면 get_db()의 커넥션으로 바로 실행하고 커밋한다. (기존 방식)
+# True라면 쓰기 묶음 처리기에 작업을 넣고, 묶음이 커밋될 때까지 기다린다.
+# fn은 커밋하지 않아야 하며, 같은 트랜잭션의 다른 작업과 섞일 수 있으므로 DB 작업만 해야 한다.
+def execute_write(fn, *args):
+    batcher = get_write_batcher()
+    if batcher is None:
+        db = get_db()
+        result = fn(db, *args)
+        db.commit()
+        return result
+
+    return batcher.submit(fn, *args)
+
+_batcher_lock = threading.Lock()
+
+def get_write_batcher():
+    app = current_app._get_current_object()
+    if not app.config['WRITE_BATCHING']:
+        return None
+
+    batcher = app.extensions.get('flaskr.write_batcher')
+    if batcher is None or batcher.pid != os.getpid():
+        with _batcher_lock:
+            batcher = app.extensions.get('flaskr.write_batcher')
+            if batcher is None or batcher.pid != os.getpid():
+                batcher = app.extensions['flaskr.write_batcher'] = WriteBatcher(
+                    create_pool(app.config),
+                    max_batch=app.config['WRITE_BATCH_SIZE'],
+                    max_delay=app.config['WRITE_BATCH_DELAY'],
+                    timeout=app.config['WRITE_BATCH_TIMEOUT'],
+                    retry_after=app.config['WRITE_BATCH_RETRY_AFTER'],
+                    logger=app.logger,
+                )
+                atexit.register(batcher.close)
+    return batcher
+
+# WRITE_BATCHING: 쓰기 묶음 처리를 사용할지 여부
+# WRITE_BATCH_SIZE: 한 트랜잭션에 넣을 최대 작업 수
+# WRITE_BATCH_DELAY: 첫 작업이 도착한 뒤 다른 작업을 기다리는 최대 시간 (초)
+# WRITE_BATCH_TIMEOUT: 작업이 커밋될 때까지 기다리는 최대 시간 (초, 넘으면 503)
+# WRITE_BATCH_RETRY_AFTER: 503 응답의 Retry-After 값 (초)
+def init_app(app):
+    app.config.setdefault('WRITE_BATCHING', False)
+    app.config.setdefault('WRITE_BATCH_SIZE', 64)
+    app.config.setdefault('WRITE_BATCH_DELAY', 0.002)
+    app.config.setdefault('WRITE_BATCH_TIMEOUT', 10)
+    app.config.setdefault('WRITE_BATCH_RETRY_AFTER', 1)
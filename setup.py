@@ -45,6 +45,15 @@ setup(
     install_requires=[
         'flask',
     ],
+
+    # 선택 의존성: pip install -e .[async] 처럼 설치한다.
+    # async: 비동기 뷰와 ASGI 진입점 (flaskr/asgi.py)
+    #   flaskr/asgi.py는 asgiref의 WsgiToAsgiInstance를 상속하므로, 확인한 메이저 버전으로 고정한다.
+    # speedups: API의 JSON 직렬화에 orjson을 사용 (flaskr/api.py)
+    extras_require={
+        'async': ['flask[async]', 'asgiref>=3.12,<4'],
+        'speedups': ['orjson'],
+    },
 )
 
 # 패키지화 할 상세 파일 정의 (flask_tutorial/MANIFEST.in)
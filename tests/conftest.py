@@ -1,5 +1,6 @@
 import os
-import tempfile
+import sqlite3
+import time
 
 import pytest
 from flaskr import create_app
@@ -11,6 +12,7 @@ from flaskr.db import get_db, init_db
  
  이 모듈은 flaskr의 기능을 테스트하기 위한 환경 구축을 목적으로 합니다.
   1. 데이터베이스의 user와 post 테이블에 테스트로 사용할 데이터 입력
+   - 데이터베이스는 세션마다 한 번만 만들고, 테스트마다 복사해서 사용합니다.
   2. 가상 유저 만들기 
   3. CLI 테스트를 위한 환경 구축 
 """
@@ -23,13 +25,64 @@ from flaskr.db import get_db, init_db
 with open(os.path.join(os.path.dirname(__file__), 'data.sql'), 'rb') as f:
     _data_sql = f.read().decode('utf8')
 
+# 테스트에서는 비밀번호 해시를 요청 스레드에서 바로 계산하고,
+# data.sql에 저장된 해시와 같은 방식을 사용해서 로그인할 때마다 재해시하지 않도록 합니다.
+# 템플릿 바이트코드 캐시는 인스턴스 폴더에 파일을 남기므로 사용하지 않습니다.
+_test_config = {
+    'TESTING': True,
+    'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:50000',
+    'HASH_POOL_WORKERS': 0,
+    'TEMPLATE_BYTECODE_CACHE': False,
+}
+
+# app fixture를 준비하는 데 걸린 시간입니다. 테스트가 끝나면 pytest_terminal_summary에서 출력합니다.
+_setup_times = {'template': None, 'app': []}
+
+def close_pools(app):
+    # 풀에 남아있는 커넥션을 닫아서, 테스트마다 파일 핸들이 쌓이지 않도록 합니다.
+    for key in ('flaskr.db_pool', 'flaskr.db_read_pool'):
+        pool = app.extensions.get(key)
+        if pool is not None:
+            pool.close()
+
+@pytest.fixture(scope='session')
+def template_db(tmp_path_factory):
+
+    """
+     init_db()와 data.sql로 만든 데이터베이스를 세션마다 한 번만 만듭니다.
+     - 각 테스트는 이 파일을 복사해서 사용하므로, 테스트마다 스키마를 만들고 데이터를 넣지 않습니다.
+     - tmp_path_factory는 pytest-xdist의 워커마다 다른 폴더를 돌려주므로, 병렬로 실행해도 워커끼리 파일을 공유하지 않습니다.
+    """
+
+    start = time.perf_counter()
+    path = str(tmp_path_factory.mktemp('template') / 'flaskr.sqlite')
+    app = create_app(dict(_test_config, DATABASE=path))
+
+    with app.app_context():
+        init_db()
+        get_db().executescript(_data_sql)
+    close_pools(app)
+
+    _setup_times['template'] = time.perf_counter() - start
+    return path
+
+def clone_db(source_path, target_path):
+    # SQLite의 backup API는 열려있는 데이터베이스를 페이지 단위로 그대로 복사합니다.
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(target_path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
 @pytest.fixture
-def app():
+def app(template_db, tmp_path_factory):
 
     """
     1. 어플리케이션 팩토리(create_app)를 테스트 모드로 전환 시킵니다.
      - 테스트가 이뤄지는 동안 사용되는 데이터베이스는 db_path로 지정합니다.
-     해당 데이터베이스는 임시적으로 사용하는 파일이므로, 테스트가 종료되면 삭제됩니다.
+     해당 데이터베이스는 template_db를 복사한 임시 파일이므로, 테스트끼리 데이터를 공유하지 않습니다.
 
     2. 테스트로 사용할 클라이언트를 만듭니다.
      - client 함수를 통해 뷰로 request을 보낸 뒤, response를 통해 버그를 확인할 수 있습니다.
@@ -37,24 +90,31 @@ def app():
     3. cli 커맨드를 테스트하기 위해 runner 함수를 만듭니다.
     """
 
-    # tempfile.mkstemp()을 사용하면 일시적으로 파일을 만들고, 삭제할 수 있음.
-    # os 수준의 파일 핸들러와 파일이 저장된 경로를 튜플 형태로 리턴함.
-    # os 수준의 파일 핸들러는 파일이 열리는 순서에 따라 1, 2, 3, ...으로 표현됨.
-    db_fd, db_path = tempfile.mkstemp()
-
-    app = create_app({
-        'TESTING': True,
-        'DATABASE': db_path,
-    })
+    start = time.perf_counter()
+    db_path = str(tmp_path_factory.mktemp('app') / 'flaskr.sqlite')
+    clone_db(template_db, db_path)
+    app = create_app(dict(_test_config, DATABASE=db_path))
+    _setup_times['app'].append(time.perf_counter() - start)
 
-    with app.app_context():
-        init_db()
-        get_db().executescript(_data_sql)
-    
     yield app
 
-    os.close(db_fd)
-    os.unlink(db_path)
+    close_pools(app)
+
+def pytest_terminal_summary(terminalreporter):
+    """
+     app fixture를 준비하는 데 걸린 시간을 출력합니다.
+     pytest-xdist로 실행하면 워커의 출력은 보이지 않으므로 아무것도 출력하지 않습니다.
+    """
+    times = _setup_times['app']
+    if not times:
+        return
+
+    terminalreporter.write_line(
+        'app fixture: {} setups, {:.1f}ms total, {:.2f}ms each (template database {:.1f}ms)'.format(
+            len(times), sum(times) * 1000, sum(times) / len(times) * 1000,
+            (_setup_times['template'] or 0) * 1000,
+        )
+    )
 
 @pytest.fixture
 def client(app):
@@ -0,0 +1,87 @@
+import threading
+import time
+
+import pytest
+from werkzeug.exceptions import ServiceUnavailable
+
+from flaskr.admission import AdmissionLimiter, get_limiters, request_kind
+
+"""
+ 이 모듈은 flaskr의 admission.py에서 정의한 기능을 테스트하기 위한 목적을 가집니다.
+  1. 제한을 넘은 요청은 줄에서 기다리고, 줄이 가득 차면 바로 503을 받습니다.
+  2. 오래 기다린 요청은 503을 받습니다.
+  3. 요청은 읽기, 쓰기, 인증으로 구분됩니다.
+  4. 제한에 걸린 요청은 503과 Retry-After를 받고, 처리가 끝난 요청은 자리를 돌려줍니다.
+"""
+
+
+def test_limiter_queue():
+    limiter = AdmissionLimiter('read', 1, queue_size=1, retry_after=3)
+    limiter.acquire()
+
+    waiter = threading.Thread(target=limiter.acquire)
+    waiter.start()
+    while limiter.snapshot()['waiting'] == 0:
+        time.sleep(0.01)
+
+    with pytest.raises(ServiceUnavailable) as e:
+        limiter.acquire()
+    assert e.value.get_response().headers['Retry-After'] == '3'
+
+    limiter.release()
+    waiter.join(1)
+    assert not waiter.is_alive()
+    assert limiter.snapshot() == {
+        'limit': 1, 'active': 1, 'waiting': 0, 'admitted': 2, 'rejected': 1
+    }
+
+
+def test_limiter_timeout():
+    limiter = AdmissionLimiter('write', 1, queue_size=1, timeout=0.05)
+    limiter.acquire()
+
+    start = time.monotonic()
+    with pytest.raises(ServiceUnavailable):
+        limiter.acquire()
+    assert time.monotonic() - start >= 0.05
+    assert limiter.snapshot()['waiting'] == 0
+
+
+@pytest.mark.parametrize(('method', 'path', 'kind'), (
+    ('GET', '/', 'read'),
+    ('GET', '/1/update', 'read'),
+    ('GET', '/auth/login', 'read'),
+    ('POST', '/auth/login', 'auth'),
+    ('POST', '/auth/register', 'auth'),
+    ('POST', '/create', 'write'),
+    ('PUT', '/api/posts/1', 'write'),
+    ('GET', '/static/style.css', None),
+    ('GET', '/missing/page', None),
+))
+def test_request_kind(app, method, path, kind):
+    with app.test_request_context(path, method=method):
+        assert request_kind() == kind
+
+
+def test_admission(client, app):
+    response = client.get('/')
+    assert response.status_code == 200
+    with app.app_context():
+        limiters = get_limiters()
+    assert limiters['read'].snapshot()['active'] == 0
+    assert limiters['read'].snapshot()['admitted'] == 1
+
+    limiters['read'].limit = 0
+    limiters['read'].queue_size = 0
+    response = client.get('/')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+
+    response = client.get('/api/posts')
+    assert response.status_code == 503
+    assert response.get_json()['error']
+
+    # 정적 파일과 다른 종류의 요청은 영향을 받지 않습니다.
+    assert client.get('/static/style.css').status_code == 200
+    assert client.post('/auth/login', data={'username': 'test', 'password': 'test'}).status_code == 302
+    assert limiters['auth'].snapshot()['active'] == 0
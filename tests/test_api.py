@@ -0,0 +1,108 @@
+import datetime
+
+import pytest
+
+from flaskr import api
+from flaskr.db import get_db
+
+"""
+ 이 모듈은 flaskr의 api.py에서 정의한 JSON API를 테스트하기 위한 목적을 가집니다.
+  - 글 목록과 글 하나를 JSON으로 불러옵니다.
+  - 커서로 다음 페이지를 불러오고, fields로 필요한 필드만 선택합니다.
+  - 로그인한 사용자는 글을 작성/수정/삭제할 수 있습니다.
+"""
+
+
+def test_list_posts(client, app):
+    response = client.get('/api/posts')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/json'
+
+    data = response.get_json()
+    assert data['prev'] is None and data['next'] is None
+    assert data['posts'] == [{
+        'id': 1, 'title': 'test title', 'body': 'test\nbody',
+        'created': '2018-01-01T00:00:00', 'author_id': 1, 'username': 'test',
+    }]
+
+
+def test_list_posts_pagination(client, app):
+    """
+     1. limit만큼 불러오고, next 커서로 다음 페이지를 불러옵니다.
+     2. fields로 선택한 필드만 돌려줍니다.
+    """
+
+    with app.app_context():
+        db = get_db()
+        for i in range(4):
+            db.execute(
+                "INSERT INTO post (title, body, author_id, created)"
+                " VALUES (?, '', 1, datetime('2018-01-02', ? || ' seconds'))",
+                ('post {}'.format(i), i),
+            )
+        db.commit()
+
+    data = client.get('/api/posts?limit=2&fields=id,title').get_json()
+    assert data['posts'] == [{'id': 5, 'title': 'post 3'}, {'id': 4, 'title': 'post 2'}]
+
+    data = client.get('/api/posts', query_string={
+        'limit': 2, 'fields': 'id', 'before': data['next'],
+    }).get_json()
+    assert data['posts'] == [{'id': 3}, {'id': 2}]
+    assert data['prev'] is not None
+
+    data = client.get('/api/posts', query_string={'fields': 'id', 'after': data['prev']}).get_json()
+    assert data['posts'] == [{'id': 5}, {'id': 4}]
+
+
+@pytest.mark.parametrize(('path', 'status'), (
+    ('/api/posts/1?fields=title', 200),
+    ('/api/posts/2', 404),
+    ('/api/posts?fields=id,password', 400),
+    ('/api/posts?before=nope', 400),
+))
+def test_get_post(client, path, status):
+    response = client.get(path)
+    assert response.status_code == status
+    if status == 200:
+        assert response.get_json() == {'title': 'test title'}
+    else:
+        assert 'error' in response.get_json()
+
+
+def test_write_posts(client, auth, app):
+    """
+     1. 로그인하지 않으면 401을 돌려줍니다.
+     2. 글을 작성하면 201과 작성된 글을, 수정하면 수정된 글을 돌려줍니다.
+     3. 삭제하면 204를 돌려주고, 이후에는 404가 됩니다.
+    """
+
+    assert client.post('/api/posts', json={'title': 'x'}).status_code == 401
+
+    auth.login()
+    assert client.post('/api/posts', json={'body': 'x'}).status_code == 400
+
+    response = client.post('/api/posts', json={'title': 'created', 'body': 'api'})
+    assert response.status_code == 201
+    assert response.headers['Location'].endswith('/api/posts/2')
+    assert response.get_json()['title'] == 'created'
+
+    response = client.put('/api/posts/2', json={'title': 'updated'})
+    assert response.get_json()['title'] == 'updated'
+    assert b'updated' in client.get('/').data
+
+    assert client.delete('/api/posts/2').status_code == 204
+    assert client.get('/api/posts/2').status_code == 404
+
+    with app.app_context():
+        get_db().execute('UPDATE post SET author_id = 2 WHERE id = 1')
+        get_db().commit()
+    assert client.delete('/api/posts/1').status_code == 403
+
+
+def test_dumps():
+    # orjson이 없을 때 사용하는 json_dumps()도 orjson과 같은 결과를 만들어야 합니다.
+    value = {'created': datetime.datetime(2018, 1, 1), 'title': '한글'}
+    expected = '{"created":"2018-01-01T00:00:00","title":"한글"}'.encode('utf8')
+    assert api.json_dumps(value) == expected
+    assert api.dumps(value) == expected
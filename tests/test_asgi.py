@@ -0,0 +1,143 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip('asgiref')
+
+from flaskr.asgi import create_asgi_app, get_db_executor, make_async
+from flaskr.db import get_db
+
+"""
+ 이 모듈은 flaskr의 asgi.py에서 정의한 비동기 읽기 경로와 ASGI 진입점을 테스트합니다.
+"""
+
+
+@pytest.fixture
+def async_app(app):
+    make_async(app)
+    yield app
+
+    executor = app.extensions.get('flaskr.db_executor')
+    if executor is not None:
+        executor.shutdown()
+
+
+def test_async_index(async_app, client, auth):
+    """
+    비동기 index와 load_logged_in_user가 동기 뷰와 같은 화면을 보여주는지 확인합니다.
+     1. 로그인 전후의 메인 페이지가 test_index와 같습니다.
+     2. 같은 ETag를 보내면 304를 돌려줍니다.
+     3. DB 작업은 DB 실행기의 스레드에서 실행됩니다.
+    """
+
+    response = client.get('/')
+    assert b'Log In' in response.data
+
+    auth.login()
+    response = client.get('/')
+    assert b'Log Out' in response.data
+    assert b'test title' in response.data
+    assert b'href="/1/update"' in response.data
+
+    etag = response.headers['ETag']
+    assert client.get('/', headers={'If-None-Match': etag}).status_code == 304
+
+    with async_app.app_context():
+        assert get_db_executor()._connections
+
+
+def test_async_update(async_app, client, auth):
+    """
+    비동기 get_post를 사용하는 글 수정 화면을 확인합니다.
+     1. 로그인하지 않았다면 로그인 화면으로 이동합니다.
+     2. 자신의 글은 수정 화면을, 없는 글은 404, 다른 사람의 글은 403을 돌려줍니다.
+     3. POST 요청은 동기 뷰로 처리되어 글이 수정됩니다.
+    """
+
+    assert client.get('/1/update').status_code == 302
+
+    auth.login()
+    assert client.get('/1/update').status_code == 200
+    assert client.get('/2/update').status_code == 404
+
+    with async_app.app_context():
+        get_db().execute('UPDATE post SET author_id = 2 WHERE id = 1')
+        get_db().commit()
+    assert client.get('/1/update').status_code == 403
+
+    with async_app.app_context():
+        get_db().execute('UPDATE post SET author_id = 1 WHERE id = 1')
+        get_db().commit()
+    client.post('/1/update', data={'title': 'updated', 'body': ''})
+
+    with async_app.app_context():
+        post = get_db().execute('SELECT * FROM post WHERE id = 1').fetchone()
+        assert post['title'] == 'updated'
+
+
+async def call(asgi_app, path):
+    # ASGI 서버 대신 scope, receive, send를 직접 만들어서 호출하고, 보낸 메시지들을 돌려줍니다.
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+        'query_string': b'', 'root_path': '', 'headers': [(b'host', b'localhost')],
+        'server': ('localhost', 80), 'client': ('127.0.0.1', 1234),
+    }
+    await asgi_app(scope, receive, send)
+    return messages
+
+
+def test_create_asgi_app(app):
+    """
+    ASGI 진입점으로 메인 페이지를 요청합니다.
+    """
+
+    asgi_app = create_asgi_app({
+        'TESTING': True,
+        'DATABASE': app.config['DATABASE'],
+        'HASH_POOL_WORKERS': 0,
+        'TEMPLATE_BYTECODE_CACHE': False,
+    })
+    messages = asyncio.run(call(asgi_app, '/'))
+
+    assert messages[0]['status'] == 200
+    assert b'test title' in b''.join(m.get('body', b'') for m in messages[1:])
+
+
+def test_asgi_concurrent_requests(app):
+    """
+    ASGI 진입점은 요청들을 여러 스레드에서 동시에 처리합니다.
+    0.5초 걸리는 요청 4개를 동시에 보내면, 차례대로 처리할 때(2초)보다 훨씬 빨리 끝나야 합니다.
+    """
+
+    asgi_app = create_asgi_app({
+        'TESTING': True,
+        'DATABASE': app.config['DATABASE'],
+        'HASH_POOL_WORKERS': 0,
+        'TEMPLATE_BYTECODE_CACHE': False,
+    })
+
+    def slow():
+        time.sleep(0.5)
+        return 'slow'
+
+    asgi_app.wsgi_application.add_url_rule('/slow', 'slow', slow)
+
+    async def run():
+        return await asyncio.gather(*(call(asgi_app, '/slow') for _ in range(4)))
+
+    start = time.perf_counter()
+    results = asyncio.run(run())
+    elapsed = time.perf_counter() - start
+
+    assert [messages[0]['status'] for messages in results] == [200] * 4
+    assert elapsed < 1.5
@@ -0,0 +1,62 @@
+import hashlib
+import os
+
+from flask import url_for
+from flaskr.assets import build_version
+
+"""
+ 이 모듈은 flaskr의 assets.py에서 정의한 기능을 테스트하기 위한 목적을 가집니다.
+  1. url_for('static', ...)로 만든 주소에는 파일 내용의 지문이 붙습니다.
+  2. 현재 지문이 붙은 주소는 immutable로 1년 동안 캐시됩니다.
+  3. 지문이 없거나 오래된 지문은 기본 캐시 설정을 사용합니다.
+  4. 템플릿이나 정적 파일이 바뀌면 배포 버전과 메인 페이지의 ETag가 바뀝니다.
+"""
+
+
+def test_fingerprint(app, client):
+    with open(app.static_folder + '/style.css', 'rb') as f:
+        fingerprint = hashlib.sha256(f.read()).hexdigest()[:12]
+
+    with app.test_request_context():
+        url = url_for('static', filename='style.css')
+    assert url == '/static/style.css?v=' + fingerprint
+    assert url.encode() in client.get('/').data
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.cache_control.immutable
+    assert response.cache_control.max_age == 31536000
+    response.close()
+
+    for url in ('/static/style.css', '/static/style.css?v=stale'):
+        response = client.get(url)
+        assert not response.cache_control.immutable
+        response.close()
+
+    # 지문을 붙이지 않도록 설정하면 기존 주소를 그대로 사용합니다.
+    app.config['STATIC_FINGERPRINT'] = False
+    with app.test_request_context():
+        assert url_for('static', filename='style.css') == '/static/style.css'
+
+
+def test_build_version(app, client, tmp_path, monkeypatch):
+    """
+     1. 템플릿 파일의 수정 시각이 바뀌면 배포 버전이 바뀝니다.
+     2. 배포 버전이 바뀌면 이전 ETag로 요청해도 304 대신 200이 반환되고, 캐시된 페이지도 사용하지 않습니다.
+    """
+    template = tmp_path / 'base.html'
+    template.write_text('')
+    monkeypatch.setattr(app, 'template_folder', str(tmp_path))
+    version = build_version(app)
+    assert build_version(app) == version
+    os.utime(template, ns=(0, 0))
+    assert build_version(app) != version
+    monkeypatch.undo()
+
+    etag = client.get('/').headers['ETag']
+    assert client.get('/', headers={'If-None-Match': etag}).status_code == 304
+
+    app.extensions['flaskr.build_version'] = 'deployed'
+    response = client.get('/', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
@@ -1,5 +1,6 @@
 import pytest
 from flask import g, session
+from flaskr.cache import invalidate_user
 from flaskr.db import get_db
 
 """
@@ -73,6 +74,36 @@ def test_register_validate_input(client, username, password, message):
     assert message in response.data
 
 
+@pytest.mark.parametrize(('username', 'message'), (
+    ('', b'Username is required.'),
+    ('other', b'already registered'),
+))
+def test_rename_validate_input(client, auth, username, message):
+    """
+     1. 로그인하지 않으면 이름 변경 화면 대신 로그인 화면으로 이동합니다.
+     2. 비어있거나 이미 사용 중인 이름으로는 바꿀 수 없습니다.
+    """
+    assert client.get('/auth/rename').headers['Location'].endswith('/auth/login')
+
+    auth.login()
+    assert client.get('/auth/rename').status_code == 200
+    response = client.post('/auth/rename', data={'username': username})
+    assert message in response.data
+
+
+def test_rename(client, auth, app):
+    """
+     이름을 바꾸면 메인 페이지로 이동하고, 화면과 DB에 새 이름이 나타납니다.
+    """
+    auth.login()
+    response = client.post('/auth/rename', data={'username': 'renamed'})
+    assert response.headers['Location'].endswith('/')
+    assert b'<span>renamed</span>' in client.get('/').data
+
+    with app.app_context():
+        assert get_db().execute('SELECT username FROM user WHERE id = 1').fetchone()[0] == 'renamed'
+
+
 def test_logout(client, auth):
     """
      1. client와 auth를 오버라이딩 합니다.
@@ -83,4 +114,33 @@ def test_logout(client, auth):
 
     with client:
         auth.logout()
-        assert 'user_id' not in session
\ No newline at end of file
+        assert 'user_id' not in session
+
+def test_load_logged_in_user(client, auth, app):
+    """
+     1. 로그인 후 다른 페이지로 이동하면 g.user에 사용자 정보가 저장됩니다. (비밀번호 해시는 제외)
+     2. 정적 파일과 같이 g.user가 필요 없는 엔드포인트는 사용자를 조회하지 않습니다.
+     3. 조회한 사용자는 캐시에 저장되며, invalidate_user()로 지우면 다시 조회합니다.
+    """
+    auth.login()
+
+    with client:
+        client.get('/auth/login')
+        assert g.user['username'] == 'test'
+        assert 'password' not in g.user.keys()
+
+        client.get('/hello')
+        assert g.user is None
+
+    with app.app_context():
+        db = get_db()
+        db.execute("UPDATE user SET username = 'renamed' WHERE id = 1")
+        db.commit()
+
+    with client:
+        client.get('/auth/login')
+        assert g.user['username'] == 'test'
+
+        invalidate_user(1)
+        client.get('/auth/login')
+        assert g.user['username'] == 'renamed'
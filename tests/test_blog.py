@@ -1,4 +1,5 @@
 import pytest
+from flaskr import blog
 from flaskr.db import get_db
 from flask import session
 
@@ -39,7 +40,7 @@ def test_index(client, auth):
     response = client.get('/')
     assert b'Log Out' in response.data
     assert b'test title' in response.data
-    assert b'by test on 2018-01-01' in response.data
+    assert b'by <a href="/user/test">test</a> on 2018-01-01' in response.data
     assert b'test\nbody' in response.data
     assert b'href="/1/update"' in response.data
 
@@ -67,6 +68,7 @@ def test_author_required(app, client, auth):
      2. 테스트를 위해 client가 작성한 글을 다른 사용자가 작성한 것으로 수정한 후 저장합니다.
      3. client가 로그인 하도록 한 후, 수정과 삭제를 시도합니다. 403 오류가 나온다면 테스트 통과입니다.
      4. 현재 client는 메인 페이지에서 수정 버튼을 볼 수 없습니다.
+     5. 다른 사용자의 글 수정 화면은 ETag가 같더라도 304가 아닌 403을 반환합니다.
     """
 
     with app.app_context():
@@ -79,21 +81,30 @@ def test_author_required(app, client, auth):
     assert client.post('/1/delete').status_code == 403
     assert b'href="/1/update"' not in client.get('/').data
 
+    with app.app_context():
+        etag = blog.feed_validators(1, 1)[0]
+    assert client.get('/1/update', headers={'If-None-Match': etag}).status_code == 403
+
 
 @pytest.mark.parametrize('path', (
         '/2/update',
         '/2/delete',
 ))
-def test_exists_required(client, auth, path):
+def test_exists_required(app, client, auth, path):
     """
     글의 작성자가 해당 글을 수정/삭제를 위해 글이 존재하는지 테스트 합니다.
      1. client, auth, path를 오버라이딩 합니다.
      2. client가 로그인 한 후, 존재하지 않는 글에 수정/삭제 경로에 접근합니다.
+     3. 없는 글의 수정 화면은 ETag가 같더라도 304가 아닌 404를 반환합니다.
     """
 
     auth.login()
     assert client.post(path).status_code == 404
 
+    with app.app_context():
+        etag = blog.feed_validators(1, 2)[0]
+    assert client.get('/2/update', headers={'If-None-Match': etag}).status_code == 404
+
 
 def test_create(client, auth, app):
     """
@@ -144,4 +155,274 @@ def test_delete(client, auth, app):
     with app.app_context():
         db = get_db()
         post = db.execute('SELECT * FROM post WHERE id = 1').fetchone()
-        assert post is None
\ No newline at end of file
+        assert post is None
+
+def test_index_pagination(client, app):
+    """
+      메인 페이지의 커서 페이지네이션을 테스트 합니다.
+      1. 한 페이지에 글을 하나만 보여주도록 설정하고, 글을 두 개 더 작성합니다.
+      2. 첫 페이지에는 가장 최신 글과 다음 페이지 링크만 존재합니다.
+      3. 다음 페이지 링크를 따라가면 이전/다음 페이지 링크가 모두 존재합니다.
+      4. 이전 페이지 링크를 따라가면 다시 첫 페이지가 나옵니다.
+    """
+    app.config['POSTS_PER_PAGE'] = 1
+
+    with app.app_context():
+        db = get_db()
+        db.executemany(
+            'INSERT INTO post (title, body, author_id, created) VALUES (?, ?, 1, ?)',
+            [('second', '', '2018-01-02 00:00:00'), ('third', '', '2018-01-03 00:00:00')]
+        )
+        db.commit()
+
+    response = client.get('/')
+    assert b'third' in response.data
+    assert b'second' not in response.data
+    assert b'after=' not in response.data
+    assert b'before=2018-01-03+00:00:00,3' in response.data
+
+    response = client.get('/?before=2018-01-03 00:00:00,3')
+    assert b'second' in response.data
+    assert b'after=2018-01-02+00:00:00,2' in response.data
+    assert b'before=2018-01-02+00:00:00,2' in response.data
+
+    response = client.get('/?after=2018-01-02 00:00:00,2')
+    assert b'third' in response.data
+    assert b'after=' not in response.data
+
+    assert client.get('/?before=nope').status_code == 400
+    assert client.get('/?before=2018-01-01 00:00:00,99999999999999999999').status_code == 400
+
+
+def test_author_name(client, app):
+    """
+      글에 저장된 작성자 이름(author_name)을 테스트 합니다.
+      1. 메인 페이지의 쿼리는 user 테이블을 읽지 않습니다.
+      2. 새 글에는 작성자의 이름이 저장됩니다.
+         insert_post()는 이름을 INSERT 문에서 넣으므로 feed_version은 한 번만 올라갑니다.
+      3. 사용자 이름을 바꾸면 그 사용자의 모든 글에 새 이름이 반영됩니다.
+    """
+    from flaskr.blog import FEED_QUERY, insert_post
+
+    with app.app_context():
+        db = get_db()
+        plan = db.execute('EXPLAIN QUERY PLAN ' + FEED_QUERY + ' ORDER BY created DESC, p.id DESC').fetchall()
+        assert not any('user' in row['detail'] for row in plan)
+
+        db.execute("INSERT INTO post (title, body, author_id) VALUES ('by other', '', 2)")
+        assert db.execute(
+            "SELECT author_name FROM post WHERE title = 'by other'"
+        ).fetchone()[0] == 'other'
+
+        version = db.execute('SELECT version FROM feed_version').fetchone()[0]
+        id = insert_post(db, 'inserted', '', 2)
+        assert db.execute('SELECT author_name FROM post WHERE id = ?', (id,)).fetchone()[0] == 'other'
+        assert db.execute('SELECT version FROM feed_version').fetchone()[0] == version + 1
+
+        db.execute("UPDATE user SET username = 'renamed' WHERE id = 1")
+        db.commit()
+        assert db.execute('SELECT author_name FROM post WHERE id = 1').fetchone()[0] == 'renamed'
+
+    response = client.get('/')
+    assert b'by <a href="/user/renamed">renamed</a> on 2018-01-01' in response.data
+    assert b'/user/test' not in response.data
+
+
+def test_user_feed(client, auth, app):
+    """
+      작성자별 글 목록을 테스트 합니다.
+      1. 없는 사용자는 404를 반환합니다.
+      2. 다른 사용자의 글은 보이지 않고, 글 수가 표시됩니다.
+      3. 한 페이지에 글을 하나만 보여주도록 설정하면, 그 작성자의 글만 커서로 넘겨볼 수 있습니다.
+      4. 글이 작성/삭제되면 글 수(post_count)가 1씩 바뀝니다.
+    """
+    assert client.get('/user/nobody').status_code == 404
+
+    with app.app_context():
+        db = get_db()
+        db.executemany(
+            'INSERT INTO post (title, body, author_id, created) VALUES (?, ?, ?, ?)',
+            [('second', '', 1, '2018-01-02 00:00:00'), ('by other', '', 2, '2018-01-03 00:00:00')]
+        )
+        db.commit()
+        plan = db.execute(
+            'EXPLAIN QUERY PLAN SELECT id FROM post p WHERE author_id = 1'
+            ' ORDER BY created DESC, p.id DESC'
+        ).fetchall()
+        assert 'post_author_created_id' in plan[0]['detail']
+
+    response = client.get('/user/test')
+    assert b'2 posts' in response.data
+    assert b'second' in response.data
+    assert b'test title' in response.data
+    assert b'by other' not in response.data
+
+    app.config['POSTS_PER_PAGE'] = 1
+    response = client.get('/user/test')
+    assert b'second' in response.data
+    assert b'test title' not in response.data
+    assert b'/user/test?before=2018-01-02+00:00:00,2' in response.data
+
+    response = client.get('/user/test?before=2018-01-02 00:00:00,2')
+    assert b'test title' in response.data
+    assert b'by other' not in response.data
+    assert b'Older' not in response.data
+
+    auth.login()
+    client.post('/1/delete')
+    with app.app_context():
+        db = get_db()
+        assert db.execute('SELECT post_count FROM user WHERE id = 1').fetchone()[0] == 1
+        assert db.execute('SELECT post_count FROM user WHERE id = 2').fetchone()[0] == 1
+
+
+def test_rename_user(client, auth, app):
+    """
+      사용자 이름 변경이 캐시에 반영되는지 테스트 합니다.
+      1. 캐시된 메인 페이지에도 바뀐 작성자 이름과 로그인한 사용자 이름이 나타납니다.
+      2. feed_version이 올라가므로 이전 ETag로 요청하면 200이 반환됩니다.
+      3. 사용자 캐시에서 그 사용자의 항목이 지워집니다.
+    """
+    from flaskr.auth import rename_user
+
+    auth.login()
+    response = client.get('/')
+    assert b'>test</a> on 2018-01-01' in response.data
+    etag = response.headers['ETag']
+
+    with app.app_context():
+        assert app.extensions['flaskr.user_cache'].get(1) is not None
+        rename_user(1, 'renamed')
+        assert app.extensions['flaskr.user_cache'].get(1) is None
+
+    response = client.get('/', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert b'>renamed</a> on 2018-01-01' in response.data
+    assert b'<span>renamed</span>' in response.data
+
+
+def test_index_cache(client, auth, app):
+    """
+      메인 페이지 캐시를 테스트 합니다.
+      1. 메인 페이지를 한 번 불러오면 캐시에 저장되고, DB를 직접 수정해도 캐시된 페이지가 나옵니다.
+      2. 글을 수정하면 해당 글이 포함된 페이지가 무효화되어 수정된 내용이 나옵니다.
+      3. 새 글을 작성하면 첫 페이지가 무효화됩니다.
+    """
+    auth.login()
+    assert b'test title' in client.get('/').data
+
+    with app.app_context():
+        db = get_db()
+        db.execute("UPDATE post SET title = 'stale' WHERE id = 1")
+        db.commit()
+
+    assert b'test title' in client.get('/').data
+
+    client.post('/1/update', data={'title': 'updated', 'body': ''})
+    assert b'updated' in client.get('/').data
+
+    client.post('/create', data={'title': 'created', 'body': ''})
+    assert b'created' in client.get('/').data
+
+
+def test_index_cache_write_during_render(client, app, monkeypatch):
+    """
+      메인 페이지를 랜더링하는 동안 글이 수정되는 경우를 테스트 합니다.
+      1. DB를 읽은 뒤 캐시에 저장하기 전에 글이 수정되면, 수정 전의 페이지는 캐시에 저장되지 않습니다.
+      2. 다음 요청은 수정된 글을 보여줍니다.
+    """
+    render_template = blog.render_template
+
+    def render_with_write(*args, **kwargs):
+        html = render_template(*args, **kwargs)
+        monkeypatch.setattr(blog, 'render_template', render_template)
+        blog.execute_write(blog.update_post, 1, 'updated', '')
+        blog.invalidate_feed('post:1')
+        return html
+
+    monkeypatch.setattr(blog, 'render_template', render_with_write)
+    assert b'test title' in client.get('/').data
+    assert b'updated' in client.get('/').data
+
+
+def test_index_conditional_get(client, auth, app):
+    """
+      메인 페이지와 글 수정 화면의 조건부 GET을 테스트 합니다.
+      1. 응답에는 ETag와 Last-Modified가 포함됩니다.
+      2. 같은 ETag로 다시 요청하면 캐시 여부와 관계없이 304가 반환됩니다.
+      3. 글이 수정되면 ETag가 바뀌어 200이 반환됩니다.
+    """
+    response = client.get('/')
+    etag = response.headers['ETag']
+    assert response.last_modified is not None
+    assert client.get('/', headers={'If-None-Match': etag}).status_code == 304
+
+    app.extensions['flaskr.page_cache'].clear()
+    assert client.get('/', headers={'If-None-Match': etag}).status_code == 304
+
+    auth.login()
+    response = client.get('/1/update')
+    update_etag = response.headers['ETag']
+    assert client.get('/1/update', headers={'If-None-Match': update_etag}).status_code == 304
+
+    client.post('/1/update', data={'title': 'updated', 'body': ''})
+    assert client.get('/1/update', headers={'If-None-Match': update_etag}).status_code == 200
+    auth.logout()
+
+    response = client.get('/', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_index_streamed(client, app):
+    """
+      메인 페이지의 스트리밍 랜더링을 테스트 합니다.
+      1. FEED_RENDERING을 'streamed'로 설정하면 응답이 스트리밍됩니다.
+      2. 한 번에 랜더링한 것과 같이 글 목록과 페이지 링크가 나타납니다.
+    """
+    app.config['FEED_RENDERING'] = 'streamed'
+    app.config['POSTS_PER_PAGE'] = 1
+
+    with app.app_context():
+        db = get_db()
+        db.execute(
+            "INSERT INTO post (title, body, author_id, created) VALUES ('second', '', 1, '2018-01-02 00:00:00')"
+        )
+        db.commit()
+
+    response = client.get('/')
+    assert response.is_streamed
+    assert b'second' in response.data
+    assert b'test title' not in response.data
+    assert b'before=2018-01-02+00:00:00,2' in response.data
+
+    response = client.get('/?before=2018-01-02 00:00:00,2')
+    assert b'test title' in response.data
+    assert b'after=2018-01-01+00:00:00,1' in response.data
+    assert b'before=' not in response.data
+
+
+def test_search(client, auth, app):
+    """
+      글 검색 기능을 테스트 합니다.
+      1. 검색어로 시작하는 단어가 포함된 글을 찾고, 찾은 단어를 <mark>로 표시합니다.
+      2. 글이 수정/삭제되면 검색 인덱스도 함께 갱신됩니다.
+      3. FTS5 문법이나 HTML이 섞인 검색어도 오류 없이 처리합니다.
+      4. SEARCH_MAX_PAGE를 넘는 페이지는 404를 반환합니다.
+    """
+    response = client.get('/search?q=bod')
+    assert b'<mark>body</mark>' in response.data
+    assert b'by test on 2018-01-01' in response.data
+
+    auth.login()
+    client.post('/1/update', data={'title': 'renamed', 'body': 'changed'})
+    assert b'No posts found.' in client.get('/search?q=body').data
+    assert b'<mark>changed</mark>' in client.get('/search?q=changed').data
+
+    assert client.get('/search?q="AND (<b>').status_code == 200
+    assert client.get('/search?q=body&page=100').status_code == 200
+    assert client.get('/search?q=body&page=101').status_code == 404
+    assert client.get('/search?q=body&page=99999999999999999999').status_code == 404
+
+    client.post('/1/delete')
+    assert b'No posts found.' in client.get('/search?q=changed').data
@@ -0,0 +1,59 @@
+from flaskr.cache import LRUCache, PageCache
+
+"""
+ 이 모듈은 flaskr의 cache.py에서 정의한 기능을 테스트하기 위한 목적을 가집니다.
+  1. LRU 캐시는 크기를 넘어서면 가장 오래 사용되지 않은 항목부터 지웁니다.
+  2. LRU 캐시는 ttl이 지난 항목을 없는 것으로 취급합니다.
+  3. 페이지 캐시는 태그가 무효화된 페이지만 지웁니다.
+  4. 페이지를 만드는 동안 무효화가 있었다면 페이지를 저장하지 않습니다.
+"""
+
+
+def test_lru_eviction():
+    cache = LRUCache(maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+
+    # 'b'가 가장 오래 사용되지 않았으므로 지워집니다.
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert len(cache) == 2
+
+
+def test_lru_ttl():
+    now = [0]
+    cache = LRUCache(maxsize=2, ttl=10, timer=lambda: now[0])
+    cache.set('a', 1)
+    now[0] = 9
+    assert cache.get('a') == 1
+    now[0] = 10
+    assert cache.get('a') is None
+
+
+def test_page_cache_invalidate():
+    cache = PageCache(LRUCache())
+    cache.set('first', 'html1', ['post:1', 'feed:head'])
+    cache.set('second', 'html2', ['post:2'])
+
+    cache.invalidate('post:2')
+    assert cache.get('first') == 'html1'
+    assert cache.get('second') is None
+
+    cache.invalidate('feed:head')
+    assert cache.get('first') is None
+
+
+def test_page_cache_tokens():
+    cache = PageCache(LRUCache())
+    tokens = cache.tokens('feed:head')
+    cache.set('first', 'html1', ['post:1', 'feed:head'], tokens)
+    assert cache.get('first') == 'html1'
+
+    # 토큰을 읽은 뒤에 글이 수정되었다면, 오래된 페이지는 저장되지 않습니다.
+    tokens = cache.tokens('feed:head')
+    cache.invalidate('post:1')
+    cache.set('second', 'html2', ['post:1', 'feed:head'], tokens)
+    assert cache.get('second') is None
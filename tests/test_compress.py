@@ -0,0 +1,76 @@
+import gzip
+import os
+import shutil
+
+"""
+ 이 모듈은 flaskr의 compress.py에서 정의한 기능을 테스트하기 위한 목적을 가집니다.
+  1. gzip을 지원하는 브라우저에는 압축된 응답을 보냅니다.
+  2. 작은 응답과 gzip을 지원하지 않는 브라우저에는 압축하지 않습니다.
+  3. 페이지 캐시에 저장된 페이지는 압축한 본문을 다시 사용합니다.
+  4. compress-static 명령어로 미리 압축한 정적 파일을 그대로 보내고, 원본이 바뀌었다면 원본을 보냅니다.
+"""
+
+
+def test_compress_response(client, app):
+    plain = client.get('/')
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.headers['Vary'] == 'Cookie, Accept-Encoding'
+
+    response = client.get('/', headers={'Accept-Encoding': 'gzip, deflate'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.data) == plain.data
+
+    # 최소 크기보다 작은 응답과 q=0으로 거부한 경우에는 압축하지 않습니다.
+    app.config['COMPRESS_MIN_SIZE'] = len(plain.data) + 1
+    assert 'Content-Encoding' not in client.get('/', headers={'Accept-Encoding': 'gzip'}).headers
+    app.config['COMPRESS_MIN_SIZE'] = 0
+    assert 'Content-Encoding' not in client.get('/', headers={'Accept-Encoding': 'gzip;q=0'}).headers
+
+
+def test_compress_cached_page(client, monkeypatch):
+    calls = []
+    compress = gzip.compress
+
+    def counting_compress(*args, **kwargs):
+        calls.append(args)
+        return compress(*args, **kwargs)
+
+    monkeypatch.setattr(gzip, 'compress', counting_compress)
+
+    first = client.get('/', headers={'Accept-Encoding': 'gzip'})
+    second = client.get('/', headers={'Accept-Encoding': 'gzip'})
+    assert second.headers['Content-Encoding'] == 'gzip'
+    assert second.data == first.data
+    assert len(calls) == 1
+
+    assert 'Content-Encoding' not in client.get('/').headers
+
+
+def test_compress_static(app, runner, tmp_path):
+    static = tmp_path / 'static'
+    shutil.copytree(app.static_folder, static)
+    app.static_folder = str(static)
+
+    result = runner.invoke(args=['compress-static'])
+    assert 'Compressed 1 static files.' in result.output
+    assert 'Compressed 0 static files.' in runner.invoke(args=['compress-static']).output
+
+    client = app.test_client()
+    response = client.get('/static/style.css', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.mimetype == 'text/css'
+    assert gzip.decompress(response.data) == (static / 'style.css').read_bytes()
+    response.close()
+
+    response = client.get('/static/style.css')
+    assert 'Content-Encoding' not in response.headers
+    response.close()
+
+    # 압축한 뒤에 원본 파일이 바뀌면 오래된 압축 파일 대신 원본을 보냅니다.
+    (static / 'style.css').write_text('body { color: red; }\n' * 100)
+    stat = os.stat(static / 'style.css.gz')
+    os.utime(static / 'style.css', (stat.st_atime, stat.st_mtime + 10))
+    response = client.get('/static/style.css', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.data == (static / 'style.css').read_bytes()
+    response.close()
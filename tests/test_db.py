@@ -1,7 +1,9 @@
 import sqlite3
 
 import pytest
-from flaskr.db import get_db
+from flask import g
+from flaskr import create_app
+from flaskr.db import get_db, get_pool, get_read_db, init_db
 
 """
  이 모듈은 flaskr의 db.py가 가지는 기능을 테스트하기 위한 목적을 가집니다. 
@@ -54,4 +56,173 @@ def test_init_db_command(runner, monkeypatch):
     assert 'Initialized' in result.output
 
     # Recorder.called가 True로 변경됐는지 테스트합니다.
-    assert Recorder.called
\ No newline at end of file
+    assert Recorder.called
+
+def test_pool_reuses_connection(app):
+
+    """
+     1. app context가 종료되면 커넥션은 닫히지 않고 풀에 반납됩니다.
+     2. 다음 app context에서는 반납된 커넥션을 다시 빌려옵니다.
+     3. 풀에서 만든 커넥션은 설정된 PRAGMA 값을 가지고 있어야 합니다.
+    """
+
+    with app.app_context():
+        conn = get_db().connection
+
+    assert get_pool(app).idle == 1
+
+    with app.app_context():
+        db = get_db()
+        assert db.connection is conn
+        assert db.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        assert db.execute('PRAGMA synchronous').fetchone()[0] == 1
+        assert db.execute('PRAGMA busy_timeout').fetchone()[0] == 5000
+
+def test_pool_health_check(app):
+
+    """
+     풀에 반납된 커넥션이 사용할 수 없는 상태라면, 새로운 커넥션으로 바꿔서 빌려줍니다.
+    """
+
+    with app.app_context():
+        conn = get_db().connection
+
+    conn.close()
+
+    with app.app_context():
+        db = get_db()
+        assert db.connection is not conn
+        assert db.execute('SELECT 1').fetchone()[0] == 1
+
+def test_read_db(app):
+
+    """
+     1. get_read_db()는 쓰기 커넥션과 다른, 읽기 전용 풀의 커넥션을 빌려줍니다.
+     2. 읽기 전용 커넥션으로 데이터를 바꾸려고 하면 오류가 발생합니다.
+     3. 쓰기 커넥션에서 커밋한 내용은 읽기 전용 커넥션에서 보입니다.
+     4. app context가 종료되면 읽기 전용 풀에 반납됩니다.
+    """
+
+    with app.app_context():
+        db = get_db()
+        read_db = get_read_db()
+        assert read_db is get_read_db()
+        assert read_db.connection is not db.connection
+        assert read_db.execute('PRAGMA query_only').fetchone()[0] == 1
+
+        with pytest.raises(sqlite3.OperationalError) as e:
+            read_db.execute('DELETE FROM post')
+        assert 'readonly' in str(e.value)
+
+        db.execute("UPDATE post SET title = 'written' WHERE id = 1")
+        db.commit()
+        assert read_db.execute('SELECT title FROM post WHERE id = 1').fetchone()[0] == 'written'
+
+    assert get_pool(app, read_only=True).idle == 1
+    assert get_pool(app).idle == 1
+
+def test_sql_instrumentation(tmp_path):
+
+    """
+     1. SQL_INSTRUMENTATION이 켜져 있으면 실행된 쿼리가 g.sql_queries에 기록됩니다.
+     2. 기록에는 SQL 문, 파라미터 개수, 실행 시간, 결과 행 수가 포함됩니다.
+     3. 꺼져 있으면 아무것도 기록되지 않습니다.
+    """
+
+    app = create_app({
+        'TESTING': True,
+        'DATABASE': str(tmp_path / 'flaskr.sqlite'),
+        'SQL_INSTRUMENTATION': True,
+        'TEMPLATE_BYTECODE_CACHE': False,
+    })
+
+    with app.app_context():
+        init_db()
+        db = get_db()
+        db.executemany('INSERT INTO user (username, password) VALUES (?, ?)', [('a', 'a'), ('b', 'b')])
+        rows = db.execute('SELECT * FROM user WHERE id > ?', (0,)).fetchall()
+
+        record = g.sql_queries[-1]
+        assert len(rows) == 2
+        assert record.sql == 'SELECT * FROM user WHERE id > ?'
+        assert record.params == 1
+        assert record.rows == 2
+        assert record.duration > 0
+        assert g.sql_queries[-2].params == 4
+        assert g.sql_queries[-2].rows == 2
+
+    app = create_app({
+        'TESTING': True,
+        'DATABASE': str(tmp_path / 'flaskr.sqlite'),
+        'TEMPLATE_BYTECODE_CACHE': False,
+    })
+
+    with app.app_context():
+        get_db().execute('SELECT 1').fetchone()
+        assert 'sql_queries' not in g
+
+
+
+def test_rebuild_search_index_command(runner, app):
+
+    """
+     1. 검색 인덱스가 없는 기존 데이터베이스를 만들기 위해 post_fts를 지웁니다.
+     2. rebuild-search-index 명령어를 실행하면 인덱스와 트리거가 다시 만들어지고, 기존 글이 검색됩니다.
+    """
+
+    with app.app_context():
+        db = get_db()
+        db.execute('DROP TABLE post_fts')
+        db.execute('DROP TRIGGER post_fts_insert')
+        db.commit()
+
+    result = runner.invoke(args=['rebuild-search-index'])
+    assert 'Rebuilt the search index (1 posts).' in result.output
+
+    with app.app_context():
+        db = get_db()
+        assert db.execute("SELECT rowid FROM post_fts WHERE post_fts MATCH 'test'").fetchone()[0] == 1
+        db.execute("INSERT INTO post (title, body, author_id) VALUES ('new', '', 1)")
+        assert db.execute("SELECT COUNT(*) FROM post_fts WHERE post_fts MATCH 'new'").fetchone()[0] == 1
+
+
+def test_upgrade_db_command(runner, app):
+    """
+     1. author_name, post_count 열이 추가되기 전의 데이터베이스를 만들기 위해 열과 관련 트리거를 지웁니다.
+     2. upgrade-db 명령어를 실행하면 열이 추가되고, 기존 글의 작성자 이름과 사용자의 글 수가 채워지며,
+        트리거가 다시 만들어집니다.
+     3. feed_version이 올라갑니다.
+     4. 다시 실행하면 아무것도 바뀌지 않습니다.
+    """
+    with app.app_context():
+        db = get_db()
+        db.execute('DROP TRIGGER post_author_name')
+        db.execute('DROP TRIGGER user_username_update')
+        db.execute('ALTER TABLE post DROP COLUMN author_name')
+        db.execute('DROP TRIGGER post_count_insert')
+        db.execute('DROP TRIGGER post_count_delete')
+        db.execute('ALTER TABLE user DROP COLUMN post_count')
+        db.commit()
+        version = db.execute('SELECT version FROM feed_version').fetchone()[0]
+
+    result = runner.invoke(args=['upgrade-db'])
+    assert 'added column post.author_name' in result.output
+    assert 'created trigger post_author_name' in result.output
+    assert 'created trigger user_username_update' in result.output
+    assert 'added column user.post_count' in result.output
+    assert 'created trigger post_count_insert' in result.output
+
+    with app.app_context():
+        db = get_db()
+        assert db.execute('SELECT author_name FROM post WHERE id = 1').fetchone()[0] == 'test'
+        assert [row[0] for row in db.execute('SELECT post_count FROM user ORDER BY id')] == [1, 0]
+        assert db.execute('SELECT version FROM feed_version').fetchone()[0] > version
+        db.execute("INSERT INTO post (title, body, author_id) VALUES ('new', '', 2)")
+        assert db.execute(
+            "SELECT author_name FROM post WHERE title = 'new'"
+        ).fetchone()[0] == 'other'
+        assert db.execute('SELECT post_count FROM user WHERE id = 2').fetchone()[0] == 1
+        db.rollback()
+
+    result = runner.invoke(args=['upgrade-db'])
+    assert 'Upgraded the database (0 changes).' in result.output
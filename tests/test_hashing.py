@@ -0,0 +1,60 @@
+import threading
+import time
+
+import pytest
+from werkzeug.exceptions import ServiceUnavailable
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from flaskr.db import get_db
+from flaskr.hashing import HashPool, _method_prefix
+
+"""
+ 이 모듈은 flaskr의 hashing.py에서 정의한 기능을 테스트하기 위한 목적을 가집니다.
+  1. 해시 프로세스 풀은 별도의 프로세스에서 함수를 실행합니다.
+  2. 풀이 가득 차면 기다리지 않고 503(ServiceUnavailable)을 발생시킵니다.
+  3. 오래된 방식으로 저장된 해시는 로그인에 성공하면 현재 정책으로 다시 저장됩니다.
+  4. 해시 방식의 접두어는 해시를 계산하지 않고 설정 문자열로 만듭니다.
+"""
+
+
+def test_hash_pool_saturated():
+    pool = HashPool(1, queue_depth=0, retry_after=3)
+    try:
+        assert pool.run(check_password_hash, 'pbkdf2:sha256:1$a$b', 'x') is False
+
+        worker = threading.Thread(target=pool.run, args=(time.sleep, 1))
+        worker.start()
+        time.sleep(0.1)
+
+        with pytest.raises(ServiceUnavailable) as e:
+            pool.run(time.sleep, 0)
+        assert e.value.get_response().headers['Retry-After'] == '3'
+
+        worker.join()
+        assert pool.run(time.sleep, 0) is None
+    finally:
+        pool.shutdown()
+
+
+def test_rehash_on_login(app, auth):
+    """
+     1. 해시 정책을 data.sql과 다른 방식으로 바꾼 뒤 로그인합니다.
+     2. 로그인에 성공하면 저장된 해시가 새로운 방식으로 바뀌고, 다시 로그인할 수 있어야 합니다.
+    """
+    app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+
+    assert auth.login().status_code == 302
+
+    with app.app_context():
+        pwhash = get_db().execute("SELECT password FROM user WHERE username = 'test'").fetchone()[0]
+        assert pwhash.startswith('pbkdf2:sha256:1000$')
+
+    assert auth.login().status_code == 302
+    assert auth.login(password='wrong').status_code == 200
+
+
+@pytest.mark.parametrize('method', (
+    'scrypt', 'scrypt:16384:8:1', 'pbkdf2', 'pbkdf2:sha512', 'pbkdf2:sha256:1000',
+))
+def test_method_prefix(method):
+    assert _method_prefix(method) == generate_password_hash('', method).split('$', 1)[0]
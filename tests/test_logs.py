@@ -0,0 +1,49 @@
+import logging
+from logging.handlers import QueueHandler
+
+from flask.logging import default_handler
+
+from flaskr import create_app
+from flaskr.logs import StartupProfiler
+
+"""
+ 이 모듈은 flaskr의 logs.py에서 정의한 기능을 테스트하기 위한 목적을 가집니다.
+  1. app.logger는 큐에 로그를 넣기만 하고, 운영 환경에서는 WARNING 이상만 남깁니다.
+  2. 요청을 처리하는 동안 표준 출력에 아무것도 쓰지 않습니다.
+  3. create_app()의 단계별 시작 시간을 기록하고, startup-profile 명령어로 보여줍니다.
+"""
+
+
+def test_logging(app, client, capsys):
+    assert default_handler not in app.logger.handlers
+    assert any(isinstance(handler, QueueHandler) for handler in app.logger.handlers)
+    assert app.logger.getEffectiveLevel() == logging.WARNING
+
+    capsys.readouterr()
+    client.get('/')
+    assert capsys.readouterr().out == ''
+
+    debug = create_app({
+        'TESTING': True, 'DEBUG': True, 'LOG_LEVEL': 'DEBUG', 'TEMPLATE_BYTECODE_CACHE': False,
+    })
+    assert debug.logger.isEnabledFor(logging.DEBUG)
+    assert sum(isinstance(handler, QueueHandler) for handler in debug.logger.handlers) == 1
+
+
+def test_startup_profile(app, runner):
+    steps = [name for name, duration in app.extensions['flaskr.startup_profile'].steps]
+    for name in ('import flask', 'config', 'db.init_app', 'blueprint blog'):
+        assert name in steps
+
+    result = runner.invoke(args=['startup-profile'])
+    assert 'db.init_app' in result.output
+    assert result.output.rstrip().endswith('total')
+
+
+def test_startup_profiler():
+    ticks = iter([0.0, 0.5, 1.5])
+    profiler = StartupProfiler(timer=lambda: next(ticks))
+    profiler.mark('first')
+    profiler.mark('second')
+    assert profiler.steps == [('first', 0.5), ('second', 1.0)]
+    assert profiler.total == 1.5
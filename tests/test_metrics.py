@@ -0,0 +1,108 @@
+import threading
+
+import pytest
+
+from flaskr import create_app
+from flaskr.db import PooledConnection, get_db
+from flaskr.metrics import MetricsRegistry
+
+"""
+ 이 모듈은 flaskr의 metrics.py에서 정의한 기능을 테스트하기 위한 목적을 가집니다.
+  1. /metrics는 엔드포인트별 응답 시간 히스토그램, 상태 코드, 쿼리 수를 Prometheus 형식으로 보여줍니다.
+  2. 종료된 스레드의 지표도 합계에 남아있습니다.
+  3. METRICS_TOKEN을 지정하면 같은 토큰을 보낸 요청만 /metrics를 읽을 수 있습니다.
+  4. METRICS_ENABLED는 기본값이 False이며, 꺼져 있다면 /metrics가 없고 쿼리 수도 세지 않습니다.
+"""
+
+TOKEN = 'metrics-token'
+HEADERS = {'Authorization': 'Bearer ' + TOKEN}
+
+
+@pytest.fixture
+def client(app):
+    # 지표는 기본값으로 꺼져 있으므로, 같은 데이터베이스를 사용하고 지표를 켠 앱을 만듭니다.
+    metrics_app = create_app({
+        'TESTING': True,
+        'DATABASE': app.config['DATABASE'],
+        'HASH_POOL_WORKERS': 0,
+        'TEMPLATE_BYTECODE_CACHE': False,
+        'METRICS_ENABLED': True,
+        'METRICS_TOKEN': TOKEN,
+    })
+    return metrics_app.test_client()
+
+
+def parse(text):
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            samples[name] = float(value)
+    return samples
+
+
+def test_metrics(client):
+    client.get('/')
+    client.get('/')
+    client.get('/missing/page')
+
+    assert client.get('/metrics').status_code == 403
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 403
+
+    response = client.get('/metrics', headers=HEADERS)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    assert '# TYPE flaskr_request_duration_seconds histogram' in response.text
+
+    samples = parse(response.text)
+    assert samples['flaskr_request_duration_seconds_count{endpoint="blog.index"}'] == 2
+    assert samples['flaskr_request_duration_seconds_bucket{endpoint="blog.index",le="+Inf"}'] == 2
+    assert samples['flaskr_request_duration_seconds_sum{endpoint="blog.index"}'] > 0
+    assert samples['flaskr_requests_total{endpoint="blog.index",status="200"}'] == 2
+    assert samples['flaskr_requests_total{endpoint="unknown",status="404"}'] == 1
+    assert samples['flaskr_sql_queries_total{endpoint="blog.index"}'] >= 2
+    assert samples['flaskr_sql_query_seconds_total{endpoint="blog.index"}'] > 0
+    assert samples['flaskr_requests_in_flight'] == 1
+    assert samples['flaskr_admission_rejected_total{kind="read"}'] == 0
+
+    # 히스토그램의 칸은 누적된 값입니다.
+    buckets = [
+        value for name, value in samples.items()
+        if name.startswith('flaskr_request_duration_seconds_bucket{endpoint="blog.index"')
+    ]
+    assert buckets == sorted(buckets)
+
+    samples = parse(client.get('/metrics', headers=HEADERS).text)
+    assert samples['flaskr_requests_total{endpoint="metrics",status="200"}'] == 1
+    assert samples['flaskr_requests_total{endpoint="metrics",status="403"}'] == 2
+
+
+def test_registry_retired_threads():
+    registry = MetricsRegistry((0.1, 1.0))
+
+    def work():
+        metrics = registry.local()
+        metrics.start()
+        metrics.finish('blog.index', 200, 0.5, 3, 0.01)
+
+    thread = threading.Thread(target=work)
+    thread.start()
+    thread.join()
+    work()
+
+    total = registry.collect()
+    assert total.durations['blog.index'] == [0, 2, 0]
+    assert total.statuses[('blog.index', 200)] == 2
+    assert total.queries['blog.index'] == [6, 0.02]
+    assert total.in_flight == 0
+
+    # 종료된 스레드의 지표는 다음에 합칠 때도 남아있습니다.
+    assert registry.collect().statuses[('blog.index', 200)] == 2
+
+
+def test_metrics_disabled(app):
+    assert not app.config['METRICS_ENABLED']
+    assert app.test_client().get('/metrics').status_code == 404
+
+    with app.app_context():
+        assert type(get_db()) is PooledConnection
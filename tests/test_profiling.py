@@ -0,0 +1,52 @@
+import os
+
+from flaskr.profiling import profile_paths
+
+"""
+ 이 모듈은 flaskr의 profiling.py에서 정의한 기능을 테스트하기 위한 목적을 가집니다.
+  1. 서명된 헤더가 있는 요청만 측정되고, 잘못된 서명은 무시됩니다.
+  2. PROFILE_SAMPLE_RATE가 1이면 모든 요청이 측정됩니다.
+  3. flask profiles 명령어로 저장된 프로파일을 엔드포인트별로 모아봅니다.
+"""
+
+
+def test_profile_header(client, app, runner, tmp_path):
+    app.config['PROFILE_DIR'] = str(tmp_path)
+
+    result = runner.invoke(args=['profiles', 'token'])
+    header, token = result.output.strip().split(': ')
+    assert header == 'X-Flaskr-Profile'
+
+    client.get('/')
+    client.get('/', headers={header: token + 'x'})
+    assert profile_paths(str(tmp_path), 'blog.index') == []
+
+    client.get('/', headers={header: token})
+    paths = profile_paths(str(tmp_path), 'blog.index')
+    assert len(paths) == 1
+    assert os.listdir(os.path.dirname(paths[0])) == [os.path.basename(paths[0])]
+
+
+def test_profile_sample_rate(client, app, runner, tmp_path):
+    app.config['PROFILE_DIR'] = str(tmp_path)
+    app.config['PROFILE_SAMPLE_RATE'] = 1.0
+
+    client.get('/')
+    client.get('/')
+    client.get('/auth/login')
+    client.get('/static/style.css')
+    assert len(profile_paths(str(tmp_path), 'blog.index')) == 2
+
+    result = runner.invoke(args=['profiles', 'list'])
+    assert 'auth.login' in result.output
+    assert 'blog.index' in result.output
+    assert '2 profiles' in result.output
+
+    result = runner.invoke(args=['profiles', 'top', 'blog.index', '--limit', '5', '--last', '1'])
+    assert result.exit_code == 0
+    assert '1 profiles for blog.index' in result.output
+    assert 'cumulative' in result.output
+
+    result = runner.invoke(args=['profiles', 'top', 'blog.create'])
+    assert result.exit_code != 0
+    assert 'No profiles for blog.create' in result.output
@@ -0,0 +1,54 @@
+import logging
+import os
+
+from flaskr import create_app
+
+"""
+ 이 모듈은 flaskr의 templating.py에서 정의한 기능을 테스트하기 위한 목적을 가집니다.
+  1. compile-templates 명령어는 모든 템플릿의 바이트코드를 캐시 폴더에 저장합니다.
+  2. 새로 만든 앱은 저장된 바이트코드를 사용하므로 템플릿을 다시 컴파일하지 않습니다.
+  3. TEMPLATE_WARMUP이 True라면 create_app()에서 모든 템플릿을 랜더링합니다.
+"""
+
+
+def test_compile_templates(app, tmp_path):
+    directory = tmp_path / 'jinja_cache'
+    config = {'TESTING': True, 'DATABASE': app.config['DATABASE'], 'TEMPLATE_CACHE_DIR': str(directory)}
+    first = create_app(config)
+    # 캐시 폴더는 처음 바이트코드를 저장할 때 만들어집니다.
+    assert not directory.exists()
+    result = first.test_cli_runner().invoke(args=['compile-templates'])
+    names = first.jinja_env.list_templates()
+    assert 'Compiled {} templates'.format(len(names)) in result.output
+    assert len(os.listdir(directory)) == len(names)
+
+    second = create_app(config)
+
+    def compile(*args, **kwargs):
+        raise AssertionError('template was compiled again')
+
+    second.jinja_env.compile = compile
+    for name in names:
+        second.jinja_env.get_template(name)
+
+
+def test_compile_templates_disabled(runner):
+    result = runner.invoke(args=['compile-templates'])
+    assert result.exit_code != 0
+    assert 'TEMPLATE_BYTECODE_CACHE is disabled' in result.output
+
+
+def test_template_warmup(app, caplog):
+    caplog.set_level(logging.INFO, logger=app.logger.name)
+    warmed = create_app({
+        'TESTING': True,
+        'DATABASE': app.config['DATABASE'],
+        'TEMPLATE_BYTECODE_CACHE': False,
+        'TEMPLATE_WARMUP': True,
+        'LOG_LEVEL': 'INFO',
+    })
+
+    count = len(warmed.jinja_env.list_templates())
+    assert 'Warmed up {} templates'.format(count) in caplog.text
+    assert 'warm-up failed' not in caplog.text
+    assert len(warmed.jinja_env.cache) == count
@@ -0,0 +1,107 @@
+import json
+import sqlite3
+
+import pytest
+
+from flaskr import create_app
+from flaskr.db import get_db, init_db
+from flaskr.transfer import import_rows
+
+"""
+ 이 모듈은 flaskr의 transfer.py에서 정의한 기능을 테스트하기 위한 목적을 가집니다.
+  1. export 명령어는 사용자와 글을 JSON Lines 형식으로 내보냅니다.
+  2. import 명령어는 내보낸 파일을 다른 데이터베이스로 가져오고, 인덱스와 검색 인덱스를 다시 만듭니다.
+  3. 배치 크기가 사용자 수보다 작아도, 글은 작성자가 저장된 뒤에 저장됩니다.
+  4. 가져오기에 실패하면 커밋하지 않은 배치는 되돌리고, 인덱스를 다시 만든 뒤 원래 오류를 발생시킵니다.
+"""
+
+
+def test_export_import(runner, tmp_path):
+    """
+     1. 테스트 데이터베이스를 파일로 내보냅니다.
+     2. 비어있는 새 데이터베이스로 가져옵니다. (batch-size를 1로 하여 여러 트랜잭션으로 나눕니다)
+     3. 사용자와 글, 인덱스, 검색 인덱스가 모두 옮겨졌는지 확인합니다.
+    """
+    path = tmp_path / 'export.jsonl'
+    result = runner.invoke(args=['export', str(path)])
+    assert 'Exported 3 rows' in result.output
+
+    lines = path.read_text(encoding='utf8').splitlines()
+    assert lines[0].startswith('{"type":"user","id":1,"username":"test"')
+    assert lines[2].startswith('{"type":"post","id":1,"author_id":1,"created":"2018-01-01 00:00:00"')
+
+    app = create_app({
+        'TESTING': True,
+        'DATABASE': str(tmp_path / 'imported.sqlite'),
+        'TEMPLATE_BYTECODE_CACHE': False,
+    })
+    with app.app_context():
+        init_db()
+
+    result = app.test_cli_runner().invoke(args=['import', str(path), '--batch-size', '1'])
+    assert 'Imported 3 rows' in result.output
+
+    with app.app_context():
+        db = get_db()
+        assert db.execute('SELECT COUNT(*) FROM user').fetchone()[0] == 2
+        post = db.execute('SELECT * FROM post WHERE id = 1').fetchone()
+        assert post['title'] == 'test title'
+        assert post['body'] == 'test\nbody'
+        assert post['author_name'] == 'test'
+        assert db.execute('SELECT post_count FROM user WHERE id = 1').fetchone()[0] == 1
+        assert db.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE name = 'post_created_id'"
+        ).fetchone()[0] == 1
+        assert db.execute(
+            "SELECT rowid FROM post_fts WHERE post_fts MATCH 'body'"
+        ).fetchone()[0] == 1
+
+
+def test_import_failure(app):
+    """
+     1. 두 번째 배치의 두 번째 사용자 이름이 중복되어 가져오기가 실패합니다.
+     2. 첫 번째 배치만 남고, 실패한 배치의 첫 번째 사용자는 저장되지 않습니다.
+     3. 삭제했던 인덱스와 트리거는 다시 만들어집니다.
+    """
+    lines = [
+        json.dumps({'type': 'user', 'id': id, 'username': username, 'password': ''})
+        for id, username in ((3, 'a'), (4, 'b'), (5, 'c'), (6, 'a'))
+    ]
+
+    with app.app_context():
+        with pytest.raises(sqlite3.IntegrityError):
+            import_rows(lines, batch_size=2)
+
+        db = get_db()
+        assert [row[0] for row in db.execute('SELECT id FROM user ORDER BY id')] == [1, 2, 3, 4]
+        assert db.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE name IN ('post_created_id', 'post_count_insert')"
+        ).fetchone()[0] == 2
+
+
+def test_import_users_before_posts(app, runner, tmp_path):
+    """
+     1. 사용자 3명과 마지막 사용자의 글 2개를 batch-size 2, --no-defer-indexes로 가져옵니다.
+     2. 사용자 배치가 가득 차기 전에 글 배치가 가득 차더라도, 글은 트리거로 작성자 이름과 글 수가 채워집니다.
+    """
+    lines = [
+        {'type': 'user', 'id': id, 'username': 'user{}'.format(id), 'password': ''}
+        for id in (3, 4, 5)
+    ] + [
+        {'type': 'post', 'id': id, 'author_id': 5, 'created': '2018-01-02 00:00:00',
+         'title': 'post {}'.format(id), 'body': ''}
+        for id in (2, 3)
+    ]
+    path = tmp_path / 'import.jsonl'
+    path.write_text(''.join(json.dumps(line) + '\n' for line in lines), encoding='utf8')
+
+    result = runner.invoke(args=['import', str(path), '--batch-size', '2', '--no-defer-indexes'])
+    assert result.exception is None
+    assert 'Imported 5 rows' in result.output
+
+    with app.app_context():
+        db = get_db()
+        assert [row[0] for row in db.execute(
+            'SELECT author_name FROM post WHERE author_id = 5'
+        )] == ['user5', 'user5']
+        assert db.execute('SELECT post_count FROM user WHERE id = 5').fetchone()[0] == 2
@@ -0,0 +1,133 @@
+import sqlite3
+import threading
+
+import pytest
+from werkzeug.exceptions import ServiceUnavailable
+
+from flaskr.db import create_pool, get_db
+from flaskr.writequeue import WriteBatcher
+
+"""
+ 이 모듈은 flaskr의 writequeue.py에서 정의한 기능을 테스트하기 위한 목적을 가집니다.
+  1. 동시에 들어온 쓰기 작업은 한 트랜잭션으로 묶여서 커밋됩니다.
+  2. 실패한 작업만 되돌려지고, 같은 묶음의 다른 작업은 커밋됩니다.
+  3. 시간 안에 실행되지 않은 작업은 취소되어 나중에도 실행되지 않습니다.
+  4. 커넥션을 만들지 못해도 쓰기 스레드는 종료되지 않습니다.
+  5. WRITE_BATCHING이 켜져 있으면 글 작성이 쓰기 묶음 처리기를 거칩니다.
+"""
+
+
+def insert_title(db, title):
+    return db.execute(
+        'INSERT INTO post (title, body, author_id) VALUES (?, ?, 1)', (title, '')
+    ).lastrowid
+
+
+def test_write_batcher(app):
+    batcher = WriteBatcher(create_pool(app.config), max_batch=8, max_delay=0.2)
+    results = {}
+
+    def submit(title):
+        try:
+            results[title] = batcher.submit(insert_title, title)
+        except Exception as e:
+            results[title] = e
+
+    try:
+        threads = [threading.Thread(target=submit, args=('post {}'.format(i),)) for i in range(8)]
+        threads.append(threading.Thread(target=submit, args=(None,)))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        batcher.close()
+
+    # title은 NOT NULL이므로 None을 넣은 작업만 실패한다.
+    assert isinstance(results.pop(None), sqlite3.IntegrityError)
+    assert len(set(results.values())) == 8
+
+    stats = batcher.stats.snapshot()
+    assert stats['operations'] == 9
+    assert stats['errors'] == 1
+    assert stats['batches'] < 9
+
+    with app.app_context():
+        count = get_db().execute("SELECT COUNT(*) FROM post WHERE title LIKE 'post %'").fetchone()[0]
+        assert count == 8
+
+
+def test_write_batcher_timeout(app):
+    batcher = WriteBatcher(create_pool(app.config), max_delay=0, timeout=0.1)
+    started = threading.Event()
+    release = threading.Event()
+    results = []
+
+    def blocking_insert(db, title):
+        started.set()
+        release.wait()
+        return insert_title(db, title)
+
+    # 첫 작업이 쓰기 스레드를 잡고 있는 동안 두 번째 작업은 시간을 넘겨 503을 돌려받습니다.
+    # 첫 작업은 이미 실행 중이므로 시간이 지나도 커밋될 때까지 기다립니다.
+    thread = threading.Thread(
+        target=lambda: results.append(batcher.submit(blocking_insert, 'running'))
+    )
+    try:
+        thread.start()
+        started.wait()
+        with pytest.raises(ServiceUnavailable):
+            batcher.submit(insert_title, 'cancelled')
+        release.set()
+        thread.join()
+    finally:
+        release.set()
+        batcher.close()
+
+    assert len(results) == 1
+    with app.app_context():
+        db = get_db()
+        assert db.execute("SELECT COUNT(*) FROM post WHERE title = 'running'").fetchone()[0] == 1
+        assert db.execute("SELECT COUNT(*) FROM post WHERE title = 'cancelled'").fetchone()[0] == 0
+
+
+class FlakyPool(object):
+
+    # 처음 한 번은 커넥션을 만들지 못하는 풀입니다.
+    def __init__(self, pool):
+        self.pool = pool
+        self.failed = False
+
+    def connect(self):
+        if not self.failed:
+            self.failed = True
+            raise sqlite3.OperationalError('unable to open database file')
+        return self.pool.connect()
+
+    def discard(self, conn):
+        self.pool.discard(conn)
+
+
+def test_write_batcher_connect_error(app):
+    batcher = WriteBatcher(FlakyPool(create_pool(app.config)), max_delay=0, timeout=5)
+    try:
+        with pytest.raises(sqlite3.OperationalError):
+            batcher.submit(insert_title, 'first')
+        assert batcher.submit(insert_title, 'second')
+    finally:
+        batcher.close()
+
+    assert batcher.stats.snapshot()['errors'] == 1
+
+
+def test_create_with_write_batching(app, client, auth):
+    app.config['WRITE_BATCHING'] = True
+    auth.login()
+    client.post('/create', data={'title': 'batched', 'body': ''})
+
+    batcher = app.extensions['flaskr.write_batcher']
+    batcher.close()
+    assert batcher.stats.snapshot()['operations'] == 1
+
+    with app.app_context():
+        assert get_db().execute("SELECT COUNT(*) FROM post WHERE title = 'batched'").fetchone()[0] == 1